@@ -0,0 +1,300 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput benchmark of the simulation and of its components.
+
+Measures:
+    - End to end: Simulation.start for every scenario, number of stations and duration, reported as wall seconds and
+      simulated milliseconds per wall second. The stations of the scenario are replicated at seeded random positions
+      of the room to reach the requested number.
+    - Components: the cost per call of calculate_position, calculate_rssi, should_miss_package and of the write and
+      flush of BufferedCsvFileWriter, and the cost per element of their batch counterparts.
+
+Usage:
+    python benchmarks/bench_simulation.py [--quick] [--repeat 3] [--json results.json]
+    python benchmarks/bench_simulation.py --baseline benchmarks/baseline.json [--tolerance 0.25]
+
+Every measurement is the median of --repeat runs, and every result is a cost, lower is better. With --baseline the
+results are compared with a previous --json file, and the exit code is 1 if any cost grew more than --tolerance, so
+a performance change can be proved against the baseline saved before it.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(root_dir)
+
+from classes.config import Config
+from classes.lib.bufferedcsvfilewriter import BufferedCsvFileWriter
+from classes.models.stationtable import StationTable
+from classes.simulation import Simulation
+from classes.simulators.rssi.factory import RssiFactory
+from classes.simulators.trajectory.factory import TrajectoryFactory
+
+SCENARIOS = ('sample', 'danis2022')
+STATION_COUNTS = (12, 100, 1000)
+DURATIONS_SECONDS = (60, 600)
+
+# Reduced sizes of --quick, for a fast check while developing
+QUICK_STATION_COUNTS = (12, 100)
+QUICK_DURATIONS_SECONDS = (10,)
+
+# Calls of each component microbenchmark
+COMPONENT_CALLS = 20000
+QUICK_COMPONENT_CALLS = 2000
+
+
+def _scenario_paths(scenario: str) -> tuple:
+    config_dir = os.path.join(root_dir, "config", scenario)
+    return (os.path.join(config_dir, "config.json"), os.path.join(config_dir, "stations.json"))
+
+
+def _load_stations(stations_path: str, count: int, config: Config) -> StationTable:
+    """
+    Returns the stations of a scenario, replicated at seeded random positions of the room up to the given count.
+    """
+    with open(stations_path, 'r') as file:
+        base_stations = json.load(file)
+    rng = np.random.default_rng(count)
+    stations = []
+    for index in range(count):
+        station = dict(base_stations[index % len(base_stations)])
+        if index >= len(base_stations):
+            station['mac'] = f"{index:012x}"
+            station['x'] = float(rng.uniform(0, config.room_dim_meters['x']))
+            station['y'] = float(rng.uniform(0, config.room_dim_meters['y']))
+        stations.append(station)
+    return StationTable(stations)
+
+
+def _median_seconds(function, repeat: int, setup=None) -> float:
+    """
+    Returns the median wall time in seconds of calling a function, with the result of the untimed setup if given.
+    """
+    times = []
+    for _ in range(repeat):
+        arguments = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        function(*arguments)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_end_to_end(scenarios: tuple, station_counts: tuple, durations: tuple, repeat: int) -> dict:
+    """
+    Times Simulation.start for every combination, without plotting, writing the CSV output to a temporary directory.
+    """
+    results = {}
+    for scenario in scenarios:
+        config_path, stations_path = _scenario_paths(scenario)
+        for station_count in station_counts:
+            for duration in durations:
+                config = Config(config_path, overrides={'simulation_duration_seconds': duration, 'seed': 1, 'plot_trajectory': False})
+                with tempfile.TemporaryDirectory() as output_dir:
+                    # The stations keep their transmission schedule, so every run starts from new ones
+                    seconds = _median_seconds(lambda simulation: simulation.start(), repeat,
+                                              setup=lambda: Simulation(config, _load_stations(stations_path, station_count, config), output_dir, output_prefix='bench'))
+                key = f"{scenario}/stations={station_count}/duration={duration}s"
+                results[key] = {
+                    "wall_seconds": seconds,
+                    "simulated_ms_per_wall_second": duration * 1000 / seconds,
+                }
+                print(f"{key}: {seconds:.3f} s, {duration * 1000 / seconds:,.0f} simulated ms/s", file=sys.stderr)
+    return results
+
+
+def bench_components(calls: int, repeat: int) -> dict:
+    """
+    Times the components of the simulation on the danis2022 scenario, in nanoseconds per call or per element.
+    """
+    config_path, stations_path = _scenario_paths('danis2022')
+    config = Config(config_path, overrides={'seed': 1})
+    station_table = _load_stations(stations_path, 12, config)
+    stations = station_table.stations
+    margin = config.margin_meters
+    bounds = dict(min_x=margin, max_x=config.room_dim_meters['x'] - margin, min_y=margin, max_y=config.room_dim_meters['y'] - margin)
+    speed = config.speed_meters_second
+    rng = np.random.default_rng(1)
+    xs = rng.uniform(bounds['min_x'], bounds['max_x'], calls)
+    ys = rng.uniform(bounds['min_y'], bounds['max_y'], calls)
+    station_indices = rng.integers(0, len(stations), calls)
+    timestamps = np.arange(calls, dtype=np.int64)
+    distances = np.hypot(xs - station_table.x[station_indices], ys - station_table.y[station_indices])
+
+    def trajectory_simulator():
+        return TrajectoryFactory.create_trajectory_simulator(config.trajectory_simulator_module, config.trajectory_simulator_module_parameters,
+                                                             rng=np.random.default_rng(1))
+
+    def rssi_simulator():
+        simulator = RssiFactory.create_rssi_simulator(config.rssi_simulator_module, config.rssi_simulator_module_parameters,
+                                                      noise_rng=np.random.default_rng(1), loss_rng=np.random.default_rng(2))
+        simulator.prepare(station_table, config.room_dim_meters['x'], config.room_dim_meters['y'])
+        return simulator
+
+    def calculate_position():
+        simulator = trajectory_simulator()
+        angle, x, y = np.radians(config.initial_angle_degrees), config.initial_position['x'], config.initial_position['y']
+        for step in range(calls):
+            x, y, angle = simulator.calculate_position(current_time=step, milliseconds_per_iteration=1, last_angle=angle, last_x=x, last_y=y, speed=speed, **bounds)
+
+    def calculate_positions():
+        trajectory_simulator().calculate_positions(start_time=1, steps=calls, milliseconds_per_iteration=1, last_angle=np.radians(config.initial_angle_degrees),
+                                                   last_x=config.initial_position['x'], last_y=config.initial_position['y'], speed=speed, **bounds)
+
+    def calculate_rssi():
+        simulator = rssi_simulator()
+        for i in range(calls):
+            simulator.calculate_rssi(station=stations[station_indices[i]], current_time=int(timestamps[i]), milliseconds_per_iteration=1,
+                                     current_x=xs[i], current_y=ys[i], speed=speed)
+
+    def calculate_rssi_batch():
+        rssi_simulator().calculate_rssi_batch(stations=station_table, station_indices=station_indices, timestamps=timestamps, milliseconds_per_iteration=1,
+                                              positions_x=xs, positions_y=ys, speed=speed)
+
+    def should_miss_package():
+        simulator = rssi_simulator()
+        for i in range(calls):
+            simulator.should_miss_package(stations[station_indices[i]], distances[i])
+
+    def should_miss_package_batch():
+        rssi_simulator().should_miss_package_batch(station_table, station_indices, distances)
+
+    macs = station_table.mac[station_indices]
+    rssis = rng.integers(-100, -30, calls)
+
+    def csv_write():
+        with tempfile.TemporaryDirectory() as output_dir:
+            writer = BufferedCsvFileWriter(os.path.join(output_dir, 'bench.csv'))
+            for i in range(calls):
+                writer.write([float(timestamps[i]) / 1000, xs[i], ys[i], macs[i], int(rssis[i])])
+            writer.close()
+
+    def csv_write_columns():
+        with tempfile.TemporaryDirectory() as output_dir:
+            writer = BufferedCsvFileWriter(os.path.join(output_dir, 'bench.csv'))
+            writer.write_columns([timestamps / 1000, xs, ys, macs, rssis])
+            writer.close()
+
+    def csv_flush():
+        # One flush per written row, the worst case of the buffering
+        with tempfile.TemporaryDirectory() as output_dir:
+            writer = BufferedCsvFileWriter(os.path.join(output_dir, 'bench.csv'))
+            for i in range(calls):
+                writer.write([float(timestamps[i]) / 1000, xs[i], ys[i], macs[i], int(rssis[i])])
+                writer.flush()
+            writer.close()
+
+    components = {
+        "calculate_position": calculate_position,
+        "calculate_positions": calculate_positions,
+        "calculate_rssi": calculate_rssi,
+        "calculate_rssi_batch": calculate_rssi_batch,
+        "should_miss_package": should_miss_package,
+        "should_miss_package_batch": should_miss_package_batch,
+        "csv_write": csv_write,
+        "csv_write_columns": csv_write_columns,
+        "csv_write_flush": csv_flush,
+    }
+    results = {}
+    for name, function in components.items():
+        nanoseconds = _median_seconds(function, repeat) * 1e9 / calls
+        results[name] = {"ns_per_call": nanoseconds}
+        print(f"{name}: {nanoseconds:,.0f} ns per call", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compares the costs of two runs of the benchmark.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The results of the baseline run.
+        tolerance (float): The allowed relative increase of each cost.
+
+    Returns:
+        list: The regressions, as (case, metric, baseline value, current value) tuples.
+    """
+    regressions = []
+    for section in ("end_to_end", "components"):
+        for case, metrics in results.get(section, {}).items():
+            baseline_metrics = baseline.get(section, {}).get(case, None)
+            if baseline_metrics is None:
+                continue
+            for metric in ("wall_seconds", "ns_per_call"):
+                if metric not in metrics or metric not in baseline_metrics:
+                    continue
+                ratio = metrics[metric] / baseline_metrics[metric]
+                print(f"{section}/{case}: {ratio:.2f}x the baseline {metric}", file=sys.stderr)
+                if ratio > 1 + tolerance:
+                    regressions.append((f"{section}/{case}", metric, baseline_metrics[metric], metrics[metric]))
+    return regressions
+
+
+def _parse_list(value: str) -> tuple:
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark of the simulation and of its components.")
+    parser.add_argument("--quick", action="store_true", help="Use reduced sizes, for a fast check.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated scenarios of the config directory.")
+    parser.add_argument("--stations", default=None, help="Comma separated numbers of stations of the end to end benchmark.")
+    parser.add_argument("--durations", default=None, help="Comma separated simulation durations in seconds of the end to end benchmark.")
+    parser.add_argument("--skip-end-to-end", action="store_true", help="Only run the component benchmarks.")
+    parser.add_argument("--skip-components", action="store_true", help="Only run the end to end benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of measurements of each case, the median is reported.")
+    parser.add_argument("--json", default=None, help="Path of a JSON file where the results are saved, to be used as baseline.")
+    parser.add_argument("--baseline", default=None, help="Path of a previous JSON file to compare the results with.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative cost increase over the baseline.")
+    args = parser.parse_args()
+
+    station_counts = tuple(int(value) for value in _parse_list(args.stations)) if args.stations else (QUICK_STATION_COUNTS if args.quick else STATION_COUNTS)
+    durations = tuple(int(value) for value in _parse_list(args.durations)) if args.durations else (QUICK_DURATIONS_SECONDS if args.quick else DURATIONS_SECONDS)
+
+    results = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "quick": args.quick,
+    }
+    if not args.skip_end_to_end:
+        results["end_to_end"] = bench_end_to_end(_parse_list(args.scenarios), station_counts, durations, args.repeat)
+    if not args.skip_components:
+        results["components"] = bench_components(QUICK_COMPONENT_CALLS if args.quick else COMPONENT_CALLS, args.repeat)
+
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for case, metric, baseline_value, value in regressions:
+            print(f"Regression in {case}: {metric} {value:.6g} is greater than the baseline {baseline_value:.6g}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
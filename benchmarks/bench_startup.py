@@ -0,0 +1,124 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Startup benchmark of the simulator command line.
+
+Measures, in fresh interpreters:
+    - The import time of main.py, from python -X importtime, and its most expensive modules.
+    - The wall time of "main.py --help".
+    - The wall time of a short simulation without plotting, and the heavy modules it imported.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--json results.json] [--max-import-ms 100]
+
+The exit code is 1 if the median import time of main.py exceeds --max-import-ms, or if the run without plotting
+imports matplotlib or pandas, so the script can be used to detect startup regressions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+config_dir = os.path.join(root_dir, "config", "danis2022")
+
+# Modules that a run without plotting must not import
+HEAVY_MODULES = ('matplotlib', 'pandas')
+
+# Short simulation without plotting, reports the heavy modules it imported
+RUN_SNIPPET = """
+import json, sys
+from main import App
+app = App({config!r}, {stations!r}, {output_dir!r}, config_overrides={{'simulation_duration_seconds': 1, 'plot_trajectory': False, 'seed': 1}})
+app.run_simulation(output_prefix='startup')
+print(json.dumps(sorted(name for name in {heavy!r} if name in sys.modules)))
+"""
+
+
+def _import_times(repeat: int) -> tuple:
+    """
+    Returns the import times of main.py in milliseconds, and the cumulative time of its slowest modules in the last run.
+    """
+    totals = []
+    modules = {}
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=root_dir, capture_output=True, text=True, check=True)
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = int(cumulative) / 1000
+        totals.append(modules.get("main", 0.0))
+    slowest = dict(sorted(((name, value) for name, value in modules.items() if name != "main"), key=lambda item: -item[1])[:10])
+    return (totals, slowest)
+
+
+def _wall_times(command: list, repeat: int) -> list:
+    """
+    Returns the wall times in milliseconds of running a command in a fresh interpreter.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=root_dir, capture_output=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark of the simulator command line.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measurements of each case, the median is reported.")
+    parser.add_argument("--json", default=None, help="Path of a JSON file where the results are saved.")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if the median import time of main.py is greater.")
+    args = parser.parse_args()
+
+    import_times, slowest_modules = _import_times(args.repeat)
+    help_times = _wall_times([sys.executable, "main.py", "--help"], args.repeat)
+    with tempfile.TemporaryDirectory() as output_dir:
+        snippet = RUN_SNIPPET.format(config=os.path.join(config_dir, "config.json"), stations=os.path.join(config_dir, "stations.json"),
+                                     output_dir=output_dir, heavy=HEAVY_MODULES)
+        run_times = _wall_times([sys.executable, "-c", snippet], args.repeat)
+        heavy_imported = json.loads(subprocess.run([sys.executable, "-c", snippet], cwd=root_dir, capture_output=True, text=True, check=True).stdout)
+
+    results = {
+        "python": sys.version.split()[0],
+        "import_main_ms": statistics.median(import_times),
+        "help_ms": statistics.median(help_times),
+        "run_no_plot_ms": statistics.median(run_times),
+        "heavy_modules_imported": heavy_imported,
+        "slowest_imports_ms": slowest_modules,
+    }
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+    failed = bool(heavy_imported)
+    if args.max_import_ms is not None and results["import_main_ms"] > args.max_import_ms:
+        print(f"Import time {results['import_main_ms']:.1f} ms is greater than {args.max_import_ms} ms", file=sys.stderr)
+        failed = True
+    if heavy_imported:
+        print(f"The run without plotting imported {', '.join(heavy_imported)}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,8 +14,12 @@
 
 import json
 import os
+import secrets
 
-import numpy as np
+from classes.lib.outputwriterfactory import OutputWriterFactory
+from classes.lib.trajectorysampler import TrajectorySampler
+from classes.simulators.rssi.factory import RssiFactory
+from classes.simulators.trajectory.factory import TrajectoryFactory
 
 
 class Config:
@@ -23,12 +27,31 @@ class Config:
     Config class for loading, extracting, and validating simulation configuration parameters.
     Attributes:
         simulation_duration_seconds (int): Duration of the simulation in seconds.
+        milliseconds_per_iteration (int | str): Time step of the simulation in milliseconds, or "auto" to derive it from the station frequencies.
         room_dim_meters (dict): Dimensions of the room in meters.
         margin_meters (float): Margin in meters.
         initial_position (dict): Initial position with 'x' and 'y' coordinates.
         speed_meters_second (float): Speed in meters per second.
         initial_angle_degrees (float): Initial angle in degrees.
+        seed (int): Root seed of the random streams of the simulation, a random one is chosen if not provided.
+        seed_spawn_key (list): Path of the random streams of the simulation from the ones of the root seed, e.g. the run of a batch. Empty for the root streams.
         output_trajectory (bool): Indicates if the trajectory is going to be registered.
+        devices (int): Number of mobile devices simulated at once, sharing the stations.
+        plot_trajectory (bool): Indicates if the registered trajectory is plotted at the end of the simulation.
+        plot_formats (list): File formats of the trajectory plot, e.g. ["png", "eps"].
+        plot_max_points (int): Maximum number of trajectory points drawn in the plot.
+        metrics (bool): Indicates if the time of each phase and the counters of the run are written to a JSON file.
+        profile (bool): Indicates if the run is profiled with cProfile, writing the statistics next to the output files.
+        output_format (str): Format of the output files, "csv", "npz" or "parquet".
+        output_row_group_size (int): Number of rows of each row group of the columnar output formats.
+        output_buffer_bytes (int): Size in bytes of the text buffered by the CSV output before writing to the file.
+        output_compression (bool): Indicates if the columnar output formats compress their row groups.
+        output_async (bool): Indicates if the output files are written by background threads.
+        output_queue_size (int): Maximum number of blocks waiting to be written by each background thread.
+        checkpoint_interval_seconds (float): Wall clock seconds between two checkpoints of the simulation state, 0 disables the checkpoints.
+        shards (int): Number of time shards whose RSSI values are generated in parallel, 1 runs the whole simulation in a single loop.
+        shard_workers (int | None): Number of worker processes of the shards, None for the number of CPUs.
+        trajectory_sampling (dict): Sampling of the trajectory output, with the sampling mode and its parameter. None writes every step.
         trajectory_simulator_module (str): Name of the trajectory simulator module.
         trajectory_simulator_parameters (dict): General configuration for all possible modules.
         trajectory_simulator_module_parameters (dict): Specific configuration for the selected trajectory module.
@@ -36,9 +59,19 @@ class Config:
         rssi_simulator_parameters (dict): General configuration for all possible RSSI modules.
         rssi_simulator_module_parameters (dict): Specific configuration for the selected RSSI module.
     """
-    def __init__(self, config_path):
+    def __init__(self, config_path, overrides: dict = None):
+        """
+        Loads and validates the configuration.
+
+        Args:
+            config_path (str): The path to the configuration file.
+            overrides (dict, optional): Values replacing the ones of the configuration file. The keys are the configuration
+                file keys, nested keys are joined with dots (e.g. "initial_position.x"). Defaults to None.
+        """
         # Load the configuration file
         config = self._load_config_file(config_path)
+        if overrides:
+            self._apply_overrides(config, overrides)
         
         # Extract and store localy all the required configuration parameters
         self._extract_config_parameters(config)
@@ -58,12 +91,43 @@ class Config:
         """
         # General parameters
         self.simulation_duration_seconds = config.get('simulation_duration_seconds', 60)
+        self.milliseconds_per_iteration = config.get('milliseconds_per_iteration', 1)
         self.room_dim_meters = config.get('room_dim_meters', None)
         self.margin_meters = config.get('margin_meters', 0)
         self.initial_position = config.get('initial_position', {'x': 0, 'y': 0})
         self.speed_meters_second = config.get('speed_meters_second', 0.5)
-        self.initial_angle_degrees = config.get('initial_angle_degrees', np.random.uniform(0, 360))
-        self.output_trajectory = config.get('output_trajectory', True) #Indicates if the trajectory is going to be registered (csv extracted and plotted)
+        # The seed is always defined, so any run can be reproduced
+        seed = config.get('seed', None)
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or seed < 0):
+            raise ValueError("Seed must be a non negative integer.")
+        if seed is None:
+            # Same 128 bits entropy numpy SeedSequence takes from the OS, without importing numpy
+            seed = secrets.randbits(128)
+        self.seed = seed
+        self.seed_spawn_key = config.get('seed_spawn_key', [])
+        if not isinstance(self.seed_spawn_key, list) or not all(isinstance(key, int) and not isinstance(key, bool) and key >= 0 for key in self.seed_spawn_key):
+            raise ValueError("Seed spawn key must be a list of non negative integers.")
+        self.initial_angle_degrees = config.get('initial_angle_degrees', None)
+        if self.initial_angle_degrees is None:
+            from classes.lib.randomstreams import RandomStreams
+            self.initial_angle_degrees = RandomStreams(self.seed, self.seed_spawn_key).scenario.uniform(0, 360)
+        self.output_trajectory = config.get('output_trajectory', True) #Indicates if the trajectory is going to be registered (csv extracted)
+        self.devices = config.get('devices', 1)
+        self.plot_trajectory = config.get('plot_trajectory', True) #Indicates if the registered trajectory is plotted
+        self.plot_formats = config.get('plot_formats', ['png', 'eps'])
+        self.plot_max_points = config.get('plot_max_points', 10000)
+        self.metrics = config.get('metrics', False)
+        self.profile = config.get('profile', False)
+        self.output_format = config.get('output_format', 'csv')
+        self.output_row_group_size = config.get('output_row_group_size', 65536)
+        self.output_buffer_bytes = config.get('output_buffer_bytes', 1048576)
+        self.output_compression = config.get('output_compression', True)
+        self.output_async = config.get('output_async', False)
+        self.output_queue_size = config.get('output_queue_size', 8)
+        self.checkpoint_interval_seconds = config.get('checkpoint_interval_seconds', 0)
+        self.shards = config.get('shards', 1)
+        self.shard_workers = config.get('shard_workers', None)
+        self.trajectory_sampling = config.get('trajectory_sampling', None)
 
         # Simulator modules parameters
         simulators = config.get('simulators', {})
@@ -76,6 +140,26 @@ class Config:
         self.rssi_simulator_parameters = simulators.get('rssi_parameters', {})
         self.rssi_simulator_module_parameters = self.rssi_simulator_parameters.get(self.rssi_simulator_module, {})
 
+    def _apply_overrides(self, config: dict, overrides: dict):
+        """
+        Replaces the values of the loaded configuration with the given overrides.
+
+        Args:
+            config (dict): The loaded configuration, modified in place.
+            overrides (dict): The new values, indexed by their dotted configuration key.
+
+        Returns:
+            None
+        """
+        for key, value in overrides.items():
+            path = key.split('.')
+            node = config
+            for name in path[:-1]:
+                if not isinstance(node.get(name, None), dict):
+                    node[name] = {}
+                node = node[name]
+            node[path[-1]] = value
+
     def _validate_config(self):
         """
         Validates the configuration parameters for the simulation.
@@ -83,20 +167,31 @@ class Config:
             ValueError: If any of the configuration parameters are invalid.
         Validations:
             - Simulation duration must be greater than 0.
+            - Milliseconds per iteration must be an integer greater than 0 or "auto".
             - Room dimensions must be provided and include 'x' and 'y' indices.
             - Room dimensions must be greater than 0.
             - Margin must be greater or equal to 0.
             - Initial position must include 'x' and 'y' indices and be greater or equal to 0.
             - Speed must be greater than 0.
             - Initial angle must be between 0 and 360 degrees.
-            - Trajectory simulator module must be provided.
-            - RSSI simulator module must be provided.
+            - Number of devices must be an integer greater than 0.
+            - Output format must be one of the available formats, the row group size, buffer bytes and queue size greater than 0 and the compression a boolean.
+            - Checkpoint interval must be a number greater or equal to 0, and the checkpoints require a resumable output format.
+            - Number of shards must be an integer greater than 0, the shard workers an integer greater than 0 or null, and the shards can not be checkpointed.
+            - Plot formats must be a non empty list and the plot max points at least 2.
+            - Trajectory sampling must define an available mode and its parameter.
+            - Trajectory simulator module must be provided and available in the registry.
+            - RSSI simulator module must be provided and available in the registry.
             - Initial position must be within the bounds of the room dimensions considering the margin.
         """
 
         # Basic parameters restrictions
         if self.simulation_duration_seconds <= 0:
             raise ValueError("Simulation duration must be greater than 0.")
+
+        if self.milliseconds_per_iteration != 'auto' and (not isinstance(self.milliseconds_per_iteration, int) or isinstance(self.milliseconds_per_iteration, bool)
+                                                          or self.milliseconds_per_iteration <= 0):
+            raise ValueError("Milliseconds per iteration must be an integer greater than 0 or \"auto\".")
         
         if self.room_dim_meters is None:
             raise ValueError("Room dimensions must be provided.")
@@ -118,12 +213,55 @@ class Config:
         
         if self.initial_angle_degrees < 0 or self.initial_angle_degrees >= 360:
             raise ValueError("Initial angle must be between 0 and 360 degrees.")
+
+        if not isinstance(self.devices, int) or isinstance(self.devices, bool) or self.devices <= 0:
+            raise ValueError("Number of devices must be an integer greater than 0.")
+        
+        if self.output_format not in OutputWriterFactory.FORMATS:
+            raise ValueError(f"Output format must be one of {', '.join(OutputWriterFactory.FORMATS)}.")
+        if self.output_row_group_size <= 0:
+            raise ValueError("Output row group size must be greater than 0.")
+        if self.output_buffer_bytes <= 0:
+            raise ValueError("Output buffer bytes must be greater than 0.")
+        if self.output_queue_size <= 0:
+            raise ValueError("Output queue size must be greater than 0.")
+        if not isinstance(self.output_compression, bool):
+            raise ValueError("Output compression must be a boolean.")
+
+        if not isinstance(self.checkpoint_interval_seconds, (int, float)) or isinstance(self.checkpoint_interval_seconds, bool) or self.checkpoint_interval_seconds < 0:
+            raise ValueError("Checkpoint interval must be a number of seconds greater or equal to 0.")
+        if self.checkpoint_interval_seconds and self.output_format not in OutputWriterFactory.RESUMABLE_FORMATS:
+            raise ValueError(f"Checkpoints require one of the {', '.join(OutputWriterFactory.RESUMABLE_FORMATS)} output formats.")
+
+        if not isinstance(self.shards, int) or isinstance(self.shards, bool) or self.shards <= 0:
+            raise ValueError("Number of shards must be an integer greater than 0.")
+        if self.shard_workers is not None and (not isinstance(self.shard_workers, int) or isinstance(self.shard_workers, bool) or self.shard_workers <= 0):
+            raise ValueError("Number of shard workers must be an integer greater than 0.")
+        if self.shards > 1 and self.checkpoint_interval_seconds:
+            raise ValueError("Sharded simulations can not be checkpointed.")
+
+        if not isinstance(self.plot_formats, list) or not self.plot_formats or not all(isinstance(plot_format, str) and plot_format for plot_format in self.plot_formats):
+            raise ValueError("Plot formats must be a non empty list of file formats.")
+        if not isinstance(self.plot_max_points, int) or self.plot_max_points < 2:
+            raise ValueError("Plot max points must be at least 2.")
+
+        if self.trajectory_sampling is not None:
+            if not isinstance(self.trajectory_sampling, dict) or 'mode' not in self.trajectory_sampling:
+                raise ValueError("Trajectory sampling must include the 'mode' index.")
+            try:
+                TrajectorySampler(**self.trajectory_sampling)
+            except TypeError:
+                raise ValueError("Trajectory sampling only accepts the 'mode', 'interval_ms' and 'distance_meters' indices.")
         
         if not self.trajectory_simulator_module:
             raise ValueError("Trajectory simulator module must be provided.")
+        if self.trajectory_simulator_module not in TrajectoryFactory.registry:
+            raise ValueError(f"Trajectory simulator {self.trajectory_simulator_module} not available.")
         
         if not self.rssi_simulator_module:
             raise ValueError("RSSI simulator module must be provided.")
+        if self.rssi_simulator_module not in RssiFactory.registry:
+            raise ValueError(f"RSSI simulator {self.rssi_simulator_module} not available.")
 
 
         # Room size coherence
@@ -0,0 +1,139 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import os
+from typing import List, Union
+
+import numpy as np
+
+from classes.config import Config
+from classes.lib.outputwriterfactory import OutputWriterFactory
+from classes.lib.randomstreams import RandomStreams
+from classes.models.station import Station
+from classes.models.stationtable import StationTable
+from classes.simulators.rssi.factory import RssiFactory
+
+
+class FingerprintGrid:
+    """
+    Generation of a static radio map: several RSSI samples of every station at every point of a regular grid.
+
+    The grid covers the room without the margins. The RSSI of all the points, stations and samples of a chunk of points
+    is calculated at once by the configured RSSI simulator, and written as a wide table with one row per point and
+    sample and one RSSI column per station. The points are processed in chunks, so the memory does not depend on the
+    size of the floor.
+
+    Attributes:
+        config (Config): The configuration object of the simulation.
+        station_table (StationTable): The stations of the simulation.
+        output_dir (str): The output directory for the radio map.
+        resolution_meters (float): The distance between two consecutive points of the grid.
+        samples_per_point (int): The number of RSSI samples of each station at each point.
+        output_prefix (str | None): The prefix of the output file name, None to build it from the current date and time.
+        missing_rssi (int): The value written when a sample is not received.
+        max_chunk_samples (int): The maximum number of samples (points x stations x samples) calculated at once.
+    """
+
+    def __init__(self, config: Config, stations: Union[List[Station], StationTable], output_dir: str, resolution_meters: float, samples_per_point: int = 1,
+                 output_prefix: str = None, missing_rssi: int = -100, max_chunk_samples: int = 1000000):
+        """
+        Initialize a FingerprintGrid object.
+
+        Args:
+            config (Config): The configuration object of the simulation.
+            stations (List[Station] | StationTable): The stations of the simulation.
+            output_dir (str): The output directory for the radio map.
+            resolution_meters (float): The distance between two consecutive points of the grid.
+            samples_per_point (int, optional): The number of RSSI samples of each station at each point. Defaults to 1.
+            output_prefix (str, optional): The prefix of the output file name. Defaults to None, the current date and time.
+            missing_rssi (int, optional): The value written when a sample is not received. Defaults to -100.
+            max_chunk_samples (int, optional): The maximum number of samples calculated at once. Defaults to 1000000.
+
+        Raises:
+            ValueError: If the resolution, the number of samples or the chunk size are not greater than 0.
+        """
+        if resolution_meters <= 0:
+            raise ValueError("Grid resolution must be greater than 0.")
+        if samples_per_point <= 0:
+            raise ValueError("Samples per point must be greater than 0.")
+        if max_chunk_samples <= 0:
+            raise ValueError("Chunk size must be greater than 0.")
+        self.config = config
+        self.station_table = StationTable.from_stations(stations)
+        self.output_dir = output_dir
+        self.resolution_meters = resolution_meters
+        self.samples_per_point = samples_per_point
+        self.output_prefix = output_prefix
+        self.missing_rssi = missing_rssi
+        self.max_chunk_samples = max_chunk_samples
+
+    def grid_points(self) -> tuple:
+        """
+        Calculates the points of the grid, from the lower margin of the room to the upper one.
+
+        Returns:
+            tuple: Two numpy arrays with the x and y coordinates of each point, ordered by x and then by y.
+        """
+        margin = self.config.margin_meters
+        axes = []
+        for dimension in (self.config.room_dim_meters['x'], self.config.room_dim_meters['y']):
+            # Small tolerance, so the upper margin is included when it is a multiple of the resolution
+            count = int(np.floor((dimension - 2 * margin) / self.resolution_meters + 1e-9)) + 1
+            axes.append(np.round(margin + np.arange(count) * self.resolution_meters, decimals=9))
+        grid_x, grid_y = np.meshgrid(axes[0], axes[1], indexing='ij')
+        return (grid_x.ravel(), grid_y.ravel())
+
+    def start(self) -> str:
+        """
+        Generates the radio map and writes it to the output file.
+
+        Returns:
+            str: The name of the output file.
+        """
+        output_prefix = self.output_prefix
+        if output_prefix is None:
+            output_prefix = f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_grid"
+
+        macs = self.station_table.mac.tolist()
+        columns = [('position_x', 'float32'), ('position_y', 'float32'), ('sample', 'int32')] + [(mac, 'int8') for mac in macs]
+        writer = OutputWriterFactory.create_writer(
+            self.config.output_format, os.path.join(self.output_dir, f"{output_prefix}_fingerprints"), columns,
+            row_group_size=self.config.output_row_group_size, buffer_bytes=self.config.output_buffer_bytes, compression=self.config.output_compression)
+
+        random_streams = RandomStreams(self.config.seed, self.config.seed_spawn_key)
+        rssi_simulator_module = RssiFactory.create_rssi_simulator(
+            self.config.rssi_simulator_module,
+            self.config.rssi_simulator_module_parameters,
+            noise_rng=random_streams.rssi_noise,
+            loss_rng=random_streams.packet_loss)
+
+        points_x, points_y = self.grid_points()
+        samples = self.samples_per_point
+        chunk_points = max(1, self.max_chunk_samples // (max(1, len(macs)) * samples))
+        try:
+            for start in range(0, len(points_x), chunk_points):
+                chunk_x = points_x[start:start + chunk_points]
+                chunk_y = points_y[start:start + chunk_points]
+                # (points, stations, samples) arrays
+                rssi, status = rssi_simulator_module.calculate_rssi_grid(self.station_table, chunk_x, chunk_y, samples)
+                rssi = np.where(status == rssi_simulator_module.RECEIVED, rssi, self.missing_rssi)
+                # One row per point and sample, one column per station
+                rows = rssi.transpose(0, 2, 1).reshape(-1, len(macs))
+                writer.write_columns([np.repeat(chunk_x, samples), np.repeat(chunk_y, samples), np.tile(np.arange(samples), len(chunk_x))]
+                                     + [rows[:, station] for station in range(len(macs))])
+        finally:
+            writer.close()
+
+        return writer.filename
@@ -0,0 +1,210 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+
+from classes.lib.outputwriterinterface import OutputWriterInterface
+
+
+class AsyncOutputWriter(OutputWriterInterface):
+    """
+    Output writer that moves the work of another writer to a background thread.
+
+    The rows and blocks of rows are sent to the thread through a bounded queue, so the simulation keeps producing while
+    the previous blocks are formatted and written. When the queue is full the producer waits (backpressure), which limits
+    the memory used by the pending blocks. An error raised by the wrapped writer is raised again in the producer thread
+    in its next call to the writer.
+
+    The blocks are not copied, so the producer must not modify the arrays after writing them.
+
+    Attributes:
+        writer (OutputWriterInterface): The wrapped writer, only used from the background thread.
+        queue_size (int): The maximum number of pending operations.
+    """
+
+    # Marks the end of the operations in the queue
+    _CLOSE = object()
+
+    def __init__(self, writer: OutputWriterInterface, queue_size: int = 8):
+        """
+        Initializes a new instance of the AsyncOutputWriter class.
+
+        Args:
+            writer (OutputWriterInterface): The writer to run in the background thread.
+            queue_size (int, optional): The maximum number of pending operations. Defaults to 8.
+
+        Raises:
+            ValueError: If the queue size is not greater than 0.
+        """
+        if queue_size <= 0:
+            raise ValueError("Queue size must be greater than 0.")
+        self._writer = writer
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._error = None
+        self._closed = False
+
+    @property
+    def filename(self):
+        return self._writer.filename
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer.enabled
+
+    @property
+    def writer(self) -> OutputWriterInterface:
+        return self._writer
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.maxsize
+
+    @property
+    def flushes(self) -> int:
+        return self._writer.flushes
+
+    def write(self, line: list):
+        """
+        Queues a row to be written by the background thread.
+
+        Args:
+            line (list): The values of the row, in the same order as the columns of the file.
+        """
+        if self.enabled:
+            self._put((self._writer.write, list(line)))
+
+    def write_columns(self, columns: list):
+        """
+        Queues a block of rows given as columns to be written by the background thread.
+
+        Args:
+            columns (list): One sequence (list or numpy array) per column of the file, all of them with the same length.
+        """
+        if self.enabled:
+            self._put((self._writer.write_columns, list(columns)))
+
+    def append_file(self, filename: str):
+        """
+        Queues the rows of a file to be appended by the background thread.
+
+        Args:
+            filename (str): The name of the file.
+        """
+        if self.enabled:
+            self._put((self._writer.append_file, filename))
+
+    def flush(self):
+        """
+        Queues a flush of the wrapped writer.
+        """
+        if self.enabled:
+            self._put((self._writer.flush, None))
+
+    def checkpoint(self) -> int:
+        """
+        Waits until all the pending operations are done and returns the checkpoint of the wrapped writer.
+
+        Returns:
+            int: The size of the file in bytes.
+
+        Raises:
+            Exception: The error raised by the wrapped writer, if any.
+        """
+        if self._thread is None:
+            return self._writer.checkpoint()
+        done = threading.Event()
+        result = []
+
+        def checkpoint():
+            try:
+                result.append(self._writer.checkpoint())
+            finally:
+                done.set()
+
+        self._put((checkpoint, None))
+        # The operations are discarded after an error of the wrapped writer
+        while not done.wait(0.1):
+            self._raise_error()
+        self._raise_error()
+        return result[0]
+
+    def close(self):
+        """
+        Waits until all the pending operations are done and closes the wrapped writer.
+
+        Raises:
+            Exception: The error raised by the wrapped writer, if any.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            self._writer.close()
+            return
+        self._queue.put(self._CLOSE)
+        self._thread.join()
+        self._raise_error()
+
+    def _put(self, operation: tuple):
+        """
+        Sends an operation to the background thread, waiting if the queue is full.
+
+        Args:
+            operation (tuple): The method of the wrapped writer and its argument.
+
+        Raises:
+            ValueError: If the writer is closed.
+            Exception: The error raised by the wrapped writer in a previous operation.
+        """
+        if self._closed:
+            raise ValueError("The writer is closed.")
+        self._raise_error()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"writer-{self.filename}", daemon=True)
+            self._thread.start()
+        self._queue.put(operation)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        """
+        Main function of the background thread, runs the queued operations until the writer is closed.
+        After an error the remaining operations are discarded, so the producer is never blocked.
+        """
+        failed = False
+        while True:
+            operation = self._queue.get()
+            if operation is self._CLOSE:
+                break
+            if failed:
+                continue
+            method, argument = operation
+            try:
+                if argument is None:
+                    method()
+                else:
+                    method(argument)
+            except Exception as error:
+                failed = True
+                self._error = error
+        try:
+            self._writer.close()
+        except Exception as error:
+            if not failed:
+                self._error = error
@@ -13,40 +13,76 @@
 # limitations under the License.
 
 import csv
+import io
+import os
+import shutil
 
-class BufferedCsvFileWriter:
+import numpy as np
+
+from classes.lib.outputwriterinterface import OutputWriterInterface
+
+class BufferedCsvFileWriter(OutputWriterInterface):
     """
     A class that provides buffered writing functionality to a file.
 
+    The rows are formatted into an in-memory buffer, encoded as they are written, which is written to a file handle
+    kept open during the whole life of the writer once it holds buffer_bytes bytes. The blocks of rows given as columns are formatted in bulk,
+    producing the same text as the csv module.
+
     Attributes:
         filename (str): The name of the file to write to.
-        buffer_size (int): The maximum number of lines to buffer before writing to the file.
-        buffer (list): The buffer that holds the lines to be written.
+        buffer_size (int): The maximum number of lines to buffer before writing to the file, None to only limit the size.
+        buffer_bytes (int): The maximum size in bytes of the encoded buffered text before writing to the file.
+        os_buffer_bytes (int): The size of the buffer of the file handle.
+        flushes (int): The number of times the buffer was written to the file.
 
     Methods:
         write(line): Appends a line to the buffer. If the buffer is full, it flushes the buffer to the file.
+        write_columns(columns): Appends a block of lines given as columns.
         flush(): Writes the contents of the buffer to the file.
+        append_file(filename): Appends the rows of another CSV file, without its header.
+        checkpoint(): Writes the buffer to disk and returns the size of the file.
+        resume(offset): Continues a file written up to a checkpoint.
         close(): Flushes the buffer and closes the file.
     """
 
-    def __init__(self, filename, buffer_size=1000, enabled=True):
+    # Characters that force the csv module to quote a field
+    _QUOTED_CHARACTERS = (',', '"', '\r', '\n')
+
+    def __init__(self, filename, buffer_size=None, enabled=True, buffer_bytes=1048576, os_buffer_bytes=1048576):
         """
         Initializes a new instance of the BufferedCsvFileWriter class.
 
         Args:
             filename (str): The name of the file to write to.
-            buffer_size (int, optional): The maximum number of lines to buffer before writing to the file. Defaults to 1000.
+            buffer_size (int, optional): The maximum number of lines to buffer before writing to the file. Defaults to None, no limit.
             enabled (bool, optional): Specifies whether the BufferedCsvFileWriter is enabled or not. Defaults to True.
+            buffer_bytes (int, optional): The maximum size in bytes of the encoded buffered text before writing to the file. Defaults to 1 MiB.
+            os_buffer_bytes (int, optional): The size in bytes of the buffer of the file handle. Defaults to 1 MiB.
         """
         self._filename = filename
         self._buffer_size = buffer_size
-        self._buffer = []
+        self._buffer_bytes = buffer_bytes
+        self._os_buffer_bytes = os_buffer_bytes
         self.enabled = enabled
+        # Reusable byte buffer, the text layer encoding the rows into it as they are written, with the encoding of the
+        # file, and the csv writer formatting the single rows
+        self._bytes = io.BytesIO()
+        self._buffer = io.TextIOWrapper(self._bytes, newline='', write_through=True)
+        self._csv_writer = csv.writer(self._buffer)
+        self._buffered_rows = 0
+        self._flushes = 0
+        # The file is opened on the first flush, so a disabled writer never creates it
+        self._file = None
 
     @property
     def filename(self):
         return self._filename
 
+    @property
+    def flushes(self) -> int:
+        return self._flushes
+
     def write(self, line: list):
         """
         Appends a line to the buffer. If the buffer is full, it flushes the buffer to the file.
@@ -56,24 +92,148 @@ class BufferedCsvFileWriter:
         """
         if not self.enabled:
             return
-        self._buffer.append(line)
-        if len(self._buffer) >= self._buffer_size:
-            self.flush()
+        self._csv_writer.writerow(line)
+        self._buffered_rows += 1
+        self._check_buffer()
+
+    def write_columns(self, columns: list):
+        """
+        Appends a block of lines given as columns. The numeric and plain text columns are formatted in bulk,
+        other blocks are formatted row by row with the csv module.
+
+        Args:
+            columns (list): One sequence (list or numpy array) per column, all of them with the same length.
+        """
+        if not self.enabled:
+            return
+        rows = len(columns[0])
+        if rows == 0:
+            return
+        text_columns = []
+        for column in columns:
+            text_column = self._format_column(column)
+            if text_column is None:
+                # Fallback, the csv module handles the quoting
+                self._csv_writer.writerows(zip(*[column.tolist() if hasattr(column, 'tolist') else column for column in columns]))
+                break
+            text_columns.append(text_column)
+        else:
+            self._buffer.write('\r\n'.join(map(','.join, zip(*text_columns))))
+            self._buffer.write('\r\n')
+        self._buffered_rows += rows
+        self._check_buffer()
 
     def flush(self):
         """
         Writes the contents of the buffer to the file.
         """
-        if not self._buffer:
+        if not self._bytes.tell():
+            return
+        if self._file is None:
+            self._file = open(self._filename, 'ab', buffering=self._os_buffer_bytes)
+        self._file.write(self._bytes.getvalue())
+        self._file.flush()
+        self._flushes += 1
+        self._clear_buffer()
+
+    def append_file(self, filename: str):
+        """
+        Appends the rows of a CSV file written with the same columns, copying its text after the header.
+
+        Args:
+            filename (str): The name of the file.
+        """
+        if not self.enabled:
+            return
+        self.flush()
+        if self._file is None:
+            self._file = open(self._filename, 'ab', buffering=self._os_buffer_bytes)
+        with open(filename, 'rb') as source:
+            source.readline()
+            shutil.copyfileobj(source, self._file, self._os_buffer_bytes)
+        self._file.flush()
+
+    def checkpoint(self) -> int:
+        """
+        Writes the buffer to disk and returns the size of the file, the offset from which a resumed simulation continues writing.
+
+        Returns:
+            int: The size of the file in bytes, 0 if the writer is disabled.
+        """
+        if not self.enabled:
+            return 0
+        self.flush()
+        if self._file is None:
+            return 0
+        # The checkpoint must not point beyond the data that survives a crash of the machine
+        os.fsync(self._file.fileno())
+        return os.fstat(self._file.fileno()).st_size
+
+    def resume(self, offset: int):
+        """
+        Continues a file written up to a checkpoint: the rows written after the offset are discarded, as well as the
+        buffered ones (e.g. the header), and the new rows are appended from the offset.
+
+        Args:
+            offset (int): The size of the file at the checkpoint, returned by checkpoint.
+
+        Raises:
+            ValueError: If the file is shorter than the offset.
+        """
+        if not self.enabled:
             return
-        with open(self._filename, 'a+', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(self._buffer)
-        self._buffer = []
+        size = os.path.getsize(self._filename) if os.path.exists(self._filename) else 0
+        if size < offset:
+            raise ValueError(f"The file {self._filename} has {size} bytes, less than the {offset} bytes of the checkpoint.")
+        if size > offset:
+            with open(self._filename, 'r+b') as file:
+                file.truncate(offset)
+        self._clear_buffer()
 
     def close(self):
         """
         Flushes the buffer and closes the file.
         """
-        if self._buffer:
-            self.flush()
\ No newline at end of file
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _check_buffer(self):
+        """
+        Flushes the buffer if it has reached the size or the number of lines limit.
+        """
+        if self._bytes.tell() >= self._buffer_bytes or (self._buffer_size is not None and self._buffered_rows >= self._buffer_size):
+            self.flush()
+
+    def _clear_buffer(self):
+        """
+        Empties the buffer.
+        """
+        self._bytes.seek(0)
+        self._bytes.truncate()
+        self._buffered_rows = 0
+
+    def _format_column(self, column) -> list:
+        """
+        Converts the values of a column to the text written by the csv module. The numbers of a list keep their own
+        type, so an int is written as 2 and not as 2.0, like the csv module does.
+
+        Args:
+            column (list or np.ndarray): The values of the column.
+
+        Returns:
+            list: The text of each value, None if any value needs the csv module (quoted text, None values...).
+        """
+        if not isinstance(column, np.ndarray) and all(type(value) in (int, float) for value in column):
+            return list(map(str, column))
+        array = column if isinstance(column, np.ndarray) else np.asarray(column)
+        if array.dtype.kind in 'biuf':
+            # Python ints and floats share their text representation with the csv module
+            return list(map(str, array.tolist()))
+        if array.dtype.kind == 'U':
+            values = array.tolist()
+            if any(character in value for value in set(values) for character in self._QUOTED_CHARACTERS) or '' in values:
+                return None
+            return values
+        return None
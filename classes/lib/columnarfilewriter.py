@@ -0,0 +1,242 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from abc import abstractmethod
+from typing import List, Tuple
+
+import numpy as np
+
+from classes.lib.outputwriterinterface import OutputWriterInterface
+
+
+class ColumnarFileWriter(OutputWriterInterface):
+    """
+    Base class of the binary columnar writers.
+
+    The rows are buffered per column and stored as typed arrays in row groups of a fixed number of rows.
+    Each column is defined by its name and type, which is either a numpy dtype name (e.g. "float32", "int8") or
+    DICTIONARY, which stores the values as integer codes of a dictionary shared by the whole file.
+
+    Attributes:
+        filename (str): The name of the file to write to.
+        columns (List[Tuple[str, str]]): The name and type of each column.
+        row_group_size (int): The number of rows of each row group.
+        enabled (bool): Specifies whether the writer is enabled or not.
+        flushes (int): The number of row groups written to the file.
+
+    Methods:
+        write(line): Appends a row to the buffer, a row group is written when the buffer is full.
+        write_columns(columns): Appends a block of rows given as columns.
+        flush(): Writes the buffered rows as a new row group.
+        append_file(filename): Appends the rows of another file of the same format, one row group at a time.
+        close(): Flushes the buffer and closes the file.
+        iter_row_groups(filename): Loads a file of the format one row group at a time, implemented by each format.
+    """
+
+    DICTIONARY = 'dictionary'
+
+    def __init__(self, filename: str, columns: List[Tuple[str, str]], row_group_size: int = 65536, enabled: bool = True):
+        """
+        Initializes a new instance of the columnar writer.
+
+        Args:
+            filename (str): The name of the file to write to.
+            columns (List[Tuple[str, str]]): The name and type of each column.
+            row_group_size (int, optional): The number of rows of each row group. Defaults to 65536.
+            enabled (bool, optional): Specifies whether the writer is enabled or not. Defaults to True.
+        """
+        self._filename = filename
+        self._columns = list(columns)
+        self._row_group_size = row_group_size
+        self.enabled = enabled
+        # Buffered chunks of each column and their total number of rows
+        self._buffer = [[] for _ in self._columns]
+        self._buffered_rows = 0
+        # Dictionary of each dictionary encoded column, value -> code
+        self._dictionaries = {name: {} for name, column_type in self._columns if column_type == self.DICTIONARY}
+        self._row_groups = 0
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def columns(self) -> List[Tuple[str, str]]:
+        return self._columns
+
+    @property
+    def row_group_size(self) -> int:
+        return self._row_group_size
+
+    @property
+    def flushes(self) -> int:
+        return self._row_groups
+
+    def write(self, line: list):
+        """
+        Appends a row to the buffer. If the buffer is full, it is written as a row group.
+
+        Args:
+            line (list): The values of the row, in the same order as the columns.
+        """
+        if not self.enabled:
+            return
+        self.write_columns([[value] for value in line])
+
+    def write_columns(self, columns: list):
+        """
+        Appends a block of rows given as columns. Full row groups are written as soon as they are available.
+
+        Args:
+            columns (list): One sequence (list or numpy array) per column, all of them with the same length.
+
+        Raises:
+            ValueError: If a value of an integer column is out of the range of its type.
+        """
+        if not self.enabled:
+            return
+        rows = len(columns[0])
+        if rows == 0:
+            return
+        for buffer, column in zip(self._buffer, columns):
+            buffer.append(column)
+        self._buffered_rows += rows
+        if self._buffered_rows >= self._row_group_size:
+            self._write_buffer(flush=False)
+
+    def flush(self):
+        """
+        Writes the buffered rows as a new row group.
+
+        Raises:
+            ValueError: If a value of an integer column is out of the range of its type.
+        """
+        if self._buffered_rows:
+            self._write_buffer(flush=True)
+
+    def append_file(self, filename: str):
+        """
+        Appends the rows of a file of the same format and columns. The file is loaded one row group at a time with the
+        iter_row_groups method of the writer, so the memory does not depend on the size of the file.
+
+        Args:
+            filename (str): The name of the file.
+        """
+        if not self.enabled:
+            return
+        for columns in self.iter_row_groups(filename):
+            self.write_columns([columns[name] for name, _ in self._columns])
+
+    def close(self):
+        """
+        Flushes the buffer and closes the file.
+        """
+        if not self.enabled:
+            return
+        try:
+            self.flush()
+        finally:
+            self._close_file()
+
+    def _write_buffer(self, flush: bool):
+        """
+        Converts the buffer to typed arrays and writes them as row groups. The chunks of each column are concatenated
+        once and every row group is a slice of the result, so a large block costs the same as many small ones.
+
+        Args:
+            flush (bool): Write all the buffered rows, the last row group may be smaller. Otherwise only the full row
+                groups are written and the remaining rows are kept in the buffer.
+        """
+        values = [np.concatenate([np.asarray(chunk) for chunk in chunks]) if len(chunks) > 1 else np.asarray(chunks[0]) for chunks in self._buffer]
+        rows = self._buffered_rows if flush else self._buffered_rows - self._buffered_rows % self._row_group_size
+        for start in range(0, rows, self._row_group_size):
+            end = min(start + self._row_group_size, rows)
+            row_group = {}
+            for (name, column_type), column in zip(self._columns, values):
+                if column_type == self.DICTIONARY:
+                    row_group[name] = self._encode(name, column[start:end])
+                else:
+                    row_group[name] = self._cast(name, column[start:end], column_type)
+            self._write_row_group(row_group)
+            self._row_groups += 1
+        self._buffer = [[column[rows:]] if rows < self._buffered_rows else [] for column in values]
+        self._buffered_rows -= rows
+
+    @staticmethod
+    def _cast(name: str, values: np.ndarray, column_type: str) -> np.ndarray:
+        """
+        Converts the values of a column to its type. The integer types do not hold every value, so the values out of
+        their range are rejected instead of wrapping around.
+
+        Args:
+            name (str): The name of the column.
+            values (np.ndarray): The values to convert.
+            column_type (str): The type of the column.
+
+        Returns:
+            np.ndarray: The typed values.
+
+        Raises:
+            ValueError: If the column has an integer type and a value is out of its range or is not finite.
+        """
+        dtype = np.dtype(column_type)
+        if dtype.kind in 'iu' and len(values) and values.dtype != dtype:
+            limits = np.iinfo(dtype)
+            if values.dtype.kind == 'f' and not np.isfinite(values).all():
+                raise ValueError(f"The column {name} of type {column_type} has values that are not finite.")
+            if values.min() < limits.min or values.max() > limits.max:
+                raise ValueError(f"The column {name} of type {column_type} only holds values between {limits.min} and {limits.max}, "
+                                 f"got values between {values.min()} and {values.max()}.")
+        return values.astype(dtype)
+
+    def _encode(self, name: str, values: np.ndarray) -> np.ndarray:
+        """
+        Encodes the values of a dictionary column, the new values are appended to the dictionary of the column.
+
+        Args:
+            name (str): The name of the column.
+            values (np.ndarray): The values to encode.
+
+        Returns:
+            np.ndarray: The int32 codes of the values.
+        """
+        dictionary = self._dictionaries[name]
+        unique_values, inverse = np.unique(values, return_inverse=True)
+        unique_codes = np.empty(len(unique_values), dtype=np.int32)
+        for index, value in enumerate(unique_values.tolist()):
+            unique_codes[index] = dictionary.setdefault(value, len(dictionary))
+        return unique_codes[inverse.reshape(-1)]
+
+    def _dictionary_values(self, name: str) -> list:
+        """
+        Returns the values of the dictionary of a column, sorted by code.
+        """
+        return list(self._dictionaries[name].keys())
+
+    @abstractmethod
+    def _write_row_group(self, row_group: dict):
+        """
+        Writes a row group to the file.
+
+        Args:
+            row_group (dict): The typed array of each column, dictionary columns are given as codes.
+        """
+        pass
+
+    @abstractmethod
+    def _close_file(self):
+        """
+        Stores the pending metadata (such as the dictionaries) and closes the file.
+        """
+        pass
@@ -12,13 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Callable
+
 import numpy as np
 
 class functionmodels:
     """
     A collection of mathematical function models.
+
+    The models used for the missing packages probability are kept in a registry. Each registered model gets an integer
+    code, so a model definition can be compiled once into its code and a vector of parameters, and then evaluated for
+    whole arrays of distances with evaluate. New models are added with register, without changing the simulators.
     """
 
+    # Code of the definitions without model
+    NONE = 0
+
+    # Registered models: name -> (code, function, parameter names), and the same entries indexed by code
+    _registry = {}
+    _by_code = [None]
+
     @staticmethod
     def sigmoid(x: float, a: float, b: float) -> float:
         """
@@ -63,4 +76,111 @@ class functionmodels:
         Returns:
         float: The calculated value of the linear model function.
         """
-        return a * x + b
\ No newline at end of file
+        return a * x + b
+
+    @classmethod
+    def register(cls, name: str, function: Callable, params: tuple = ('a', 'b')) -> int:
+        """
+        Registers a model for the missing packages probability.
+
+        Parameters:
+        name (str): The name of the model, used as 'function_model' in the station definitions.
+        function (Callable): Vectorized function (x, *params) -> probability between 0 and 1, the result is clipped.
+        params (tuple, optional): The names of the parameters, in the order they are passed to the function. Defaults to ('a', 'b').
+
+        Returns:
+        int: The code of the model.
+
+        Raises:
+        ValueError: If a model with the same name is already registered.
+        """
+        if name in cls._registry:
+            raise ValueError(f"The function model {name} is already registered.")
+        code = len(cls._registry) + 1
+        cls._registry[name] = (code, function, tuple(params))
+        cls._by_code.append(cls._registry[name])
+        return code
+
+    @classmethod
+    def names(cls) -> tuple:
+        """
+        Returns the names of the registered models, ordered by code.
+        """
+        return tuple(cls._registry)
+
+    @classmethod
+    def max_params(cls) -> int:
+        """
+        Returns the maximum number of parameters of the registered models.
+        """
+        return max(len(params) for _, _, params in cls._registry.values())
+
+    @classmethod
+    def compile(cls, definition: dict) -> tuple:
+        """
+        Validates a model definition and compiles it into its code and parameter vector.
+
+        Parameters:
+        definition (dict): The definition, with the 'function_model' name and the 'params' dictionary, or None.
+
+        Returns:
+        tuple: The code of the model (NONE for a None definition) and a numpy array with its parameters.
+
+        Raises:
+        ValueError: If the model is not registered or any of its parameters is missing.
+        """
+        if definition is None:
+            return (cls.NONE, np.zeros(0))
+        function_model = definition.get('function_model', None)
+        if function_model not in cls._registry:
+            raise ValueError(f"Unknown function model {function_model}, available models: {', '.join(cls._registry)}.")
+        code, _, names = cls._registry[function_model]
+        function_params = definition.get('params', None) or {}
+        if any(function_params.get(name, None) is None for name in names):
+            raise ValueError(f"Missing parameters {' and '.join(repr(name) for name in names)} for the {function_model} function model.")
+        return (code, np.array([function_params[name] for name in names], dtype=np.float64))
+
+    @classmethod
+    def evaluate(cls, codes: np.ndarray, params: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """
+        Evaluates compiled models for an array of inputs, each one with its own model.
+
+        Parameters:
+        codes (np.ndarray): The code of the model of each input.
+        params (np.ndarray): The parameters of the model of each input, one row per input.
+        x (np.ndarray): The inputs.
+
+        Returns:
+        np.ndarray: The value of the model of each input, 0 for the inputs without model.
+        """
+        values = np.zeros(len(x))
+        for code in np.unique(codes):
+            if code == cls.NONE:
+                continue
+            _, function, names = cls._by_code[code]
+            mask = codes == code
+            values[mask] = function(x[mask], *params[mask, :len(names)].T)
+        return values
+
+    @classmethod
+    def evaluate_one(cls, code: int, params: np.ndarray, x: float) -> float:
+        """
+        Evaluates a compiled model for a single input, calling its function directly.
+
+        Parameters:
+        code (int): The code of the model.
+        params (np.ndarray): The parameters of the model.
+        x (float): The input.
+
+        Returns:
+        float: The value of the model, 0 without model.
+        """
+        if code == cls.NONE:
+            return 0.0
+        _, function, names = cls._by_code[code]
+        return float(function(x, *params[:len(names)]))
+
+
+# Built-in models, registered first so their codes do not depend on the user models
+for _name in ('sigmoid', 'exponential', 'lineal'):
+    functionmodels.register(_name, getattr(functionmodels, _name))
@@ -0,0 +1,106 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import zipfile
+
+import numpy as np
+
+from classes.lib.columnarfilewriter import ColumnarFileWriter
+
+
+class NpzFileWriter(ColumnarFileWriter):
+    """
+    Columnar writer storing the rows in a numpy NPZ archive.
+
+    Each row group of each column is stored as the archive member "<column>.<row group>", and the dictionary of each
+    dictionary encoded column as "<column>.dictionary". The file can be loaded back with NpzFileWriter.read.
+    The members are deflate compressed by default, which takes some CPU time while writing. Without compression the
+    members are stored as they are, which is faster to write, e.g. for temporary files.
+    """
+
+    def __init__(self, filename: str, columns: list, row_group_size: int = 65536, enabled: bool = True, compression: bool = True):
+        """
+        Initializes a new instance of the NpzFileWriter class.
+
+        Args:
+            filename (str): The name of the file to write to.
+            columns (List[Tuple[str, str]]): The name and type of each column.
+            row_group_size (int, optional): The number of rows of each row group. Defaults to 65536.
+            enabled (bool, optional): Specifies whether the writer is enabled or not. Defaults to True.
+            compression (bool, optional): Specifies whether the members of the archive are deflate compressed. Defaults to True.
+        """
+        super().__init__(filename, columns, row_group_size=row_group_size, enabled=enabled)
+        self._compression = zipfile.ZIP_DEFLATED if compression else zipfile.ZIP_STORED
+        self._archive = None
+
+    def _write_row_group(self, row_group: dict):
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self._filename, 'w', compression=self._compression, allowZip64=True)
+        for name, values in row_group.items():
+            self._write_array(f"{name}.{self._row_groups:06d}", values)
+
+    def _close_file(self):
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self._filename, 'w', compression=self._compression, allowZip64=True)
+        for name in self._dictionaries:
+            self._write_array(f"{name}.dictionary", np.array(self._dictionary_values(name), dtype=str))
+        self._archive.close()
+        self._archive = None
+
+    def _write_array(self, member: str, values: np.ndarray):
+        with self._archive.open(f"{member}.npy", 'w', force_zip64=True) as file:
+            np.lib.format.write_array(file, np.ascontiguousarray(values), allow_pickle=False)
+
+    @staticmethod
+    def read(filename: str) -> dict:
+        """
+        Loads a file written by NpzFileWriter.
+
+        Args:
+            filename (str): The name of the file.
+
+        Returns:
+            dict: The full array of each column, the dictionary encoded columns are decoded.
+        """
+        row_groups = list(NpzFileWriter.iter_row_groups(filename))
+        if not row_groups:
+            return {}
+        return {name: np.concatenate([row_group[name] for row_group in row_groups]) for name in row_groups[0]}
+
+    @staticmethod
+    def iter_row_groups(filename: str):
+        """
+        Loads a file written by NpzFileWriter one row group at a time, only the members of a row group are read at once.
+
+        Args:
+            filename (str): The name of the file.
+
+        Yields:
+            dict: The array of each column in a row group, the dictionary encoded columns are decoded.
+        """
+        with np.load(filename, allow_pickle=False) as archive:
+            # The dictionaries are written when the file is closed, after the row groups
+            members = {}
+            dictionaries = {}
+            for member in archive.files:
+                name, part = member.rsplit('.', 1)
+                if part == 'dictionary':
+                    dictionaries[name] = archive[member]
+                else:
+                    members.setdefault(int(part), []).append((name, member))
+            for row_group in sorted(members):
+                columns = {}
+                for name, member in members[row_group]:
+                    columns[name] = dictionaries[name][archive[member]] if name in dictionaries else archive[member]
+                yield columns
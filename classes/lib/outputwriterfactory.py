@@ -0,0 +1,104 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List, Tuple
+
+from classes.lib.outputwriterinterface import OutputWriterInterface
+
+
+class OutputWriterFactory:
+    """
+    A factory class for creating the output writers of each output format.
+
+    Available formats:
+        - csv: Text CSV file, the columns definition is written as header.
+        - npz: Numpy NPZ archive with typed columns, written in row groups.
+        - parquet: Apache Parquet file with typed columns, written in row groups. Requires pyarrow.
+    """
+
+    FORMATS = ('csv', 'npz', 'parquet')
+    # Formats whose files can be continued by a simulation resumed from a checkpoint, the binary formats write their
+    # metadata when they are closed
+    RESUMABLE_FORMATS = ('csv',)
+
+    @staticmethod
+    def create_writer(output_format: str, filename: str, columns: List[Tuple[str, str]], enabled: bool = True, row_group_size: int = 65536, buffer_bytes: int = 1048576,
+                      resume_offset: int = None, compression: bool = True) -> OutputWriterInterface:
+        """
+        Creates an output writer based on the given format.
+
+        Args:
+            output_format (str): The name of the output format.
+            filename (str): The name of the file to write to, without extension.
+            columns (List[Tuple[str, str]]): The name and type of each column. The type is a numpy dtype name or "dictionary"
+                for the columns with few distinct values. The text formats ignore the types.
+            enabled (bool, optional): Specifies whether the writer is enabled or not. Defaults to True.
+            row_group_size (int, optional): The number of rows of each row group of the columnar formats. Defaults to 65536.
+            buffer_bytes (int, optional): The size in bytes of the text buffered by the text formats before writing to the file. Defaults to 1 MiB.
+            resume_offset (int, optional): The size of the file at the checkpoint a simulation is resumed from, the writer
+                continues the file from there. Only the text formats can be resumed. Defaults to None, a new file.
+            compression (bool, optional): Specifies whether the columnar formats compress their row groups. Defaults to True.
+
+        Returns:
+            OutputWriterInterface: An instance of the output writer.
+
+        Raises:
+            ValueError: If the output format is not available, or it can not be resumed.
+        """
+        if resume_offset is not None and output_format not in OutputWriterFactory.RESUMABLE_FORMATS:
+            raise ValueError(f"Output format {output_format} can not be resumed from a checkpoint.")
+        if output_format == 'csv':
+            from classes.lib.bufferedcsvfilewriter import BufferedCsvFileWriter
+            writer = BufferedCsvFileWriter(f"{filename}.csv", enabled=enabled, buffer_bytes=buffer_bytes)
+            if resume_offset is None:
+                writer.write([name for name, _ in columns])
+            else:
+                writer.resume(resume_offset)
+            return writer
+        elif output_format == 'npz':
+            from classes.lib.npzfilewriter import NpzFileWriter
+            return NpzFileWriter(f"{filename}.npz", columns, row_group_size=row_group_size, enabled=enabled, compression=compression)
+        elif output_format == 'parquet':
+            from classes.lib.parquetfilewriter import ParquetFileWriter
+            return ParquetFileWriter(f"{filename}.parquet", columns, row_group_size=row_group_size, enabled=enabled, compression=compression)
+        else:
+            raise ValueError(f"Output format {output_format} not available.")
+
+    @staticmethod
+    def read(output_format: str, filename: str) -> dict:
+        """
+        Loads a file written by the writer of the given format.
+
+        Args:
+            output_format (str): The name of the output format.
+            filename (str): The name of the file, with extension.
+
+        Returns:
+            dict: The array of each column.
+
+        Raises:
+            ValueError: If the output format is not available.
+        """
+        if output_format == 'csv':
+            import pandas as pd
+            data = pd.read_csv(filename)
+            return {name: data[name].to_numpy() for name in data.columns}
+        elif output_format == 'npz':
+            from classes.lib.npzfilewriter import NpzFileWriter
+            return NpzFileWriter.read(filename)
+        elif output_format == 'parquet':
+            from classes.lib.parquetfilewriter import ParquetFileWriter
+            return ParquetFileWriter.read(filename)
+        else:
+            raise ValueError(f"Output format {output_format} not available.")
@@ -0,0 +1,106 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from abc import ABC, abstractmethod
+
+
+class OutputWriterInterface(ABC):
+    """
+    An abstract base class for the simulation output writers.
+
+    The writers receive the output rows, either one by one or as whole columns, and store them in a file with their own format.
+
+    Attributes:
+        filename (str): The name of the file to write to.
+        enabled (bool): Specifies whether the writer is enabled or not, a disabled writer ignores all the rows.
+        flushes (int): The number of times the buffered rows were written to the file.
+    """
+
+    @property
+    @abstractmethod
+    def filename(self) -> str:
+        pass
+
+    @property
+    def flushes(self) -> int:
+        return 0
+
+    @abstractmethod
+    def write(self, line: list):
+        """
+        Writes a single row.
+
+        Args:
+            line (list): The values of the row, in the same order as the columns of the file.
+        """
+        pass
+
+    def write_columns(self, columns: list):
+        """
+        Writes a block of rows given as columns.
+
+        This default implementation writes the rows one by one, writers able to store whole columns should override it.
+
+        Args:
+            columns (list): One sequence (list or numpy array) per column of the file, all of them with the same length.
+        """
+        if not self.enabled:
+            return
+        columns = [column.tolist() if hasattr(column, 'tolist') else column for column in columns]
+        for line in zip(*columns):
+            self.write(list(line))
+
+    @abstractmethod
+    def flush(self):
+        """
+        Writes the buffered rows to the file.
+        """
+        pass
+
+    def append_file(self, filename: str):
+        """
+        Appends all the rows of a file written by a writer of the same format and columns, e.g. the part of the output
+        written by a worker process.
+
+        This default implementation raises NotImplementedError, writers able to append files should override it.
+
+        Args:
+            filename (str): The name of the file.
+
+        Raises:
+            NotImplementedError: If the writer can not append files.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can not append files.")
+
+    def checkpoint(self) -> int:
+        """
+        Writes the buffered rows to disk and returns the size of the file, the offset from which a simulation resumed
+        from a checkpoint continues writing.
+
+        This default implementation raises NotImplementedError, writers whose files can be resumed should override it.
+
+        Returns:
+            int: The size of the file in bytes.
+
+        Raises:
+            NotImplementedError: If the format of the writer can not be resumed.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support checkpoints.")
+
+    @abstractmethod
+    def close(self):
+        """
+        Flushes the buffered rows and closes the file.
+        """
+        pass
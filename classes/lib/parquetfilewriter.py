@@ -0,0 +1,102 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from classes.lib.columnarfilewriter import ColumnarFileWriter
+
+
+class ParquetFileWriter(ColumnarFileWriter):
+    """
+    Columnar writer storing the rows in an Apache Parquet file, each row group of the writer is a Parquet row group.
+
+    It requires the optional pyarrow package.
+    """
+
+    def __init__(self, filename: str, columns: list, row_group_size: int = 65536, enabled: bool = True, compression: bool = True):
+        """
+        Initializes a new instance of the ParquetFileWriter class.
+
+        Args:
+            filename (str): The name of the file to write to.
+            columns (List[Tuple[str, str]]): The name and type of each column.
+            row_group_size (int, optional): The number of rows of each row group. Defaults to 65536.
+            enabled (bool, optional): Specifies whether the writer is enabled or not. Defaults to True.
+            compression (bool, optional): Specifies whether the column chunks are snappy compressed. Defaults to True.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The parquet output format requires the pyarrow package.")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        super().__init__(filename, columns, row_group_size=row_group_size, enabled=enabled)
+        self._schema = pyarrow.schema([
+            (name, pyarrow.dictionary(pyarrow.int32(), pyarrow.string()) if column_type == self.DICTIONARY else pyarrow.from_numpy_dtype(column_type))
+            for name, column_type in self._columns
+        ])
+        self._compression = 'snappy' if compression else 'none'
+        self._parquet_writer = None
+
+    def _write_row_group(self, row_group: dict):
+        pa = self._pa
+        if self._parquet_writer is None:
+            self._parquet_writer = self._pq.ParquetWriter(self._filename, self._schema, compression=self._compression)
+        arrays = []
+        for name, column_type in self._columns:
+            if column_type == self.DICTIONARY:
+                arrays.append(pa.DictionaryArray.from_arrays(row_group[name], pa.array(self._dictionary_values(name), type=pa.string())))
+            else:
+                arrays.append(pa.array(row_group[name]))
+        self._parquet_writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema), row_group_size=len(arrays[0]))
+
+    def _close_file(self):
+        if self._parquet_writer is None:
+            self._parquet_writer = self._pq.ParquetWriter(self._filename, self._schema, compression=self._compression)
+        self._parquet_writer.close()
+        self._parquet_writer = None
+
+    @staticmethod
+    def read(filename: str) -> dict:
+        """
+        Loads a file written by ParquetFileWriter.
+
+        Args:
+            filename (str): The name of the file.
+
+        Returns:
+            dict: The full array of each column, the dictionary encoded columns are decoded.
+        """
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(filename)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    @staticmethod
+    def iter_row_groups(filename: str):
+        """
+        Loads a file written by ParquetFileWriter one row group at a time.
+
+        Args:
+            filename (str): The name of the file.
+
+        Yields:
+            dict: The array of each column in a row group, the dictionary encoded columns are decoded.
+        """
+        import pyarrow.parquet
+        parquet_file = pyarrow.parquet.ParquetFile(filename)
+        for row_group in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(row_group)
+            yield {name: table.column(name).to_numpy() for name in table.column_names}
@@ -0,0 +1,285 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable
+
+import numpy as np
+
+
+class PathLossLookupTable:
+    """
+    Precomputed mean RSSI and missing package probability of every station, sampled on a regular spatial grid.
+
+    The values at any position are obtained by bilinear interpolation of the four surrounding grid nodes. The table is
+    built from the exact formulas of the RSSI simulator, which are still used for the positions outside the grid and the
+    cells with a node closer to the station than exact_radius_meters, where the logarithm of the distance cannot be
+    interpolated accurately (those nodes are stored as NaN). The interpolation error is measured when the table is built,
+    at the centre and the edge midpoints of every cell, and declared in max_rssi_error and max_miss_probability_error.
+
+    The tables can be saved to a directory of .npy files and loaded back memory-mapped, so the parallel runs of a
+    batch share a single copy in the page cache.
+
+    Attributes:
+        values (np.ndarray): The mean RSSI and the missing probability (0-100) of each station at each grid node, interleaved
+            so each node is read at once, shape (stations, nodes x, nodes y, 2).
+        mean_rssi (np.ndarray): The mean RSSI of each station at each grid node, shape (stations, nodes x, nodes y).
+        miss_probability (np.ndarray): The missing probability of each station at each grid node, same shape.
+        min_x (float): The x-coordinate of the first grid node.
+        min_y (float): The y-coordinate of the first grid node.
+        resolution_meters (float): The distance between two consecutive grid nodes.
+        exact_radius_meters (float): The distance to a station under which the exact formulas are used.
+        max_rssi_error (float): The measured maximum interpolation error of the mean RSSI, in dB.
+        max_miss_probability_error (float): The measured maximum interpolation error of the missing probability.
+        fingerprint (str): Hash of the stations and grid the table was built for.
+    """
+
+    def __init__(self, values: np.ndarray, metadata: dict):
+        """
+        Initializes a table from its arrays, use build or load to create it.
+
+        Args:
+            values (np.ndarray): The mean RSSI and the missing probability of each station at each grid node.
+            metadata (dict): The grid definition, declared errors and fingerprint of the table.
+        """
+        self.values = values
+        self.min_x = metadata['min_x']
+        self.min_y = metadata['min_y']
+        self.resolution_meters = metadata['resolution_meters']
+        self.exact_radius_meters = metadata['exact_radius_meters']
+        self.max_rssi_error = metadata['max_rssi_error']
+        self.max_miss_probability_error = metadata['max_miss_probability_error']
+        self.fingerprint = metadata['fingerprint']
+
+    @property
+    def metadata(self) -> dict:
+        return {
+            'min_x': self.min_x,
+            'min_y': self.min_y,
+            'resolution_meters': self.resolution_meters,
+            'exact_radius_meters': self.exact_radius_meters,
+            'max_rssi_error': self.max_rssi_error,
+            'max_miss_probability_error': self.max_miss_probability_error,
+            'fingerprint': self.fingerprint
+        }
+
+    @property
+    def mean_rssi(self) -> np.ndarray:
+        return self.values[..., 0]
+
+    @property
+    def miss_probability(self) -> np.ndarray:
+        return self.values[..., 1]
+
+    @property
+    def max_x(self) -> float:
+        return self.min_x + (self.values.shape[1] - 1) * self.resolution_meters
+
+    @property
+    def max_y(self) -> float:
+        return self.min_y + (self.values.shape[2] - 1) * self.resolution_meters
+
+    @staticmethod
+    def compute_fingerprint(station_parameters: list, min_x: float, max_x: float, min_y: float, max_y: float, resolution_meters: float, exact_radius_meters: float) -> str:
+        """
+        Calculates the hash identifying a table, built from the parameters of the stations and the grid definition.
+
+        Args:
+            station_parameters (list): The arrays with the parameters of the stations used by the exact formulas.
+            min_x (float): The minimum x-coordinate covered by the grid.
+            max_x (float): The maximum x-coordinate covered by the grid.
+            min_y (float): The minimum y-coordinate covered by the grid.
+            max_y (float): The maximum y-coordinate covered by the grid.
+            resolution_meters (float): The distance between two consecutive grid nodes.
+            exact_radius_meters (float): The distance to a station under which the exact formulas are used.
+
+        Returns:
+            str: The hexadecimal hash.
+        """
+        digest = hashlib.sha1()
+        for parameter in station_parameters:
+            digest.update(np.ascontiguousarray(parameter, dtype=float).tobytes())
+        digest.update(np.array([min_x, max_x, min_y, max_y, resolution_meters, exact_radius_meters], dtype=float).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, exact: Callable, station_x: np.ndarray, station_y: np.ndarray, min_x: float, max_x: float, min_y: float, max_y: float,
+              resolution_meters: float, exact_radius_meters: float = None, fingerprint: str = '') -> 'PathLossLookupTable':
+        """
+        Builds the table evaluating the exact formulas at every grid node.
+
+        Args:
+            exact (Callable): Function (station_indices, xs, ys) -> (mean_rssi, miss_probability) with the exact values.
+            station_x (np.ndarray): The x-coordinate of each station.
+            station_y (np.ndarray): The y-coordinate of each station.
+            min_x (float): The minimum x-coordinate covered by the grid.
+            max_x (float): The maximum x-coordinate covered by the grid.
+            min_y (float): The minimum y-coordinate covered by the grid.
+            max_y (float): The maximum y-coordinate covered by the grid.
+            resolution_meters (float): The distance between two consecutive grid nodes.
+            exact_radius_meters (float, optional): The distance to a station under which the exact formulas are used.
+                Defaults to None, four grid cells. The interpolation error depends on the ratio between the radius and the resolution.
+            fingerprint (str, optional): The hash identifying the table, see compute_fingerprint.
+
+        Returns:
+            PathLossLookupTable: The new table.
+
+        Raises:
+            ValueError: If the resolution is not greater than 0.
+        """
+        if resolution_meters <= 0:
+            raise ValueError("Lookup table resolution must be greater than 0.")
+        if exact_radius_meters is None:
+            exact_radius_meters = 4 * resolution_meters
+        station_x = np.asarray(station_x, dtype=float)
+        station_y = np.asarray(station_y, dtype=float)
+        nodes_x = int(np.ceil((max_x - min_x) / resolution_meters - 1e-9)) + 1
+        nodes_y = int(np.ceil((max_y - min_y) / resolution_meters - 1e-9)) + 1
+        grid_x = min_x + np.arange(nodes_x) * resolution_meters
+        grid_y = min_y + np.arange(nodes_y) * resolution_meters
+
+        values = np.empty((len(station_x), nodes_x, nodes_y, 2), dtype=np.float32)
+        max_rssi_error = 0.0
+        max_miss_probability_error = 0.0
+        for station in range(len(station_x)):
+            xs, ys = np.meshgrid(grid_x, grid_y, indexing='ij')
+            indices = np.full(xs.size, station)
+            mean_rssi, miss_probability = exact(indices, xs.ravel(), ys.ravel())
+            values[station, ..., 0] = mean_rssi.reshape(xs.shape)
+            values[station, ..., 1] = miss_probability.reshape(xs.shape)
+            # The nodes close to the station are not interpolated
+            values[station][np.hypot(xs - station_x[station], ys - station_y[station]) < exact_radius_meters] = np.nan
+
+            # Measure the interpolation error at the centre and the edge midpoints of every cell
+            for offset_x, offset_y in ((0.5, 0.5), (0.5, 0), (0, 0.5)):
+                xs, ys = np.meshgrid(grid_x[:-1] + offset_x * resolution_meters if offset_x else grid_x,
+                                     grid_y[:-1] + offset_y * resolution_meters if offset_y else grid_y, indexing='ij')
+                xs, ys = xs.ravel(), ys.ravel()
+                indices = np.full(xs.size, station)
+                interpolated = cls._interpolate(values, min_x, min_y, resolution_meters, indices, xs, ys)
+                valid = ~np.isnan(interpolated[:, 0])
+                if not valid.any():
+                    continue
+                expected = exact(indices[valid], xs[valid], ys[valid])
+                max_rssi_error = max(max_rssi_error, float(np.max(np.abs(interpolated[valid, 0] - expected[0]))))
+                max_miss_probability_error = max(max_miss_probability_error, float(np.max(np.abs(interpolated[valid, 1] - expected[1]))))
+
+        metadata = {
+            'min_x': float(min_x),
+            'min_y': float(min_y),
+            'resolution_meters': float(resolution_meters),
+            'exact_radius_meters': float(exact_radius_meters),
+            'max_rssi_error': max_rssi_error,
+            'max_miss_probability_error': max_miss_probability_error,
+            'fingerprint': fingerprint
+        }
+        return cls(values, metadata)
+
+    def lookup(self, station_indices: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> tuple:
+        """
+        Interpolates the mean RSSI and the missing probability of a batch of packages.
+
+        Args:
+            station_indices (np.ndarray): The row in the stations table of the transmitter of each package.
+            xs (np.ndarray): The x-coordinate of the receiver of each package.
+            ys (np.ndarray): The y-coordinate of the receiver of each package.
+
+        Returns:
+            tuple: Three numpy arrays, the interpolated mean RSSI and missing probability of each package, and the mask of
+                   the packages the table cannot interpolate accurately, whose values must be calculated exactly.
+        """
+        station_indices = np.asarray(station_indices, dtype=np.int64)
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        interpolated = self._interpolate(self.values, self.min_x, self.min_y, self.resolution_meters, station_indices, xs, ys)
+        exact = np.isnan(interpolated[:, 0]) | (xs < self.min_x) | (xs > self.max_x) | (ys < self.min_y) | (ys > self.max_y)
+        return (interpolated[:, 0].astype(float), interpolated[:, 1].astype(float), exact)
+
+    @staticmethod
+    def _interpolate(values: np.ndarray, min_x: float, min_y: float, resolution_meters: float, station_indices: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Bilinear interpolation of the table values, returns an array of shape (packages, 2). The positions out of the grid
+        are extrapolated from the closest cell.
+        """
+        nodes_x, nodes_y = values.shape[1:3]
+        position_x = (xs - min_x) / resolution_meters
+        position_y = (ys - min_y) / resolution_meters
+        # The truncation is the floor inside the grid, the positions out of it are clipped to the closest cell
+        cell_x = position_x.astype(np.int64)
+        np.clip(cell_x, 0, nodes_x - 2, out=cell_x)
+        cell_y = position_y.astype(np.int64)
+        np.clip(cell_y, 0, nodes_y - 2, out=cell_y)
+        weight_x = (position_x - cell_x).astype(values.dtype)[:, None]
+        weight_y = (position_y - cell_y).astype(values.dtype)[:, None]
+        # Flat index of the lower corner of each cell, each node is read with a single gather of both values
+        corner = station_indices * (nodes_x * nodes_y)
+        corner += cell_x * nodes_y
+        corner += cell_y
+        flat = values.reshape(-1, 2)
+        bottom = np.take(flat, corner, axis=0)
+        bottom_next = np.take(flat, corner + 1, axis=0)
+        bottom_next -= bottom
+        bottom_next *= weight_y
+        bottom += bottom_next
+        top = np.take(flat, corner + nodes_y, axis=0)
+        top_next = np.take(flat, corner + nodes_y + 1, axis=0)
+        top_next -= top
+        top_next *= weight_y
+        top += top_next
+        top -= bottom
+        top *= weight_x
+        bottom += top
+        return bottom
+
+    def save(self, path: str):
+        """
+        Saves the table to a directory, the directory is replaced atomically so concurrent runs never see a partial table.
+
+        Args:
+            path (str): The directory of the table.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        temporary = tempfile.mkdtemp(prefix='.pathloss-', dir=parent)
+        try:
+            np.save(os.path.join(temporary, 'values.npy'), self.values)
+            with open(os.path.join(temporary, 'metadata.json'), 'w') as file:
+                json.dump(self.metadata, file, indent=4)
+            os.rename(temporary, path)
+        except OSError:
+            # Another run has already saved the same table
+            shutil.rmtree(temporary, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'PathLossLookupTable':
+        """
+        Loads a table saved with save.
+
+        Args:
+            path (str): The directory of the table.
+            mmap (bool, optional): Memory-map the tables instead of reading them. Defaults to True.
+
+        Returns:
+            PathLossLookupTable: The loaded table.
+        """
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(path, 'metadata.json'), 'r') as file:
+            metadata = json.load(file)
+        return cls(np.load(os.path.join(path, 'values.npy'), mmap_mode=mmap_mode), metadata)
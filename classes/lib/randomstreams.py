@@ -0,0 +1,105 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+class RandomStreams:
+    """
+    Hierarchy of independent random generators derived from a single seed.
+
+    The root seed is spawned with numpy SeedSequence into one child per simulation component, so every component draws
+    from its own stream. The results are reproducible for a given seed and the streams never share state, neither between
+    components nor between runs seeded with different values.
+
+    Attributes:
+        seed (int): The root seed of the whole tree of hierarchies, the entropy of its SeedSequence. The children returned
+            by spawn report the same root seed, they are told apart by their spawn_key.
+        spawn_key (tuple): The path of the hierarchy from the root one, empty for the root. The seed and the spawn key
+            identify the streams of any hierarchy.
+        scenario (np.random.Generator): Stream for the random scenario parameters, such as the default initial angle.
+        trajectory (np.random.Generator): Stream of the trajectory simulator.
+        rssi_noise (np.random.Generator): Stream of the RSSI noise.
+        packet_loss (np.random.Generator): Stream of the missing packages model.
+        schedule_seed (int): Seed of the clock jitter of the stations, derived from the root seed without spawning, so
+            the streams of the children do not change.
+
+    Methods:
+        spawn(count): Returns independent child hierarchies, e.g. one per parallel worker.
+    """
+
+    STREAMS = ('scenario', 'trajectory', 'rssi_noise', 'packet_loss')
+
+    def __init__(self, seed=None, spawn_key: tuple = ()):
+        """
+        Initializes the generators of all the streams.
+
+        Args:
+            seed (int | np.random.SeedSequence, optional): The root seed. Defaults to None, a random seed taken from the OS.
+            spawn_key (tuple, optional): The path of the hierarchy from the root one, as reported by the spawn_key of a
+                spawned hierarchy, so a child can be rebuilt from the root seed. Defaults to (), the root hierarchy.
+
+        Raises:
+            ValueError: If a spawn key is given with a SeedSequence, which has its own one.
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            if spawn_key:
+                raise ValueError("The spawn key of a SeedSequence can not be replaced.")
+            self._seed_sequence = seed
+        else:
+            self._seed_sequence = np.random.SeedSequence(seed, spawn_key=tuple(spawn_key))
+        self._generators = {
+            name: np.random.default_rng(child)
+            for name, child in zip(self.STREAMS, self._seed_sequence.spawn(len(self.STREAMS)))
+        }
+
+    @property
+    def seed(self):
+        return self._seed_sequence.entropy
+
+    @property
+    def spawn_key(self) -> tuple:
+        return tuple(self._seed_sequence.spawn_key)
+
+    @property
+    def scenario(self) -> np.random.Generator:
+        return self._generators['scenario']
+
+    @property
+    def trajectory(self) -> np.random.Generator:
+        return self._generators['trajectory']
+
+    @property
+    def rssi_noise(self) -> np.random.Generator:
+        return self._generators['rssi_noise']
+
+    @property
+    def packet_loss(self) -> np.random.Generator:
+        return self._generators['packet_loss']
+
+    @property
+    def schedule_seed(self) -> int:
+        return int(self._seed_sequence.generate_state(1, np.uint64)[0])
+
+    def spawn(self, count: int) -> list:
+        """
+        Returns independent child hierarchies of this one.
+
+        Args:
+            count (int): The number of children.
+
+        Returns:
+            List[RandomStreams]: The child hierarchies.
+        """
+        return [RandomStreams(child) for child in self._seed_sequence.spawn(count)]
@@ -0,0 +1,103 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import numpy as np
+
+
+class SimulationCheckpoint:
+    """
+    Storage of the state of a simulation, so a killed run can continue from its last checkpoint.
+
+    The state is a tree of dictionaries and lists. Its numpy arrays, such as the transmissions schedule of the
+    stations, are stored as uncompressed arrays of an NPZ archive, and the rest of the tree (counters, positions,
+    states of the random generators...) as a JSON document in the same archive, so writing a checkpoint costs little
+    more than copying the arrays. The file is written to a temporary file which replaces the previous checkpoint once
+    it is on disk, so a run killed while writing keeps the previous checkpoint.
+
+    Methods:
+        write(filename, state): Writes the state to a checkpoint file.
+        read(filename): Loads the state of a checkpoint file.
+    """
+
+    VERSION = 1
+    # Key of the JSON objects replacing the arrays of the state
+    _ARRAY = '__array__'
+
+    @classmethod
+    def write(cls, filename: str, state: dict):
+        """
+        Writes the state to a checkpoint file, replacing the previous one.
+
+        Args:
+            filename (str): The name of the checkpoint file.
+            state (dict): The state of the simulation.
+        """
+        arrays = {}
+
+        def encode(value):
+            if isinstance(value, np.ndarray):
+                name = f"array_{len(arrays)}"
+                arrays[name] = value
+                return {cls._ARRAY: name}
+            if isinstance(value, dict):
+                return {key: encode(item) for key, item in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [encode(item) for item in value]
+            if isinstance(value, np.generic):
+                return value.item()
+            return value
+
+        document = json.dumps({'version': cls.VERSION, 'state': encode(state)})
+        temporary_filename = f"{filename}.tmp"
+        with open(temporary_filename, 'wb') as file:
+            np.savez(file, state=np.array(document), **arrays)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_filename, filename)
+
+    @classmethod
+    def read(cls, filename: str) -> dict:
+        """
+        Loads the state of a checkpoint file.
+
+        Args:
+            filename (str): The name of the checkpoint file.
+
+        Returns:
+            dict: The state of the simulation.
+
+        Raises:
+            FileNotFoundError: If the checkpoint file does not exist.
+            ValueError: If the file was written by another version of the checkpoints.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"Checkpoint file {filename} not found")
+        with np.load(filename, allow_pickle=False) as archive:
+            document = json.loads(archive['state'].item())
+            if document.get('version') != cls.VERSION:
+                raise ValueError(f"Checkpoint file {filename} has version {document.get('version')}, expected {cls.VERSION}.")
+
+            def decode(value):
+                if isinstance(value, dict):
+                    if set(value) == {cls._ARRAY}:
+                        return archive[value[cls._ARRAY]]
+                    return {key: decode(item) for key, item in value.items()}
+                if isinstance(value, list):
+                    return [decode(item) for item in value]
+                return value
+
+            return decode(document['state'])
@@ -0,0 +1,117 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import time
+
+
+class SimulationMetrics:
+    """
+    Phase timers and counters of a simulation run.
+
+    The time is split in consecutive laps: each call to lap adds the time elapsed since the previous one to the given
+    phase, so the simulation only marks the end of each of its sections. The loop of the simulation works on blocks of
+    thousands of iterations, so the instrumentation runs once per block. A disabled instance ignores every call, and
+    the simulation skips the counters that need extra work.
+
+    Attributes:
+        enabled (bool): Indicates if the metrics are collected.
+        phases (dict): The accumulated seconds of each phase.
+        counters (dict): The value of each counter.
+    """
+
+    PHASES = ('setup', 'scheduling', 'trajectory', 'rssi', 'output', 'checkpoint', 'plot')
+    COUNTERS = ('iterations', 'blocks', 'packets_emitted', 'packets_received', 'packets_dropped', 'packets_below_threshold',
+                'trajectory_rows', 'rssi_rows', 'flushes', 'bytes_written', 'checkpoints')
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initializes a new instance of the SimulationMetrics class.
+
+        Args:
+            enabled (bool, optional): Indicates if the metrics are collected. Defaults to True.
+        """
+        self.enabled = enabled
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._start = None
+        self._last_lap = None
+        self._end = None
+
+    def start(self):
+        """
+        Starts the timers.
+        """
+        if self.enabled:
+            self._start = self._last_lap = time.perf_counter()
+
+    def lap(self, phase: str):
+        """
+        Adds the time elapsed since the previous lap, or since the start, to a phase.
+
+        Args:
+            phase (str): The name of the phase.
+        """
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last_lap
+            self._last_lap = now
+
+    def count(self, counter: str, value: int = 1):
+        """
+        Increments a counter.
+
+        Args:
+            counter (str): The name of the counter.
+            value (int, optional): The increment. Defaults to 1.
+        """
+        if self.enabled:
+            self.counters[counter] = self.counters.get(counter, 0) + int(value)
+
+    def stop(self):
+        """
+        Stops the timers.
+        """
+        if self.enabled:
+            self._end = time.perf_counter()
+
+    def summary(self, **extra) -> dict:
+        """
+        Returns the collected metrics.
+
+        Args:
+            **extra: Additional values of the summary, such as the parameters of the run.
+
+        Returns:
+            dict: The total wall seconds, the seconds of each phase, the not instrumented time and the counters.
+        """
+        total = (self._end if self._end is not None else time.perf_counter()) - self._start if self._start is not None else 0.0
+        return {
+            **extra,
+            "wall_seconds": total,
+            "phases_seconds": dict(self.phases),
+            "other_seconds": max(0.0, total - sum(self.phases.values())),
+            "counters": dict(self.counters),
+        }
+
+    def write(self, filename: str, **extra):
+        """
+        Writes the summary as a JSON file.
+
+        Args:
+            filename (str): The name of the file.
+            **extra: Additional values of the summary.
+        """
+        with open(filename, 'w') as file:
+            json.dump(self.summary(**extra), file, indent=4)
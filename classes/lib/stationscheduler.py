@@ -0,0 +1,139 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from classes.lib.transmissionschedule import next_transmission_timestamp, transmission_events
+from classes.models.station import Station
+from classes.models.stationtable import StationTable
+
+
+class StationScheduler:
+    """
+    Scheduler of the station transmissions.
+
+    The transmissions of each block of iterations are generated at once from the analytic schedule of the stations (see
+    classes/lib/transmissionschedule.py), including the drift and the jitter of their clocks, so the simulation never
+    visits the stations one iteration at a time. Every transmission keeps its exact timestamp, even if it falls between
+    two iterations, so the transmission times do not depend on the time step.
+
+    Attributes:
+        stations (List[Station]): The stations handled by the scheduler.
+        station_table (StationTable): The table of the stations handled by the scheduler.
+        next_transmission_timestamp (int | None): The timestamp of the earliest pending transmission.
+        seed (int): The seed of the clock jitter of the stations.
+
+    Methods:
+        pop_events(start_time, end_time): Returns all the transmissions of a block of iterations.
+        pop_event_arrays(start_time, end_time): Same as pop_events, with numpy arrays instead of lists.
+        get_state(): Returns the end of the scheduled transmissions, so a simulation can continue from a checkpoint.
+        set_state(state): Restores the state returned by get_state.
+    """
+
+    def __init__(self, stations: List[Station], milliseconds_per_iteration: int = 1, seed: int = 0):
+        """
+        Initializes the scheduler with the given stations.
+
+        Args:
+            stations (List[Station] | StationTable): The stations to schedule.
+            milliseconds_per_iteration (int, optional): The simulation time step, the period of the stations with a frequency of 0 (they transmit once per iteration). Defaults to 1.
+            seed (int, optional): The seed of the clock jitter of the stations. Defaults to 0.
+        """
+        self._table = StationTable.from_stations(stations)
+        self._milliseconds_per_iteration = milliseconds_per_iteration
+        self.seed = seed
+        # End of the last window of transmissions, None before the first one
+        self._scheduled_until = None
+
+    @property
+    def stations(self) -> List[Station]:
+        return self._table.stations
+
+    @property
+    def station_table(self) -> StationTable:
+        return self._table
+
+    @property
+    def next_transmission_timestamp(self):
+        """
+        int | None: The timestamp of the earliest pending transmission, or None if there are no stations.
+        """
+        start_time = self._scheduled_until if self._scheduled_until is not None else 0
+        return next_transmission_timestamp(self._table, start_time, self._milliseconds_per_iteration, self.seed)
+
+    def pop_events(self, start_time: int, end_time: int) -> tuple:
+        """
+        Returns all the transmissions that happen between start_time (included) and end_time (excluded).
+
+        The transmissions still pending from a previous window, if the windows are not consecutive, happen at start_time.
+
+        Args:
+            start_time (int): The time in milliseconds of the first iteration of the block.
+            end_time (int): The time in milliseconds where the block ends.
+
+        Returns:
+            tuple: Two lists with the timestamp and the station index of each transmission, sorted by timestamp and station definition order.
+        """
+        timestamps, indexes = self.pop_event_arrays(start_time, end_time)
+        return (timestamps.tolist(), indexes.tolist())
+
+    def pop_event_arrays(self, start_time: int, end_time: int) -> tuple:
+        """
+        Returns all the transmissions that happen between start_time (included) and end_time (excluded), see pop_events.
+
+        Args:
+            start_time (int): The time in milliseconds of the first iteration of the block.
+            end_time (int): The time in milliseconds where the block ends.
+
+        Returns:
+            tuple: Two int64 arrays with the timestamp and the station index of each transmission, sorted by timestamp and station definition order.
+        """
+        window_start = start_time if self._scheduled_until is None else self._scheduled_until
+        if end_time <= window_start:
+            return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        timestamps, indexes = transmission_events(self._table, window_start, end_time, self._milliseconds_per_iteration, self.seed)
+        self._scheduled_until = end_time
+        if window_start < start_time and len(timestamps):
+            timestamps = np.maximum(timestamps, start_time)
+            order = np.lexsort((indexes, timestamps))
+            timestamps, indexes = timestamps[order], indexes[order]
+
+        # Register the last transmission of each station, the events are sorted so the last one of each station is kept
+        if len(indexes):
+            last_indexes, last_positions = np.unique(indexes[::-1], return_index=True)
+            self._table.set_last_transmission_timestamp(last_indexes, timestamps[::-1][last_positions])
+        return (timestamps, indexes)
+
+    def get_state(self) -> dict:
+        """
+        Returns the end of the scheduled transmissions, so a simulation can continue from a checkpoint. The state of the
+        stations themselves is kept by the station table.
+
+        Returns:
+            dict: The end of the last window of transmissions and the seed of the clock jitter.
+        """
+        return {'scheduled_until': self._scheduled_until,
+                'seed': self.seed}
+
+    def set_state(self, state: dict):
+        """
+        Restores the state returned by get_state.
+
+        Args:
+            state (dict): The state of the scheduler.
+        """
+        self._scheduled_until = state.get('scheduled_until')
+        self.seed = state.get('seed', self.seed)
@@ -0,0 +1,183 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+class TrajectoryPlotter:
+    """
+    Plot of the trajectory built from a decimated sample collected while the simulation runs.
+
+    The points are received in consecutive blocks with add. The plotter keeps one point every `stride` received points,
+    and when more than max_points are kept it drops every other point and doubles the stride, so the memory and the
+    plotting time do not depend on the duration of the simulation. The kept points are evenly spaced along the
+    received ones, and the last received point is always plotted.
+
+    The trajectory is drawn as a single line collection coloured by time, rasterized in the vector formats, instead of
+    one marker per point.
+
+    Attributes:
+        max_points (int): The maximum number of kept points.
+        stride (int): The number of received points per kept point.
+        formats (list): The file formats of the plot, e.g. ["png", "eps"].
+    """
+
+    def __init__(self, max_points: int = 10000, formats: list = ('png', 'eps')):
+        """
+        Initializes a new instance of the TrajectoryPlotter class.
+
+        Args:
+            max_points (int, optional): The maximum number of kept points. Defaults to 10000.
+            formats (list, optional): The file formats of the plot. Defaults to PNG and EPS.
+
+        Raises:
+            ValueError: If the maximum number of points is lower than 2.
+        """
+        if max_points < 2:
+            raise ValueError("Plot max points must be at least 2.")
+        self.max_points = max_points
+        self.formats = list(formats)
+        self.stride = 1
+        self._received = 0
+        self._timestamps = np.zeros(0)
+        self._xs = np.zeros(0)
+        self._ys = np.zeros(0)
+        self._last_point = None
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def add(self, timestamps: np.ndarray, xs: np.ndarray, ys: np.ndarray):
+        """
+        Receives a block of consecutive points of the trajectory.
+
+        Args:
+            timestamps (np.ndarray): The timestamp of each point in seconds.
+            xs (np.ndarray): The x-coordinate of each point.
+            ys (np.ndarray): The y-coordinate of each point.
+        """
+        size = len(timestamps)
+        if size == 0:
+            return
+        self._last_point = (timestamps[-1], xs[-1], ys[-1])
+        # Points of the block whose global index is a multiple of the stride
+        first = -self._received % self.stride
+        self._received += size
+        self._timestamps = np.concatenate((self._timestamps, np.asarray(timestamps, dtype=float)[first::self.stride]))
+        self._xs = np.concatenate((self._xs, np.asarray(xs, dtype=float)[first::self.stride]))
+        self._ys = np.concatenate((self._ys, np.asarray(ys, dtype=float)[first::self.stride]))
+        while len(self._timestamps) > self.max_points:
+            # The kept points are the multiples of the stride from the first one, so every other point is dropped
+            self._timestamps = self._timestamps[::2]
+            self._xs = self._xs[::2]
+            self._ys = self._ys[::2]
+            self.stride *= 2
+
+    def points(self) -> tuple:
+        """
+        Returns the kept points, closed with the last received point.
+
+        Returns:
+            tuple: Three numpy arrays with the timestamps, x-coordinates and y-coordinates.
+        """
+        timestamps, xs, ys = self._timestamps, self._xs, self._ys
+        if self._last_point is not None and (len(timestamps) == 0 or timestamps[-1] != self._last_point[0]):
+            timestamps = np.append(timestamps, self._last_point[0])
+            xs = np.append(xs, self._last_point[1])
+            ys = np.append(ys, self._last_point[2])
+        return (timestamps, xs, ys)
+
+    def get_state(self) -> dict:
+        """
+        Returns the kept points and the decimation state, so a simulation can continue from a checkpoint.
+
+        Returns:
+            dict: The state of the plotter.
+        """
+        return {
+            'stride': self.stride,
+            'received': self._received,
+            'timestamps': self._timestamps.copy(),
+            'xs': self._xs.copy(),
+            'ys': self._ys.copy(),
+            'last_point': None if self._last_point is None else [float(value) for value in self._last_point],
+        }
+
+    def set_state(self, state: dict):
+        """
+        Restores the state returned by get_state.
+
+        Args:
+            state (dict): The state of the plotter.
+        """
+        self.stride = state['stride']
+        self._received = state['received']
+        self._timestamps = np.asarray(state['timestamps'], dtype=float)
+        self._xs = np.asarray(state['xs'], dtype=float)
+        self._ys = np.asarray(state['ys'], dtype=float)
+        self._last_point = None if state['last_point'] is None else tuple(state['last_point'])
+
+    def plot(self, output_path: str, stations: list, dim_x: float, dim_y: float, min_x: float, max_x: float, min_y: float, max_y: float) -> list:
+        """
+        Plots the trajectory in the given scenario and saves it in every configured format.
+
+        Args:
+            output_path (str): The path of the output files, without extension.
+            stations (List[Station]): The stations to draw.
+            dim_x (float): The dimension of the scenario in the X-axis.
+            dim_y (float): The dimension of the scenario in the Y-axis.
+            min_x (float): The minimum value of the X-axis range.
+            max_x (float): The maximum value of the X-axis range.
+            min_y (float): The minimum value of the Y-axis range.
+            max_y (float): The maximum value of the Y-axis range.
+
+        Returns:
+            list: The names of the written files.
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
+
+        timestamps, xs, ys = self.points()
+
+        figure, axes = plt.subplots(figsize=(10, 10))
+        # Draw the room and margins
+        axes.plot([0, dim_y, dim_y, 0, 0], [0, 0, dim_x, dim_x, 0], 'k-', label='Room')
+        axes.plot([min_y, max_y, max_y, min_y, min_y], [min_x, min_x, max_x, max_x, min_x], 'g-', label='Margins')
+
+        # Draw the trajectory as segments coloured by the time of their start, the axes are swapped as in the room plan
+        segments = np.stack((np.column_stack((ys[:-1], xs[:-1])), np.column_stack((ys[1:], xs[1:]))), axis=1)
+        lines = LineCollection(segments, cmap='viridis', linewidths=1.5, rasterized=True)
+        lines.set_array(timestamps[:-1])
+        axes.add_collection(lines)
+        axes.autoscale_view()
+        figure.colorbar(lines, ax=axes, label='Time (sec.)')
+        axes.set_xlabel('Y (m)')
+        axes.set_ylabel('X (m)')
+        axes.set_title('Mobile device Trajectory')
+        axes.grid(True)
+
+        # Draw the stations
+        if len(stations):
+            axes.plot([station.y for station in stations], [station.x for station in stations], 'ro', label='Stations')
+
+        # Invert Y axis
+        axes.invert_yaxis()
+
+        filenames = []
+        for plot_format in self.formats:
+            filename = f"{output_path}.{plot_format}"
+            figure.savefig(filename, format=plot_format)
+            filenames.append(filename)
+        plt.close(figure)
+        return filenames
@@ -0,0 +1,179 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+
+import numpy as np
+
+
+class TrajectorySampler:
+    """
+    Selects the trajectory points written to the trajectory output.
+
+    The points are received in consecutive blocks and the sampler keeps its state between them, so the selection does
+    not depend on the size of the blocks. The first point is always selected, and finish() returns the last point if it
+    was not selected, so the sampled trajectory always covers the whole simulation.
+
+    Available modes:
+        - interval: One point every interval_ms milliseconds of simulation.
+        - distance: One point every distance_meters meters travelled along the trajectory.
+        - heading: The points where the heading of the movement changes, i.e. the vertices of the trajectory.
+
+    Attributes:
+        mode (str): The sampling mode.
+        interval_ms (int): The interval between points of the interval mode.
+        distance_meters (float): The travelled distance between points of the distance mode.
+    """
+
+    MODES = ('interval', 'distance', 'heading')
+
+    def __init__(self, mode: str, interval_ms: int = None, distance_meters: float = None):
+        """
+        Initializes a new instance of the TrajectorySampler class.
+
+        Args:
+            mode (str): The sampling mode.
+            interval_ms (int, optional): The interval between points, required by the interval mode.
+            distance_meters (float, optional): The travelled distance between points, required by the distance mode.
+
+        Raises:
+            ValueError: If the mode is not available or its parameter is missing or not greater than 0.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Trajectory sampling mode must be one of {', '.join(self.MODES)}.")
+        if mode == 'interval' and (interval_ms is None or interval_ms <= 0):
+            raise ValueError("Trajectory sampling interval_ms must be greater than 0.")
+        if mode == 'distance' and (distance_meters is None or distance_meters <= 0):
+            raise ValueError("Trajectory sampling distance_meters must be greater than 0.")
+        self.mode = mode
+        self.interval_ms = interval_ms
+        self.distance_meters = distance_meters
+        # State of the last received point
+        self._last_point = None
+        self._last_selected = False
+        self._last_heading = None
+        self._travelled_distance = 0.0
+
+    @property
+    def needs_every_position(self) -> bool:
+        """
+        Indicates if the selection needs every position of the trajectory, instead of only the candidate times.
+        """
+        return self.mode == 'distance'
+
+    def candidate_times(self, start_time: int, iterations: int, milliseconds_per_iteration: int, heading_change_times: np.ndarray) -> np.ndarray:
+        """
+        Returns the only times of a block of iterations that may be selected by sample, so the positions of a trajectory
+        generated as segments can be evaluated just at those times. Not available if needs_every_position.
+
+        Args:
+            start_time (int): The time in milliseconds of the first iteration of the block.
+            iterations (int): The number of iterations of the block.
+            milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+            heading_change_times (np.ndarray): The times where the heading of the trajectory may change, i.e. the start of its segments.
+
+        Returns:
+            np.ndarray: The sorted candidate times, including the first and last iterations of the block.
+
+        Raises:
+            ValueError: If the selection needs every position.
+        """
+        end_time = start_time + iterations * milliseconds_per_iteration
+        if self.mode == 'interval':
+            # Iterations whose time is a multiple of the interval
+            period = math.lcm(int(self.interval_ms), milliseconds_per_iteration)
+            times = np.arange(-(-start_time // period) * period, end_time, period)
+        elif self.mode == 'heading':
+            heading_change_times = np.asarray(heading_change_times)
+            times = heading_change_times[(heading_change_times >= start_time) & (heading_change_times < end_time)]
+        else:
+            raise ValueError(f"The {self.mode} sampling mode needs every position of the trajectory.")
+        return np.union1d(times, [start_time, end_time - milliseconds_per_iteration]).astype(np.int64)
+
+    def sample(self, steps: np.ndarray, timestamps: np.ndarray, xs: np.ndarray, ys: np.ndarray, headings: np.ndarray) -> np.ndarray:
+        """
+        Selects the points of a block of the trajectory.
+
+        Args:
+            steps (np.ndarray): The step number of each point.
+            timestamps (np.ndarray): The timestamp of each point in milliseconds.
+            xs (np.ndarray): The x-coordinate of each point.
+            ys (np.ndarray): The y-coordinate of each point.
+            headings (np.ndarray): The heading of the movement leaving each point, in radians.
+
+        Returns:
+            np.ndarray: A boolean mask with the selected points.
+        """
+        if len(steps) == 0:
+            return np.zeros(0, dtype=bool)
+
+        if self.mode == 'interval':
+            selected = timestamps % self.interval_ms == 0
+        elif self.mode == 'distance':
+            # Travelled distance at each point, a point is selected when it crosses a multiple of the distance
+            previous_xs = np.concatenate(([xs[0] if self._last_point is None else self._last_point[2]], xs[:-1]))
+            previous_ys = np.concatenate(([ys[0] if self._last_point is None else self._last_point[3]], ys[:-1]))
+            travelled = self._travelled_distance + np.cumsum(np.hypot(xs - previous_xs, ys - previous_ys))
+            sections = np.floor(travelled / self.distance_meters)
+            selected = sections > np.concatenate(([np.floor(self._travelled_distance / self.distance_meters)], sections[:-1]))
+            self._travelled_distance = travelled[-1]
+        else:
+            # The heading arriving to each point is the one leaving the previous point
+            arriving = np.concatenate(([headings[0] if self._last_heading is None else self._last_heading], headings[:-1]))
+            selected = headings != arriving
+            self._last_heading = headings[-1]
+
+        if self._last_point is None:
+            selected[0] = True
+        self._last_point = (steps[-1], timestamps[-1], xs[-1], ys[-1])
+        self._last_selected = bool(selected[-1])
+        return selected
+
+    def get_state(self) -> dict:
+        """
+        Returns the state kept between blocks, so a simulation can continue from a checkpoint.
+
+        Returns:
+            dict: The last received point, if it was selected, the last heading and the travelled distance.
+        """
+        return {
+            'last_point': None if self._last_point is None else [value.item() if isinstance(value, np.generic) else value for value in self._last_point],
+            'last_selected': self._last_selected,
+            'last_heading': None if self._last_heading is None else float(self._last_heading),
+            'travelled_distance': float(self._travelled_distance),
+        }
+
+    def set_state(self, state: dict):
+        """
+        Restores the state returned by get_state.
+
+        Args:
+            state (dict): The state of the sampler.
+        """
+        self._last_point = None if state['last_point'] is None else tuple(state['last_point'])
+        self._last_selected = state['last_selected']
+        self._last_heading = state['last_heading']
+        self._travelled_distance = state['travelled_distance']
+
+    def finish(self) -> tuple:
+        """
+        Returns the last received point if it was not selected.
+
+        Returns:
+            tuple: The step, timestamp in milliseconds, x and y of the last point, or None if it was already selected.
+        """
+        if self._last_point is None or self._last_selected:
+            return None
+        self._last_selected = True
+        return self._last_point
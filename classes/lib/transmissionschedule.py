@@ -0,0 +1,193 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Analytic schedule of the station transmissions.
+
+A station transmits for the first time one period after its initial timestamp, or at the start of the simulation if
+that time is already past, and then once per period: its frequency, or the time step of the simulation for the
+stations with a frequency of 0. The transmissions of any time window are therefore known without simulating the
+previous ones, which lets independent workers generate the transmissions of their own part of a simulation.
+
+The clock of a station may also drift, stretching its period by clock_drift_ppm parts per million, and jitter,
+moving each transmission up to clock_jitter_ms milliseconds from its schedule. The jitter of a transmission is a hash
+of the seed, the station and the number of the transmission instead of a draw from a random generator, so it does not
+depend on the windows the schedule is generated in, and every transmission belongs to exactly one window.
+"""
+
+import numpy as np
+
+from classes.models.stationtable import StationTable
+
+# Constants of the SplitMix64 generator
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def transmission_events(stations, start_time: int, end_time: int, milliseconds_per_iteration: int = 1, seed: int = 0) -> tuple:
+    """
+    Returns all the transmissions of the stations between start_time (included) and end_time (excluded). Without clock
+    drift and jitter, they are the same ones of a scheduler rescheduling the stations one transmission at a time.
+
+    Args:
+        stations (List[Station] | StationTable): The stations.
+        start_time (int): The start of the window in milliseconds.
+        end_time (int): The end of the window in milliseconds.
+        milliseconds_per_iteration (int, optional): The simulation time step, the period of the stations with a frequency of 0. Defaults to 1.
+        seed (int, optional): The seed of the clock jitter, the windows of a simulation must use the same one. Defaults to 0.
+
+    Returns:
+        tuple: Two int64 arrays with the timestamp and the station index of each transmission, sorted by timestamp and station definition order.
+    """
+    table = StationTable.from_stations(stations)
+    periods, first_timestamps, clocked = _schedule(table, milliseconds_per_iteration)
+
+    timestamps, indexes = _exact_events(np.flatnonzero(~clocked), first_timestamps, periods, start_time, end_time)
+    if clocked.any():
+        clocked_timestamps, clocked_indexes = _clocked_events(np.flatnonzero(clocked), first_timestamps, periods, table.clock_drift_ppm,
+                                                              table.clock_jitter_ms, start_time, end_time, seed)
+        timestamps = np.concatenate((timestamps, clocked_timestamps))
+        indexes = np.concatenate((indexes, clocked_indexes))
+    order = np.lexsort((indexes, timestamps))
+    return (timestamps[order], indexes[order])
+
+
+def next_transmission_timestamp(stations, start_time: int, milliseconds_per_iteration: int = 1, seed: int = 0):
+    """
+    Returns the timestamp of the first transmission of the stations at or after start_time, the first one that
+    transmission_events returns for a window starting at start_time. Only the next transmissions of each station are
+    calculated, not the ones of a whole window.
+
+    Args:
+        stations (List[Station] | StationTable): The stations.
+        start_time (int): The time in milliseconds.
+        milliseconds_per_iteration (int, optional): The simulation time step, the period of the stations with a frequency of 0. Defaults to 1.
+        seed (int, optional): The seed of the clock jitter. Defaults to 0.
+
+    Returns:
+        int | None: The timestamp of the transmission, or None if there are no stations.
+    """
+    table = StationTable.from_stations(stations)
+    if not len(table):
+        return None
+    periods, first_timestamps, clocked = _schedule(table, milliseconds_per_iteration)
+
+    exact = np.flatnonzero(~clocked)
+    timestamps = first_timestamps[exact] + np.maximum(0, -((first_timestamps[exact] - start_time) // periods[exact])) * periods[exact]
+    if clocked.any():
+        # The jitter moves a transmission at most clock_jitter_ms milliseconds, so the first one at or after start_time
+        # is one of the transmissions scheduled up to twice the jitter after the first one that cannot happen before it
+        clocked = np.flatnonzero(clocked)
+        drifted_periods = periods[clocked] * (1 + table.clock_drift_ppm[clocked] / 1e6)
+        jitters = table.clock_jitter_ms[clocked]
+        first_counts = np.maximum(0, np.floor((start_time - jitters - first_timestamps[clocked]) / drifted_periods).astype(np.int64) - 1)
+        end_counts = first_counts + 2 * np.ceil(2 * jitters / drifted_periods).astype(np.int64) + 5
+        clocked_timestamps, _ = _clocked_timestamps(clocked, first_timestamps, periods, table.clock_drift_ppm, table.clock_jitter_ms, first_counts, end_counts, seed)
+        timestamps = np.concatenate((timestamps, clocked_timestamps[clocked_timestamps >= start_time]))
+    return int(timestamps.min())
+
+
+def _schedule(table: StationTable, milliseconds_per_iteration: int) -> tuple:
+    """
+    Returns the period and the first transmission timestamp of each station, and which ones have a drifting or jittering clock.
+    """
+    periods = np.where(table.frequency > 0, table.frequency, milliseconds_per_iteration)
+    first_timestamps = np.maximum(table.initial_timestamp + table.frequency, 0)
+    clocked = (table.clock_drift_ppm != 0) | (table.clock_jitter_ms > 0)
+    return (periods, first_timestamps, clocked)
+
+
+def _exact_events(stations: np.ndarray, first_timestamps: np.ndarray, periods: np.ndarray, start_time: int, end_time: int) -> tuple:
+    """
+    Returns the unsorted transmissions of the given stations, whose clocks neither drift nor jitter, in a window.
+    """
+    first_timestamps = first_timestamps[stations]
+    periods = periods[stations]
+    # Number of transmissions of each station before the start and before the end of the window
+    first_counts = np.maximum(0, -((first_timestamps - start_time) // periods))
+    end_counts = np.maximum(0, -((first_timestamps - end_time) // periods))
+    positions, counts = _expand(first_counts, end_counts)
+    timestamps = first_timestamps[positions] + counts * periods[positions]
+    return (timestamps, stations[positions])
+
+
+def _clocked_events(stations: np.ndarray, first_timestamps: np.ndarray, periods: np.ndarray, drifts: np.ndarray, jitters: np.ndarray,
+                    start_time: int, end_time: int, seed: int) -> tuple:
+    """
+    Returns the unsorted transmissions of the given stations, whose clocks drift or jitter, in a window.
+
+    The candidates are the transmissions whose schedule is closer than the jitter to the window, plus one on each side
+    to absorb the rounding, and the ones whose final timestamp falls in the window are kept.
+    """
+    drifted_periods = periods[stations] * (1 + drifts[stations] / 1e6)
+    station_jitters = jitters[stations]
+    first_counts = np.maximum(0, np.floor((start_time - station_jitters - first_timestamps[stations]) / drifted_periods).astype(np.int64) - 1)
+    end_counts = np.maximum(0, np.ceil((end_time + station_jitters - first_timestamps[stations]) / drifted_periods).astype(np.int64) + 1)
+    timestamps, indexes = _clocked_timestamps(stations, first_timestamps, periods, drifts, jitters, first_counts, end_counts, seed)
+    in_window = (timestamps >= start_time) & (timestamps < end_time)
+    return (timestamps[in_window], indexes[in_window])
+
+
+def _clocked_timestamps(stations: np.ndarray, first_timestamps: np.ndarray, periods: np.ndarray, drifts: np.ndarray, jitters: np.ndarray,
+                        first_counts: np.ndarray, end_counts: np.ndarray, seed: int) -> tuple:
+    """
+    Returns the timestamps of the transmissions first_counts[i] <= k < end_counts[i] of the given stations, whose clocks
+    drift or jitter, and the station of each one.
+    """
+    first_timestamps = first_timestamps[stations]
+    periods = periods[stations] * (1 + drifts[stations] / 1e6)
+    jitters = jitters[stations]
+    positions, counts = _expand(first_counts, end_counts)
+
+    timestamps = first_timestamps[positions] + counts * periods[positions]
+    jittered = jitters[positions] > 0
+    timestamps[jittered] += jitters[positions][jittered] * (2 * _uniform(seed, stations[positions][jittered], counts[jittered]) - 1)
+    # Round to the millisecond, the transmissions before the start of the simulation happen at its start
+    timestamps = np.maximum(np.floor(timestamps + 0.5).astype(np.int64), 0)
+    return (timestamps, stations[positions])
+
+
+def _expand(first_counts: np.ndarray, end_counts: np.ndarray) -> tuple:
+    """
+    Enumerates the transmissions first_counts[i] <= k < end_counts[i] of every station i.
+
+    Returns:
+        tuple: The station position and the transmission number k of each transmission, grouped by station.
+    """
+    counts = np.maximum(0, end_counts - first_counts)
+    total = int(counts.sum())
+    positions = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+    # Position of each transmission among the ones of its station in the window
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return (positions, first_counts[positions] + offsets)
+
+
+def _uniform(seed: int, stations: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Returns a uniform number in [0, 1) for each pair of station and transmission number, always the same one for the
+    same seed, hashing the three values with the SplitMix64 mixing function.
+    """
+    values = _mix(np.uint64(seed % 2 ** 64) + stations.astype(np.uint64) * _GOLDEN_GAMMA)
+    values = _mix(values + counts.astype(np.uint64) * _GOLDEN_GAMMA)
+    return (values >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """
+    The finalizer of SplitMix64, the arithmetic wraps around 2^64.
+    """
+    values = (values ^ (values >> np.uint64(30))) * _MIX_1
+    values = (values ^ (values >> np.uint64(27))) * _MIX_2
+    return values ^ (values >> np.uint64(31))
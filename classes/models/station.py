@@ -14,13 +14,19 @@
 
 from typing import Union
 
+from classes.models.stationtable import StationTable
+
 
 class Station:
     '''
     Class representing an access point station.
+
+    The station data is stored in a StationTable, a Station object is a lightweight view of one row of that table.
     '''
 
-    def __init__(self, mac: str, x: float, y: float, frequency: int, Tx: float = None, n: float = None, noise_std_dev: float = 0, missing_packages_probability: dict = None, initial_timestamp: int = 0):
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, mac: str, x: float, y: float, frequency: int, Tx: float = None, n: float = None, noise_std_dev: float = 0, missing_packages_probability: dict = None, initial_timestamp: int = 0, clock_drift_ppm: float = 0, clock_jitter_ms: float = 0):
         """
         Constructor for the Station class.
 
@@ -32,47 +38,109 @@ class Station:
             Tx (float, optional): The Tx parameter of the access point station, used for the RSSI to Distance formula. Defaults to None.
             n (float, optional): The n parameter of the access point station, used for the RSSI to Distance formula. Defaults to None.
             noise_std_dev (float, optional): The standard deviation of the noise of the access point station to add to RSSI simulation results. Defaults to 0.
-            missing_packages_probability (dict, optional): A dictionary representing the probability of missing packages for different distances. Defaults to None. It should contain a key "function_model" with the value "sigmoid" or "exponential" and a key "parameters" with the parameters of the model.
+            missing_packages_probability (dict, optional): A dictionary representing the probability of missing packages for different distances. Defaults to None. It should contain a key "function_model" with the name of a model registered in functionmodels and a key "params" with the parameters of the model.
             initial_timestamp (int, optional): The initial timestamp of the access point station. Defaults to 0.
+            clock_drift_ppm (float, optional): The drift of the clock of the access point station in parts per million, the interval between two transmissions is frequency * (1 + clock_drift_ppm / 1e6). Defaults to 0.
+            clock_jitter_ms (float, optional): The maximum deviation in milliseconds of each transmission from its schedule, drawn uniformly. Defaults to 0.
+
+        Raises:
+            ValueError: If the frequency or the initial timestamp is not a whole number of milliseconds, if the missing packages model is not registered or any of its parameters is missing, or if the clock drift or jitter is out of range.
+        """
+        # A standalone station is the single row of its own table
+        self._table = StationTable([{
+            'mac': mac,
+            'x': x,
+            'y': y,
+            'frequency': frequency,
+            'Tx': Tx,
+            'n': n,
+            'noise_std_dev': noise_std_dev,
+            'missing_packages_probability': missing_packages_probability,
+            'initial_timestamp': initial_timestamp,
+            'clock_drift_ppm': clock_drift_ppm,
+            'clock_jitter_ms': clock_jitter_ms
+        }])
+        self._index = 0
+
+    @classmethod
+    def view(cls, table: StationTable, index: int) -> 'Station':
+        """
+        Creates a Station bound to a row of a StationTable.
+
+        Args:
+            table (StationTable): The table holding the station data.
+            index (int): The row of the station in the table.
+
+        Returns:
+            Station: The view of the station.
         """
-        self._mac = mac
-        self._x = x
-        self._y = y
-        self._frequency = frequency
-        self._Tx = Tx
-        self._n = n
-        self._noise_std_dev = noise_std_dev
-        self._missing_packages_probability = missing_packages_probability
-        self._last_transmission_timestamp = initial_timestamp
-        self._next_transmission_timestamp = initial_timestamp + frequency
+        station = cls.__new__(cls)
+        station._table = table
+        station._index = index
+        return station
+
+    @property
+    def table(self) -> StationTable:
+        """
+        StationTable: The table holding the station data.
+        """
+        return self._table
+
+    @property
+    def index(self) -> int:
+        """
+        int: The row of the station in its table.
+        """
+        return self._index
 
     @property
     def mac(self) -> str:
         """
         str: The MAC address of the access point station.
         """
-        return self._mac
+        return str(self._table.mac[self._index])
 
     @property
     def x(self) -> float:
         """
         float: The x-coordinate of the access point station's location.
         """
-        return self._x
+        return float(self._table.x[self._index])
 
     @property
     def y(self) -> float:
         """
         float: The y-coordinate of the access point station's location.
         """
-        return self._y
+        return float(self._table.y[self._index])
 
     @property
     def frequency(self) -> int:
         """
         int: The transmission frequency of the access point station in milliseconds.
         """
-        return self._frequency
+        return int(self._table.frequency[self._index])
+
+    @property
+    def initial_timestamp(self) -> int:
+        """
+        int: The initial timestamp of the access point station.
+        """
+        return int(self._table.initial_timestamp[self._index])
+
+    @property
+    def clock_drift_ppm(self) -> float:
+        """
+        float: The drift of the clock of the access point station in parts per million.
+        """
+        return float(self._table.clock_drift_ppm[self._index])
+
+    @property
+    def clock_jitter_ms(self) -> float:
+        """
+        float: The maximum deviation in milliseconds of each transmission from its schedule.
+        """
+        return float(self._table.clock_jitter_ms[self._index])
 
     @property
     def Tx(self) -> Union[float, None]:
@@ -82,7 +150,8 @@ class Station:
         Returns:
             float | None: The Tx parameter of the access point station.
         """
-        return self._Tx
+        Tx = float(self._table.Tx[self._index])
+        return None if Tx != Tx else Tx
 
     @property
     def n(self) -> Union[float, None]:
@@ -92,14 +161,15 @@ class Station:
         Returns:
             float | None: The n parameter of the access point station.
         """
-        return self._n
+        n = float(self._table.n[self._index])
+        return None if n != n else n
     
     @property
     def noise_std_dev(self) -> float:
         """
         float: The standard deviation of the noise of the access point station to add to RSSI simulation results.
         """
-        return self._noise_std_dev
+        return float(self._table.noise_std_dev[self._index])
     
     @property
     def missing_packages_probability(self) -> Union[dict, None]:
@@ -110,14 +180,14 @@ class Station:
             dict | None: A dictionary representing the probability of missing packages for the station.
                             If the probability is not available, None is returned.
         """
-        return self._missing_packages_probability
+        return self._table.missing_packages_probability[self._index]
 
     @property
     def last_transmission_timestamp(self) -> int:
         """
         int: The timestamp of the last transmission made by the access point station.
         """
-        return self._last_transmission_timestamp
+        return int(self._table.last_transmission_timestamp[self._index])
 
     @last_transmission_timestamp.setter
     def last_transmission_timestamp(self, timestamp: int):
@@ -127,12 +197,11 @@ class Station:
         Args:
             timestamp (int): The timestamp of the last transmission made by the access point station.
         """
-        self._last_transmission_timestamp = timestamp
-        self._next_transmission_timestamp = self._last_transmission_timestamp + self._frequency
+        self._table.set_last_transmission_timestamp(self._index, timestamp)
 
     @property
     def next_transmission_timestamp(self) -> int:
         """
         int: The timestamp of the next scheduled transmission by the access point station.
         """
-        return self._next_transmission_timestamp
+        return int(self._table.next_transmission_timestamp[self._index])
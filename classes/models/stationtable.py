@@ -0,0 +1,282 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from classes.lib.functionmodels import functionmodels
+
+def _station_definition(mac: str, x: float, y: float, frequency: int, Tx: float = None, n: float = None, noise_std_dev: float = 0, missing_packages_probability: dict = None, initial_timestamp: int = 0, clock_drift_ppm: float = 0, clock_jitter_ms: float = 0) -> dict:
+    """
+    Normalizes a station definition, applying the same arguments and defaults as the Station constructor.
+    """
+    return {
+        'mac': mac,
+        'x': x,
+        'y': y,
+        'frequency': frequency,
+        'Tx': Tx,
+        'n': n,
+        'noise_std_dev': noise_std_dev,
+        'missing_packages_probability': missing_packages_probability,
+        'initial_timestamp': initial_timestamp,
+        'clock_drift_ppm': clock_drift_ppm,
+        'clock_jitter_ms': clock_jitter_ms
+    }
+
+
+def _is_whole_number(value) -> bool:
+    """
+    Indicates if a value is an integer, or a float without fractional part, excluding the booleans.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return False
+    if isinstance(value, (int, np.integer)):
+        return True
+    return isinstance(value, (float, np.floating)) and float(value).is_integer()
+
+
+class StationTable:
+    '''
+    Columnar registry of access point stations.
+
+    Every field of the stations is stored as a contiguous numpy array indexed by the station position, so the vectorized
+    RSSI and scheduling code can work with all the stations at once. The Station objects are lightweight views of a row of the table.
+
+    Attributes:
+        mac (np.ndarray): The MAC addresses of the stations.
+        x (np.ndarray): The x-coordinates of the stations.
+        y (np.ndarray): The y-coordinates of the stations.
+        frequency (np.ndarray): The transmission frequencies in milliseconds.
+        initial_timestamp (np.ndarray): The initial timestamps of the stations.
+        clock_drift_ppm (np.ndarray): The drifts of the station clocks in parts per million, positive if the transmissions are slower than their frequency.
+        clock_jitter_ms (np.ndarray): The maximum deviations in milliseconds of each transmission from its schedule.
+        Tx (np.ndarray): The Tx parameters, NaN if not available.
+        n (np.ndarray): The n parameters, NaN if not available.
+        noise_std_dev (np.ndarray): The standard deviations of the RSSI noise.
+        miss_model (np.ndarray): The functionmodels code of the missing packages model, MISS_MODEL_NONE if the station does not lose packages.
+        miss_params (np.ndarray): The parameters of the missing packages function model, one row per station.
+        missing_packages_probability (list): The original missing packages definitions.
+        last_transmission_timestamp (np.ndarray): The timestamps of the last transmissions.
+        next_transmission_timestamp (np.ndarray): The timestamps of the next scheduled transmissions.
+        stations (List[Station]): The Station views of the table rows.
+    '''
+
+    MISS_MODEL_NONE = functionmodels.NONE
+
+    def __init__(self, definitions: List[dict]):
+        """
+        Builds the table from a list of station definitions.
+
+        Args:
+            definitions (List[dict]): The station definitions, each one with the same keys as the arguments of the Station constructor.
+
+        Raises:
+            TypeError: If a definition has unknown or missing fields.
+            ValueError: If a frequency or initial timestamp is not a whole number of milliseconds, if a missing packages model is not registered or any of its parameters is missing, or if a clock drift or jitter is out of range.
+        """
+        definitions = [_station_definition(**definition) for definition in definitions]
+        # The schedule is stored in whole milliseconds, a fractional value would be truncated
+        for definition in definitions:
+            for field in ('frequency', 'initial_timestamp'):
+                if not _is_whole_number(definition[field]):
+                    raise ValueError(f"Station {definition['mac']}: the {field} must be a whole number of milliseconds, not {definition[field]!r}.")
+
+        self._mac = np.array([definition['mac'] for definition in definitions], dtype=str)
+        self._x = np.array([definition['x'] for definition in definitions], dtype=np.float64)
+        self._y = np.array([definition['y'] for definition in definitions], dtype=np.float64)
+        self._frequency = np.array([definition['frequency'] for definition in definitions], dtype=np.int64)
+        self._initial_timestamp = np.array([definition['initial_timestamp'] for definition in definitions], dtype=np.int64)
+        self._Tx = np.array([np.nan if definition['Tx'] is None else definition['Tx'] for definition in definitions], dtype=np.float64)
+        self._n = np.array([np.nan if definition['n'] is None else definition['n'] for definition in definitions], dtype=np.float64)
+        self._noise_std_dev = np.array([definition['noise_std_dev'] for definition in definitions], dtype=np.float64)
+        self._clock_drift_ppm = np.array([definition['clock_drift_ppm'] for definition in definitions], dtype=np.float64)
+        self._clock_jitter_ms = np.array([definition['clock_jitter_ms'] for definition in definitions], dtype=np.float64)
+        for index, definition in enumerate(definitions):
+            if not definition['clock_drift_ppm'] > -1e6:
+                raise ValueError(f"Station {definition['mac']}: the clock drift must be greater than -1000000 ppm.")
+            if not definition['clock_jitter_ms'] >= 0:
+                raise ValueError(f"Station {definition['mac']}: the clock jitter must be a positive number of milliseconds.")
+        self._missing_packages_probability = [definition['missing_packages_probability'] for definition in definitions]
+
+        # Compile the missing packages models once, invalid definitions are reported here instead of in the simulation
+        self._miss_model = np.full(len(definitions), self.MISS_MODEL_NONE, dtype=np.int32)
+        self._miss_params = np.full((len(definitions), functionmodels.max_params()), np.nan, dtype=np.float64)
+        for index, missing_packages_probability in enumerate(self._missing_packages_probability):
+            try:
+                code, params = functionmodels.compile(missing_packages_probability)
+            except ValueError as error:
+                raise ValueError(f"Station {definitions[index]['mac']}: {error}") from error
+            self._miss_model[index] = code
+            self._miss_params[index, :len(params)] = params
+
+        # Transmissions schedule
+        self._last_transmission_timestamp = self._initial_timestamp.copy()
+        self._next_transmission_timestamp = self._initial_timestamp + self._frequency
+
+        self._stations = None
+
+    @classmethod
+    def from_stations(cls, stations: list) -> 'StationTable':
+        """
+        Returns the table behind the given stations.
+
+        If all the stations are the views of the rows of a single table, in order, that table is returned. Otherwise a new
+        table is built and the stations are bound to it, so they keep being views of the returned table.
+
+        Args:
+            stations (List[Station]): The stations.
+
+        Returns:
+            StationTable: The table of the stations.
+        """
+        if isinstance(stations, StationTable):
+            return stations
+        tables = {id(station._table) for station in stations}
+        if len(tables) == 1:
+            table = stations[0]._table
+            if len(table) == len(stations) and all(station._index == index for index, station in enumerate(stations)):
+                return table
+
+        table = cls([{
+            'mac': station.mac,
+            'x': station.x,
+            'y': station.y,
+            'frequency': station.frequency,
+            'Tx': station.Tx,
+            'n': station.n,
+            'noise_std_dev': station.noise_std_dev,
+            'missing_packages_probability': station.missing_packages_probability,
+            'initial_timestamp': station.initial_timestamp,
+            'clock_drift_ppm': station.clock_drift_ppm,
+            'clock_jitter_ms': station.clock_jitter_ms
+        } for station in stations])
+        # Keep the schedule of the stations
+        table._last_transmission_timestamp[:] = [station.last_transmission_timestamp for station in stations]
+        table._next_transmission_timestamp[:] = [station.next_transmission_timestamp for station in stations]
+        for index, station in enumerate(stations):
+            station._table = table
+            station._index = index
+        table._stations = list(stations)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._mac)
+
+    @property
+    def stations(self) -> list:
+        """
+        List[Station]: The Station views of the table rows.
+        """
+        if self._stations is None:
+            from classes.models.station import Station
+            self._stations = [Station.view(self, index) for index in range(len(self))]
+        return self._stations
+
+    @property
+    def mac(self) -> np.ndarray:
+        return self._mac
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y
+
+    @property
+    def frequency(self) -> np.ndarray:
+        return self._frequency
+
+    @property
+    def initial_timestamp(self) -> np.ndarray:
+        return self._initial_timestamp
+
+    @property
+    def clock_drift_ppm(self) -> np.ndarray:
+        return self._clock_drift_ppm
+
+    @property
+    def clock_jitter_ms(self) -> np.ndarray:
+        return self._clock_jitter_ms
+
+    @property
+    def Tx(self) -> np.ndarray:
+        return self._Tx
+
+    @property
+    def n(self) -> np.ndarray:
+        return self._n
+
+    @property
+    def noise_std_dev(self) -> np.ndarray:
+        return self._noise_std_dev
+
+    @property
+    def miss_model(self) -> np.ndarray:
+        return self._miss_model
+
+    @property
+    def miss_params(self) -> np.ndarray:
+        return self._miss_params
+
+    @property
+    def missing_packages_probability(self) -> list:
+        return self._missing_packages_probability
+
+    @property
+    def last_transmission_timestamp(self) -> np.ndarray:
+        return self._last_transmission_timestamp
+
+    @property
+    def next_transmission_timestamp(self) -> np.ndarray:
+        return self._next_transmission_timestamp
+
+    def set_last_transmission_timestamp(self, index, timestamp):
+        """
+        Registers the last transmission of one or several stations and schedules their next transmission.
+
+        Args:
+            index (int | np.ndarray): The index of the stations.
+            timestamp (int | np.ndarray): The timestamp of the last transmission of each station.
+        """
+        self._last_transmission_timestamp[index] = timestamp
+        self._next_transmission_timestamp[index] = self._last_transmission_timestamp[index] + self._frequency[index]
+
+    def get_state(self) -> dict:
+        """
+        Returns the transmissions state of the stations, so a simulation can continue from a checkpoint.
+
+        Returns:
+            dict: Copies of the last and next transmission timestamps.
+        """
+        return {'last_transmission_timestamp': self._last_transmission_timestamp.copy(),
+                'next_transmission_timestamp': self._next_transmission_timestamp.copy()}
+
+    def set_state(self, state: dict):
+        """
+        Restores the transmissions state returned by get_state.
+
+        Args:
+            state (dict): The transmissions state of the stations.
+
+        Raises:
+            ValueError: If the state belongs to a different number of stations.
+        """
+        if len(state['last_transmission_timestamp']) != len(self) or len(state['next_transmission_timestamp']) != len(self):
+            raise ValueError(f"The transmissions state has {len(state['last_transmission_timestamp'])} stations, expected {len(self)}.")
+        self._last_transmission_timestamp[:] = state['last_transmission_timestamp']
+        self._next_transmission_timestamp[:] = state['next_transmission_timestamp']
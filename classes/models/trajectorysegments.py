@@ -0,0 +1,140 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+class TrajectorySegments:
+    '''
+    Piecewise linear representation of a trajectory.
+
+    Each segment starts at a known point and advances a constant displacement per iteration, so the position at any
+    iteration of the segment is obtained in closed form as start + k * step, without accumulating the previous steps.
+    The same formula with a fractional k interpolates the positions between two iterations.
+    The segments are consecutive: each one starts at the time and point where the previous one ends.
+
+    Attributes:
+        milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+        start_time (np.ndarray): The time in milliseconds of the starting point of each segment.
+        start_x (np.ndarray): The x-coordinate of the starting point of each segment.
+        start_y (np.ndarray): The y-coordinate of the starting point of each segment.
+        step_x (np.ndarray): The x displacement of each iteration of each segment.
+        step_y (np.ndarray): The y displacement of each iteration of each segment.
+        angle (np.ndarray): The heading of each segment in radians.
+        steps (np.ndarray): The number of iterations of each segment.
+    '''
+
+    def __init__(self, milliseconds_per_iteration: int, start_time, start_x, start_y, step_x, step_y, angle, steps):
+        """
+        Initializes a new instance of the TrajectorySegments class.
+
+        Args:
+            milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+            start_time (array-like): The time in milliseconds of the starting point of each segment.
+            start_x (array-like): The x-coordinate of the starting point of each segment.
+            start_y (array-like): The y-coordinate of the starting point of each segment.
+            step_x (array-like): The x displacement of each iteration of each segment.
+            step_y (array-like): The y displacement of each iteration of each segment.
+            angle (array-like): The heading of each segment in radians.
+            steps (array-like): The number of iterations of each segment, greater than 0.
+        """
+        self.milliseconds_per_iteration = milliseconds_per_iteration
+        self.start_time = np.asarray(start_time, dtype=np.int64)
+        self.start_x = np.asarray(start_x, dtype=float)
+        self.start_y = np.asarray(start_y, dtype=float)
+        self.step_x = np.asarray(step_x, dtype=float)
+        self.step_y = np.asarray(step_y, dtype=float)
+        self.angle = np.asarray(angle, dtype=float)
+        self.steps = np.asarray(steps, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.start_time)
+
+    @property
+    def end_time(self) -> int:
+        """
+        The time in milliseconds of the last point of the trajectory.
+        """
+        return int(self.start_time[-1] + self.steps[-1] * self.milliseconds_per_iteration)
+
+    def end(self) -> tuple:
+        """
+        Returns the last point of the trajectory.
+
+        Returns:
+            tuple: The x-coordinate, y-coordinate and heading of the last point.
+        """
+        return (self.start_x[-1] + self.steps[-1] * self.step_x[-1], self.start_y[-1] + self.steps[-1] * self.step_y[-1], self.angle[-1])
+
+    def evaluate(self, timestamps: np.ndarray, leaving: bool = False) -> tuple:
+        """
+        Calculates the position of the trajectory at the given times.
+
+        Args:
+            timestamps (np.ndarray): Times in milliseconds between the start of the first segment and the end of the last one.
+                The times between two iterations are interpolated linearly.
+            leaving (bool, optional): On the points shared by two segments, return the heading of the segment leaving the point
+                instead of the one reaching it. Defaults to False.
+
+        Returns:
+            tuple: A tuple of numpy arrays with the x-coordinates, y-coordinates and headings at each time.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        segment = np.searchsorted(self.start_time, timestamps, side='right' if leaving else 'left') - 1
+        # The starting point of the trajectory is not reached by any segment
+        np.clip(segment, 0, len(self.start_time) - 1, out=segment)
+        # Fractional between two iterations, the integer iterations are exact in floating point
+        iterations = (timestamps - self.start_time[segment]) / self.milliseconds_per_iteration
+        xs = self.start_x[segment] + iterations * self.step_x[segment]
+        ys = self.start_y[segment] + iterations * self.step_y[segment]
+        return (xs, ys, self.angle[segment])
+
+    @staticmethod
+    def evaluate_many(trajectories: list, timestamps: np.ndarray, leaving: bool = False) -> tuple:
+        """
+        Calculates the position of several trajectories at the same times, all of them at once.
+
+        The segments of all the trajectories are joined in a single timeline, where the times of the trajectory d are
+        shifted by d times the span of all of them, so a single search finds the segment of every trajectory and time.
+
+        Args:
+            trajectories (List[TrajectorySegments]): The trajectories, with the same time per iteration.
+            timestamps (np.ndarray): Times in milliseconds covered by every trajectory, interpolated between two iterations.
+            leaving (bool, optional): On the points shared by two segments, return the heading of the segment leaving the point
+                instead of the one reaching it. Defaults to False.
+
+        Returns:
+            tuple: A tuple of numpy arrays of shape (trajectories, timestamps) with the x-coordinates, y-coordinates and headings.
+        """
+        if len(trajectories) == 1:
+            return tuple(values[None, :] for values in trajectories[0].evaluate(timestamps, leaving=leaving))
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        milliseconds_per_iteration = trajectories[0].milliseconds_per_iteration
+        first_time = min(int(trajectory.start_time[0]) for trajectory in trajectories)
+        span = max(trajectory.end_time for trajectory in trajectories) - first_time + milliseconds_per_iteration
+        shifts = np.arange(len(trajectories), dtype=np.int64) * span
+        start_time = np.concatenate([trajectory.start_time + shift for trajectory, shift in zip(trajectories, shifts)])
+        start_x, start_y, step_x, step_y, angle = (np.concatenate([getattr(trajectory, name) for trajectory in trajectories])
+                                                   for name in ('start_x', 'start_y', 'step_x', 'step_y', 'angle'))
+
+        # Segments of each trajectory in the joined arrays, the search is limited to them as in evaluate
+        last_segment = np.cumsum([len(trajectory) for trajectory in trajectories]) - 1
+        first_segment = np.concatenate(([0], last_segment[:-1] + 1))
+        times = timestamps[None, :] + shifts[:, None]
+        segment = np.searchsorted(start_time, times, side='right' if leaving else 'left') - 1
+        segment = np.clip(segment, first_segment[:, None], last_segment[:, None])
+        iterations = (times - start_time[segment]) / milliseconds_per_iteration
+        xs = start_x[segment] + iterations * step_x[segment]
+        ys = start_y[segment] + iterations * step_y[segment]
+        return (xs, ys, angle[segment])
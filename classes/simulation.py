@@ -15,13 +15,26 @@
 import datetime
 import math
 import os
-from typing import List
-
-from classes.lib.bufferedcsvfilewriter import BufferedCsvFileWriter
+import time
+from typing import List, Union
+
+import numpy as np
+
+from classes.lib.asyncoutputwriter import AsyncOutputWriter
+from classes.lib.outputwriterfactory import OutputWriterFactory
+from classes.lib.randomstreams import RandomStreams
+from classes.lib.simulationcheckpoint import SimulationCheckpoint
+from classes.lib.simulationmetrics import SimulationMetrics
+from classes.lib.stationscheduler import StationScheduler
+from classes.lib.trajectoryplotter import TrajectoryPlotter
+from classes.lib.trajectorysampler import TrajectorySampler
+from classes.lib.transmissionschedule import transmission_events
 from classes.simulators.rssi.factory import RssiFactory
 from classes.simulators.trajectory.factory import TrajectoryFactory
 from classes.config import Config
 from classes.models.station import Station
+from classes.models.stationtable import StationTable
+from classes.models.trajectorysegments import TrajectorySegments
 
 
 class Simulation:
@@ -31,191 +44,954 @@ class Simulation:
     Attributes:
         config (Config): The configuration object for the simulation.
         stations (List[Station]): The list of stations in the simulation.
+        station_table (StationTable): The columnar table behind the stations.
         output_dir (str): The output directory for the simulation results.
+        output_prefix (str | None): The prefix of the output file names, None to build it from the current date and time.
+        resume (bool): Indicates if the simulation continues from the checkpoint of a previous run with the same output prefix.
         position_rounding (int): The number of decimal places to round the position coordinates.
+        iterations_per_block (int): The number of iterations whose trajectory is generated at once.
+
+        RSSI_COLUMNS (list): The name and type of the columns of the RSSI output.
+        TRAJECTORY_COLUMNS (list): The name and type of the columns of the trajectory output.
+        DEVICE_COLUMN (tuple): The name and type of the column added to both outputs when several devices are simulated.
+        MIN_ITERATIONS_PER_BLOCK (int): The minimum number of iterations of a block when several devices are simulated.
+        AUTO_STEP_DIVISOR (int): The number of iterations per shortest transmission period of the automatic time step.
+        CHECKPOINT_SUFFIX (str): The suffix of the checkpoint file name, after the output prefix.
 
     Methods:
         start(): Starts the simulation.
+        iter_readings(): Runs the simulation lazily, yielding its output as chunks of record arrays.
+        _run(): Runs the simulation with the resolved output prefix.
+        _stream(): Generates the output of the simulation, one block of iterations at a time.
+        _sharded_stream(): Generates the RSSI values of the time shards of the simulation in worker processes.
+        _simulate_shard(): Generates the RSSI output of a time shard.
+        _create_trajectory_simulators(): Create the trajectory simulator of every device.
+        _create_rssi_simulator(): Create the RSSI simulator.
+        _bounds(): Calculate the area where the devices move.
+        _trajectory_block(): Calculate the trajectory of every device in a block of iterations.
+        _block_trajectory_rows(): Calculate the trajectory rows of a block.
+        _closing_trajectory_rows(): Calculate the rows that close the sampled trajectory.
+        _event_positions(): Calculate the position of every device at every transmission of a block.
+        _loop_state(): Describe everything the main loop keeps between two blocks.
+        _restore_loop_state(): Restore the state of the simulation returned by _loop_state.
+        _milliseconds_per_iteration(): Calculate the time step of the simulation.
+        _initial_states(): Calculate the initial position and heading of each device.
+        _output_columns(): Calculate the columns of the outputs.
+        _records_dtype(): Calculate the type of the records of an output.
+        _trajectory_rows(): Join the trajectory rows of the devices in a block.
+        _rssi_rows(): Calculate the RSSI of a block of transmissions.
+        _with_initial_position(): Keep the type of the configured initial position in the CSV output.
+        _checkpoint_run(): Describe the simulation a checkpoint belongs to.
         _plot_trajectory(): Plot the trajectory of a mobile device in a given scenario.
     """
 
-    def __init__(self, config: Config, stations: List[Station], output_dir):
+    RSSI_COLUMNS = [('timestamp', 'float64'), ('position_x', 'float32'), ('position_y', 'float32'), ('station_mac', 'dictionary'), ('rssi', 'int8')]
+    TRAJECTORY_COLUMNS = [('step', 'int64'), ('timestamp', 'float64'), ('position_x', 'float32'), ('position_y', 'float32')]
+    DEVICE_COLUMN = ('device_id', 'int32')
+    MIN_ITERATIONS_PER_BLOCK = 1000
+    AUTO_STEP_DIVISOR = 10
+    CHECKPOINT_SUFFIX = '_checkpoint.npz'
+
+    def __init__(self, config: Config, stations: Union[List[Station], StationTable], output_dir, output_prefix: str = None, resume: bool = False):
         """
         Initialize a Simulation object.
 
         Args:
             config (Config): The configuration object for the simulation.
-            stations (List[Station]): The list of stations in the simulation.
+            stations (List[Station] | StationTable): The stations in the simulation.
             output_dir (str): The output directory for the simulation results.
+            output_prefix (str, optional): The prefix of the output file names. Defaults to None, the current date and time followed by the simulation duration.
+            resume (bool, optional): Indicates if the simulation continues from the checkpoint of a previous run with the same output prefix. Defaults to False.
+
+        Raises:
+            ValueError: If the simulation is resumed without an output prefix.
         """
+        if resume and output_prefix is None:
+            raise ValueError("Resuming a simulation requires the output prefix of the interrupted run.")
         self.config = config
-        self.stations = stations
+        self.station_table = StationTable.from_stations(stations)
+        self.stations = self.station_table.stations
         self.output_dir = output_dir
+        self.output_prefix = output_prefix
+        self.resume = resume
         self.position_rounding = 9
+        self.iterations_per_block = 10000
 
     def start(self):
         """
         Starts the simulation.
 
-        This method initializes the main variables, creates output file writers,
-        initializes simulator modules, and runs the main loop of the simulation.
+        The simulation runs inside cProfile when the profile option of the configuration is enabled, and the
+        profiling statistics are written next to the output files.
 
         Returns:
             None
         """
-        
-        #region Variables initialization
+        # Define output prefix filename, by default concatenate date and time to the file names
+        output_prefix = self.output_prefix
+        if output_prefix is None:
+            current_datetime = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_prefix = f"{current_datetime}_{self.config.simulation_duration_seconds}"
+
+        if not self.config.profile:
+            self._run(output_prefix)
+            return
+
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(self._run, output_prefix)
+        finally:
+            profiler.dump_stats(os.path.join(self.output_dir, f"{output_prefix}_profile.prof"))
+            with open(os.path.join(self.output_dir, f"{output_prefix}_profile.txt"), 'w') as file:
+                pstats.Stats(profiler, stream=file).sort_stats('cumulative').print_stats(50)
 
-        # Initialize main variables
-        max_time_milliseconds = self.config.simulation_duration_seconds * 1000
-        current_time = 0
-        iteration = 0
-        # min([station.frequency for station in self.stations])
-        milliseconds_per_iteration = 1
-        # if milliseconds_per_iteration < 10:
-        #    raise ValueError("Minimum frequency is 10 millisecond.")
+    def iter_readings(self, chunk_size: int = 65536, trajectory: bool = None):
+        """
+        Runs the simulation lazily, yielding its output as chunks of NumPy record arrays instead of writing files.
+
+        The simulation advances one block of iterations at a time, only when the next chunk is requested, so the
+        memory stays bounded by the chunk size and the block size, whatever the duration of the simulation. The
+        records have the columns of the output files, with the timestamps in seconds and the MAC addresses of the
+        stations as strings. Every chunk has chunk_size records, except the last one of each kind. Like start, a
+        simulation streams its data once, the transmissions schedule of the stations is consumed by the run.
+
+        Args:
+            chunk_size (int, optional): The number of records of each chunk. Defaults to 65536.
+            trajectory (bool, optional): Indicates if the trajectory samples are yielded. Defaults to None, the output_trajectory option of the configuration.
+
+        Yields:
+            tuple: The kind of the chunk, "rssi" or "trajectory", and the np.recarray with its records.
+
+        Raises:
+            ValueError: If the chunk size is not a positive integer.
+        """
+        if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError(f"The chunk size must be a positive integer, got {chunk_size!r}")
+        if trajectory is None:
+            trajectory = self.config.output_trajectory
+
+        rssi_columns, trajectory_columns = self._output_columns()
+        dtypes = {
+            'rssi': self._records_dtype(rssi_columns),
+            'trajectory': self._records_dtype(trajectory_columns),
+        }
+        # Records waiting for a complete chunk of each kind
+        pending = {'rssi': [], 'trajectory': []}
+        pending_rows = {'rssi': 0, 'trajectory': 0}
+
+        for output, columns in self._stream(SimulationMetrics(enabled=False), trajectory):
+            records = np.empty(len(columns[0]), dtype=dtypes[output])
+            for name, column in zip(dtypes[output].names, columns):
+                records[name] = column
+            pending[output].append(records)
+            pending_rows[output] += len(records)
+            if pending_rows[output] < chunk_size:
+                continue
+            records = np.concatenate(pending[output])
+            complete = len(records) - len(records) % chunk_size
+            for start in range(0, complete, chunk_size):
+                yield output, records[start:start + chunk_size].view(np.recarray)
+            pending[output] = [records[complete:]]
+            pending_rows[output] = len(records) - complete
+
+        # The remaining records of each kind
+        for output in ('rssi', 'trajectory'):
+            if pending_rows[output]:
+                yield output, np.concatenate(pending[output]).view(np.recarray)
+
+    def _run(self, output_prefix: str):
+        """
+        Runs the simulation.
+
+        This method creates the output file writers and writes to them the data streamed by the simulation.
+        When the metrics option of the configuration is enabled, the time of each phase and the counters of the run
+        are written to the {output_prefix}_metrics.json file.
+
+        With the checkpoint_interval_seconds option, the state of the simulation and the size of the output files are
+        saved to {output_prefix}_checkpoint.npz at the end of the first block of iterations after each interval. A resumed
+        simulation restores that state, truncates the output files to their size at the checkpoint and appends to them,
+        so its output is the same as the one of an uninterrupted run. The checkpoint is removed when the run finishes.
+
+        Args:
+            output_prefix (str): The prefix of the output file names.
 
-        # Define maximal and minimal x and y coordinates
+        Returns:
+            None
+
+        Raises:
+            FileNotFoundError: If the simulation is resumed and there is no checkpoint.
+            ValueError: If the checkpoint belongs to a different simulation.
+        """
+        metrics = SimulationMetrics(enabled=self.config.metrics)
+        metrics.start()
+
+        # Load the state of the interrupted run, the checkpoint must belong to the same simulation
+        checkpoint_filename = os.path.join(self.output_dir, f"{output_prefix}{self.CHECKPOINT_SUFFIX}")
+        resume_state = None
+        resume_offsets = {'rssi': None, 'trajectory': None}
+        if self.resume:
+            resume_state = SimulationCheckpoint.read(checkpoint_filename)
+            if resume_state['run'] != self._checkpoint_run():
+                raise ValueError(f"Checkpoint file {checkpoint_filename} belongs to a different simulation: {resume_state['run']}.")
+            resume_offsets = resume_state['offsets']
+
+        # Define maximal and minimal x and y coordinates of the plot
         dim_x = self.config.room_dim_meters['x']
         dim_y = self.config.room_dim_meters['y']
         dim_margins = self.config.margin_meters
-        min_x = dim_margins
-        max_x = dim_x - dim_margins
-        min_y = dim_margins
-        max_y = dim_y - dim_margins
-        pos_x = round(self.config.initial_position
-                        ['x'], ndigits=self.position_rounding)
-        pos_y = round(self.config.initial_position
-                        ['y'], ndigits=self.position_rounding)
-        speed = self.config.speed_meters_second
-        angle = math.radians(self.config.initial_angle_degrees)
-
-        # Create output file writers
-        # Concatenate date and time to the file names
-        current_datetime = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        # Define output prefix filename
-        output_prefix = f"{current_datetime}_{self.config.simulation_duration_seconds}"
-
-        # Create output file writers with updated file names
-        rssi_writer = BufferedCsvFileWriter(
-            os.path.join(self.output_dir, f"{output_prefix}_rssi.csv"))
-        rssi_writer.write(['timestamp', 'position_x',
-                            'position_y', 'station_mac', 'rssi'])
-
-        trajectory_writer = BufferedCsvFileWriter(
-            os.path.join(self.output_dir, f"{output_prefix}_trajectory.csv"), enabled=self.config.output_trajectory)
-        trajectory_writer.write(
-            ['step', 'timestamp', 'position_x', 'position_y'])
-
-        # Initialize simulators modules
-        position_simulator_module = TrajectoryFactory.create_trajectory_simulator(
-            self.config.trajectory_simulator_module,
-            self.config.trajectory_simulator_module_parameters)
-        rssi_simulator_module = RssiFactory.create_rssi_simulator(
-            self.config.rssi_simulator_module,
-            self.config.rssi_simulator_module_parameters)
+        multi_device = self.config.devices > 1
+
+        # Create output file writers, the output of several devices has the device of each row
+        rssi_columns, trajectory_columns = self._output_columns()
+        rssi_writer = OutputWriterFactory.create_writer(
+            self.config.output_format, os.path.join(self.output_dir, f"{output_prefix}_rssi"), rssi_columns,
+            row_group_size=self.config.output_row_group_size, buffer_bytes=self.config.output_buffer_bytes, resume_offset=resume_offsets['rssi'],
+            compression=self.config.output_compression)
+
+        trajectory_writer = OutputWriterFactory.create_writer(
+            self.config.output_format, os.path.join(self.output_dir, f"{output_prefix}_trajectory"), trajectory_columns,
+            enabled=self.config.output_trajectory, row_group_size=self.config.output_row_group_size, buffer_bytes=self.config.output_buffer_bytes,
+            resume_offset=resume_offsets['trajectory'], compression=self.config.output_compression)
+
+        # Move the writing of the output files to background threads, overlapping the simulation and the disk writes
+        if self.config.output_async:
+            rssi_writer = AsyncOutputWriter(rssi_writer, queue_size=self.config.output_queue_size)
+            trajectory_writer = AsyncOutputWriter(trajectory_writer, queue_size=self.config.output_queue_size)
+        writers = {'rssi': rssi_writer, 'trajectory': trajectory_writer}
+
+        # The plot is built from a decimated sample of the written positions of the first device, collected during the loop
+        trajectory_plotter = None
+        if self.config.output_trajectory and self.config.plot_trajectory:
+            trajectory_plotter = TrajectoryPlotter(max_points=self.config.plot_max_points, formats=self.config.plot_formats)
+            if resume_state is not None and resume_state['plotter'] is not None:
+                trajectory_plotter.set_state(resume_state['plotter'])
+
+        # Periodic checkpoints, written between two blocks, once the rows of the previous blocks are in the output files
+        checkpoint = None
+        if self.config.checkpoint_interval_seconds:
+            last_checkpoint_time = time.monotonic()
+
+            def checkpoint(simulation_state):
+                nonlocal last_checkpoint_time
+                if time.monotonic() - last_checkpoint_time < self.config.checkpoint_interval_seconds:
+                    return
+                metrics.lap('output')
+                SimulationCheckpoint.write(checkpoint_filename, {
+                    'run': self._checkpoint_run(),
+                    'offsets': {output: writer.checkpoint() for output, writer in writers.items()},
+                    'plotter': trajectory_plotter.get_state() if trajectory_plotter is not None else None,
+                    'simulation': simulation_state(),
+                })
+                last_checkpoint_time = time.monotonic()
+                metrics.count('checkpoints')
+                metrics.lap('checkpoint')
+
+        stream = self._stream(metrics, trajectory_writer.enabled, resume_state=resume_state['simulation'] if resume_state is not None else None,
+                              checkpoint=checkpoint, rssi=self.config.shards == 1)
+        # The RSSI values of each time shard are generated by a worker process into its own file, appended in order
+        shard_files = []
+        if self.config.shards > 1:
+            stream = self._sharded_stream(stream, output_prefix, metrics, shard_files)
 
-        #endregion
+        try:
+            # The output files are one of the consumers of the stream of the simulation
+            for output, columns in stream:
+                if output == 'rssi_shard':
+                    rssi_writer.append_file(columns)
+                    metrics.lap('output')
+                    continue
+                writers[output].write_columns(self._with_initial_position(output, columns))
+                if output == 'trajectory' and trajectory_plotter is not None:
+                    if multi_device:
+                        first_device = columns[2] == 0
+                        trajectory_plotter.add(columns[1][first_device], columns[3][first_device], columns[4][first_device])
+                    else:
+                        trajectory_plotter.add(columns[1], columns[2], columns[3])
+                metrics.lap('output')
+        finally:
+            # Stop the simulation (and its workers) if the writing failed, and close the output file writers, waiting for the pending writes
+            stream.close()
+            try:
+                rssi_writer.close()
+            finally:
+                trajectory_writer.close()
+                for shard_file in shard_files:
+                    if os.path.exists(shard_file):
+                        os.remove(shard_file)
+            metrics.lap('output')
+
+        # The run is complete, a later resume would duplicate its rows
+        if os.path.exists(checkpoint_filename):
+            os.remove(checkpoint_filename)
+
+        # Plot the trajectory data, matplotlib is only imported when it is enabled
+        if trajectory_plotter is not None:
+            self._plot_trajectory(trajectory_plotter, dim_x=dim_x, dim_y=dim_y, min_x=dim_margins, max_x=dim_x - dim_margins, min_y=dim_margins, max_y=dim_y - dim_margins,
+                                  output_name=f'{output_prefix}_trajectory_plot')
+            metrics.lap('plot')
+
+        # Write the metrics of the run next to the output files
+        metrics.stop()
+        if metrics.enabled:
+            for writer in (rssi_writer, trajectory_writer):
+                metrics.count('flushes', writer.flushes)
+                if os.path.exists(writer.filename):
+                    metrics.count('bytes_written', os.path.getsize(writer.filename))
+            max_time_milliseconds = self.config.simulation_duration_seconds * 1000
+            metrics.write(os.path.join(self.output_dir, f"{output_prefix}_metrics.json"), output_prefix=output_prefix,
+                          simulation_duration_seconds=self.config.simulation_duration_seconds, stations=len(self.station_table), seed=self.config.seed,
+                          seed_spawn_key=self.config.seed_spawn_key,
+                          simulated_ms_per_wall_second=max_time_milliseconds / max(metrics.summary()['wall_seconds'], 1e-9))
+
+    def _sharded_stream(self, stream, output_prefix: str, metrics: SimulationMetrics, shard_files: list):
+        """
+        Generates the RSSI values of the time shards of the simulation in worker processes.
+
+        The trajectory is generated first, as segments, by the given stream of the simulation. The blocks of iterations
+        are split in consecutive shards, and each shard is sent to a worker as soon as its trajectory is complete. The
+        workers derive the transmissions of their shard from the schedule of the stations, and write the RSSI values to
+        their own file, with their own random streams. The output depends on the seed and the number of shards, not on
+        the number of workers, but it differs from the one of the simulation in a single loop, which draws the RSSI
+        noise and the missing packages from a single stream.
+
+        Args:
+            stream (Generator): The stream of the simulation, yielding the trajectory rows and segments.
+            output_prefix (str): The prefix of the output file names.
+            metrics (SimulationMetrics): The metrics of the run, the counters of the workers are added to it.
+            shard_files (list): The names of the shard files are appended to it, so the caller removes them.
+
+        Yields:
+            tuple: The trajectory rows of the stream, and "rssi_shard" and the file of every shard, in time order.
+        """
+        shards = self.config.shards
+        milliseconds_per_iteration = self._milliseconds_per_iteration()
+        blocks = math.ceil(math.ceil(self.config.simulation_duration_seconds * 1000 / milliseconds_per_iteration) / self.iterations_per_block)
+        # Number of blocks of each shard, as even as possible, the empty shards (more shards than blocks) are skipped
+        shard_sizes = [(shard, (shard + 1) * blocks // shards - shard * blocks // shards) for shard in range(shards)]
+        shard_sizes = [(shard, size) for shard, size in shard_sizes if size]
+        # The devices take the first children of the random streams, the shards the next ones
+        random_streams = RandomStreams(self.config.seed, self.config.seed_spawn_key)
+        shard_streams = random_streams.spawn(self.config.devices - 1 + shards)[self.config.devices - 1:]
+        workers = min(self.config.shard_workers or os.cpu_count() or 1, shards)
+        executor = None
+        if workers > 1:
+            import concurrent.futures
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        results = []
+        shard_blocks = []
 
-        #region main loop
         try:
-            # Main loop
-            while True:
-                # Increase counters
-                iteration += 1
-
-                # Write the current position to the output file
-                trajectory_writer.write(
-                    [iteration, current_time/1000, pos_x, pos_y])
-
-                # For each required station, generate the static RSSI value
-                for station in [station for station in self.stations if station.next_transmission_timestamp <= current_time]:
-                    # Calculate the RSSI value
-                    rssi = rssi_simulator_module.calculate_rssi(
-                        station=station, current_time=current_time, milliseconds_per_iteration=milliseconds_per_iteration, current_x=pos_x, current_y=pos_y, speed=speed)
-                    # Set the last transmission timestamp
-                    station.last_transmission_timestamp = current_time
-                    # Check if the signal is valid
-                    if rssi is None:
-                        continue
-                    # Write the RSSI value to the output file
-                    rssi_writer.write(
-                        [current_time/1000, pos_x, pos_y, station.mac, rssi])
-
-                # Check if we achieved the maximum execution time
-                current_time += milliseconds_per_iteration
-                if current_time >= max_time_milliseconds:
-                    break                
-
-                # Calculate the next position of the mobile device
-                pos_x, pos_y, angle = position_simulator_module.calculate_position(current_time=current_time, milliseconds_per_iteration=milliseconds_per_iteration,
-                                                                                    last_angle=angle, last_x=pos_x, last_y=pos_y, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, speed=speed)
-                pos_x = round(pos_x,
-                                ndigits=self.position_rounding)
-                pos_y = round(pos_y,
-                                ndigits=self.position_rounding)
-                
+            for output, columns in stream:
+                if output != 'segments':
+                    yield output, columns
+                    continue
+                shard_blocks.append(columns)
+                # Submit the shard once its trajectory is complete
+                if len(results) < len(shard_sizes) and len(shard_blocks) == shard_sizes[len(results)][1]:
+                    shard = shard_sizes[len(results)][0]
+                    shard_name = os.path.join(self.output_dir, f"{output_prefix}_rssi_shard{shard:04d}")
+                    # The writers of every format add the name of the format as extension
+                    shard_files.append(f"{shard_name}.{self.config.output_format}")
+                    task = (self.config, self.station_table, self.output_dir, shard_name, shard_blocks, shard_streams[shard], random_streams.schedule_seed)
+                    results.append(executor.submit(_run_shard, task) if executor is not None else _run_shard(task))
+                    shard_blocks = []
+            metrics.lap('trajectory')
+
+            for result in results:
+                filename, counters = result.result() if executor is not None else result
+                for counter, value in counters.items():
+                    metrics.count(counter, value)
+                metrics.lap('rssi')
+                yield 'rssi_shard', filename
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _simulate_shard(self, shard_name: str, blocks: list, random_streams: RandomStreams, schedule_seed: int) -> tuple:
+        """
+        Generates the RSSI output of a time shard, it is executed in the worker processes.
+
+        Args:
+            shard_name (str): The name of the output file of the shard, without extension.
+            blocks (list): The start time, end time and trajectory segments of each device of every block of the shard.
+            random_streams (RandomStreams): The random streams of the shard.
+            schedule_seed (int): The seed of the clock jitter of the stations, the same one in every shard.
+
+        Returns:
+            tuple: The name of the output file of the shard and the counters of its metrics.
+        """
+        metrics = SimulationMetrics(enabled=self.config.metrics)
+        metrics.start()
+        milliseconds_per_iteration = self._milliseconds_per_iteration()
+        rssi_simulator_module = self._create_rssi_simulator(random_streams)
+
+        rssi_columns, _ = self._output_columns()
+        # The shard files are temporary, they are not compressed
+        rssi_writer = OutputWriterFactory.create_writer(self.config.output_format, shard_name, rssi_columns,
+                                                        row_group_size=self.config.output_row_group_size, buffer_bytes=self.config.output_buffer_bytes,
+                                                        compression=False)
+        try:
+            for block_start_time, block_end_time, segments in blocks:
+                event_timestamps, event_stations = transmission_events(self.station_table, block_start_time, block_end_time, milliseconds_per_iteration, schedule_seed)
+                if len(event_timestamps):
+                    event_xs, event_ys = self._event_positions(segments, event_timestamps, block_start_time, milliseconds_per_iteration)
+                    rssi_rows = self._rssi_rows(rssi_simulator_module, event_timestamps, event_stations, event_xs, event_ys, milliseconds_per_iteration, metrics)
+                    rssi_writer.write_columns(self._with_initial_position('rssi', rssi_rows))
         finally:
-            # Close the output file writers
             rssi_writer.close()
-            trajectory_writer.close()
+        return (rssi_writer.filename, metrics.counters)
+
+    def _stream(self, metrics: SimulationMetrics, trajectory: bool, resume_state: dict = None, checkpoint=None, rssi: bool = True):
+        """
+        Generates the output of the simulation, one block of iterations at a time.
+
+        This method initializes the main variables and simulator modules, and runs the main loop of the simulation,
+        yielding the rows of each block as columns. The simulation only advances when the next rows are requested.
+        Each block composes the trajectory of the block (_trajectory_block), its trajectory rows (_block_trajectory_rows),
+        the positions and RSSI of its transmissions (_event_positions, _rssi_rows) and the checkpoint hook (_loop_state).
+
+        Args:
+            metrics (SimulationMetrics): The metrics of the run, the consumer adds the time of the output phase.
+            trajectory (bool): Indicates if the trajectory rows are generated.
+            resume_state (dict, optional): The state of the simulation saved by a checkpoint, the simulation continues from it. Defaults to None.
+            checkpoint (callable, optional): Called at the end of every block, once the consumer has received all its rows,
+                with a function returning the state of the simulation. Defaults to None.
+            rssi (bool, optional): Indicates if the RSSI rows are generated. Otherwise, the trajectory of each block is
+                yielded as segments, so the RSSI values can be generated elsewhere. Defaults to True.
+
+        Yields:
+            tuple: The output of the rows, "rssi" or "trajectory", and the list with the arrays of their columns. Without
+                RSSI, "segments" and the start time, end time and trajectory segments of each device of every block.
+
+        Raises:
+            ValueError: If the RSSI rows are not generated and the trajectory is not generated as segments.
+        """
+        #region Variables initialization
+
+        # Initialize main variables
+        max_time_milliseconds = self.config.simulation_duration_seconds * 1000
+        current_time = 0
+        iteration = 0
+        milliseconds_per_iteration = self._milliseconds_per_iteration()
+        devices = self.config.devices
+
+        # Initialize simulators modules, each one with its own random streams
+        random_streams = RandomStreams(self.config.seed, self.config.seed_spawn_key)
+        position_simulator_modules = self._create_trajectory_simulators(random_streams)
+        rssi_simulator_module = self._create_rssi_simulator(random_streams)
+
+        # State of each device, the first one starts at the configured position and the others at random ones
+        positions = self._initial_states(devices, random_streams.scenario, *self._bounds())
+
+        # Initialize the trajectory output samplers, by default every position is written
+        trajectory_samplers = [TrajectorySampler(**self.config.trajectory_sampling) for _ in range(devices)] if self.config.trajectory_sampling else None
+
+        # Simulators generating segments skip the positions that are neither transmissions nor written to the trajectory output
+        use_segments = position_simulator_modules[0].supports_segments and (
+            not trajectory or (trajectory_samplers is not None and not trajectory_samplers[0].needs_every_position))
+
+        # Without segments the positions of every device are kept for the whole block, so the blocks are shorter with
+        # several devices, but long enough to amortize the per device calls
+        iterations_per_block = self.iterations_per_block
+        if devices > 1 and not use_segments:
+            iterations_per_block = max(self.MIN_ITERATIONS_PER_BLOCK, iterations_per_block // devices)
+        if not rssi and not use_segments:
+            raise ValueError("Generating the RSSI values apart requires a trajectory simulator generating segments, and the trajectory "
+                             "output disabled or sampled in a mode that does not need every position.")
+
+        # Initialize the transmissions scheduler
+        # The transmissions keep their exact timestamps, also between two iterations
+        scheduler = StationScheduler(self.station_table, milliseconds_per_iteration, seed=random_streams.schedule_seed)
+        loop_objects = (scheduler, position_simulator_modules, rssi_simulator_module, trajectory_samplers)
+
+        # Continue the interrupted run
+        if resume_state is not None:
+            current_time, iteration, positions = self._restore_loop_state(resume_state, *loop_objects)
+        metrics.lap('setup')
 
         #endregion
 
-        # Plot the trajectory data
-        if self.config.output_trajectory:
-            self._plot_trajectory(trajectory_csv_file=trajectory_writer.filename, dim_x=dim_x, dim_y=dim_y, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, output_name=f'{output_prefix}_trajectory_plot')
-    
+        #region main loop
+
+        # Main loop, the trajectory is generated in blocks of iterations
+        while current_time < max_time_milliseconds:
+            block_iterations = min(iterations_per_block, math.ceil((max_time_milliseconds - current_time) / milliseconds_per_iteration))
+            block_end_time = current_time + block_iterations * milliseconds_per_iteration
+
+            block = self._trajectory_block(position_simulator_modules, positions, current_time, block_iterations, use_segments,
+                                           last_block=block_end_time >= max_time_milliseconds)
+            metrics.lap('trajectory')
+
+            # Generate the positions of the block for the trajectory output, or only the sampled ones
+            if trajectory:
+                trajectory_rows = self._block_trajectory_rows(block, trajectory_samplers, current_time, iteration, block_iterations)
+                metrics.count('trajectory_rows', len(trajectory_rows[0]))
+                yield 'trajectory', trajectory_rows
+            iteration += block_iterations
+            metrics.count('iterations', block_iterations)
+            metrics.count('blocks')
+
+            if not rssi:
+                yield 'segments', (current_time, block_end_time, block)
+                current_time = block_end_time
+                continue
+
+            # Generate the RSSI values of all the transmissions of the block at once
+            event_timestamps, event_stations = scheduler.pop_event_arrays(current_time, block_end_time)
+            metrics.lap('scheduling')
+            if len(event_timestamps):
+                event_xs, event_ys = self._event_positions(block, event_timestamps, current_time, milliseconds_per_iteration)
+                yield 'rssi', self._rssi_rows(rssi_simulator_module, event_timestamps, event_stations, event_xs, event_ys, milliseconds_per_iteration, metrics)
+
+            current_time = block_end_time
+            if checkpoint is not None:
+                checkpoint(lambda: self._loop_state(current_time, iteration, positions, *loop_objects))
+
+        # The last position closes the sampled trajectory
+        if trajectory_samplers is not None and trajectory:
+            for last_row in self._closing_trajectory_rows(trajectory_samplers):
+                metrics.count('trajectory_rows')
+                yield 'trajectory', last_row
+
+        #endregion
+
+    def _create_trajectory_simulators(self, random_streams: RandomStreams) -> list:
+        """
+        Create the trajectory simulator of every device. The first one draws from the trajectory stream and the others
+        from child streams.
+
+        Args:
+            random_streams (RandomStreams): The random streams of the simulation.
+
+        Returns:
+            list: The trajectory simulator of each device.
+        """
+        devices = self.config.devices
+        return [
+            TrajectoryFactory.create_trajectory_simulator(
+                self.config.trajectory_simulator_module,
+                self.config.trajectory_simulator_module_parameters,
+                rng=streams.trajectory)
+            for streams in [random_streams] + (random_streams.spawn(devices - 1) if devices > 1 else [])]
+
+    def _create_rssi_simulator(self, random_streams: RandomStreams):
+        """
+        Create the RSSI simulator, prepared for the stations and the room.
+
+        Args:
+            random_streams (RandomStreams): The random streams of the simulation, or of a time shard.
+
+        Returns:
+            RssiInterface: The RSSI simulator.
+        """
+        rssi_simulator_module = RssiFactory.create_rssi_simulator(
+            self.config.rssi_simulator_module,
+            self.config.rssi_simulator_module_parameters,
+            noise_rng=random_streams.rssi_noise,
+            loss_rng=random_streams.packet_loss)
+        rssi_simulator_module.prepare(self.station_table, self.config.room_dim_meters['x'], self.config.room_dim_meters['y'])
+        return rssi_simulator_module
+
+    def _bounds(self) -> tuple:
+        """
+        Calculate the area where the devices move, the room without its margins.
 
-    def _plot_trajectory(self, trajectory_csv_file: str, dim_x: float, dim_y: float, min_x: float, max_x: float, min_y: float, max_y: float, output_name: str):
+        Returns:
+            tuple: The minimum and maximum x-coordinate and the minimum and maximum y-coordinate.
         """
-        Plot the trajectory of a mobile device in a given scenario.
+        dim_margins = self.config.margin_meters
+        return (dim_margins, self.config.room_dim_meters['x'] - dim_margins, dim_margins, self.config.room_dim_meters['y'] - dim_margins)
+
+    def _trajectory_block(self, position_simulator_modules: list, positions: tuple, current_time: int, block_iterations: int, use_segments: bool, last_block: bool):
+        """
+        Calculate the trajectory of every device in a block of iterations. The positions of the devices are moved to
+        the end of the block.
 
         Args:
-            trajectory_csv_file (str): The file path of the trajectory data in CSV format.
+            position_simulator_modules (list): The trajectory simulator of each device.
+            positions (tuple): The lists with the x-coordinate, y-coordinate and heading of each device, updated in place.
+            current_time (int): The time in milliseconds of the first iteration of the block.
+            block_iterations (int): The number of iterations of the block.
+            use_segments (bool): Indicates if the trajectory is generated as segments.
+            last_block (bool): Indicates if the simulation ends with this block.
+
+        Returns:
+            list | tuple: The trajectory segments of each device, or the (devices, iterations + 1) arrays with the
+                x-coordinates and y-coordinates from the start to the end of the block and the (devices, iterations) array
+                with the heading leaving each position.
+        """
+        milliseconds_per_iteration = self._milliseconds_per_iteration()
+        min_x, max_x, min_y, max_y = self._bounds()
+        speed = self.config.speed_meters_second
+        pos_xs, pos_ys, angles = positions
+
+        if use_segments:
+            # The trajectory of the block as segments, the positions are only evaluated where they are needed
+            segments = [module.calculate_segments(start_time=current_time, steps=block_iterations, milliseconds_per_iteration=milliseconds_per_iteration,
+                                                  last_angle=angles[device], last_x=pos_xs[device], last_y=pos_ys[device], min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, speed=speed)
+                        for device, module in enumerate(position_simulator_modules)]
+            for device, device_segments in enumerate(segments):
+                pos_xs[device], pos_ys[device], angles[device] = device_segments.end()
+            return segments
+
+        # Calculate the positions of the block, the current one is already known. The last calculated position
+        # opens the next block, so it is only required if the simulation continues after this block, or to
+        # interpolate the transmissions of the last iteration when the time step is longer than 1 ms
+        steps = block_iterations if not last_block or milliseconds_per_iteration > 1 else block_iterations - 1
+        # Positions from the start to the end of the block, both included
+        devices = len(position_simulator_modules)
+        block_xs = np.empty((devices, block_iterations + 1))
+        block_ys = np.empty((devices, block_iterations + 1))
+        block_headings = np.empty((devices, block_iterations))
+        for device, module in enumerate(position_simulator_modules):
+            next_xs, next_ys, next_angles = module.calculate_positions(start_time=current_time + milliseconds_per_iteration, steps=steps, milliseconds_per_iteration=milliseconds_per_iteration,
+                                                                       last_angle=angles[device], last_x=pos_xs[device], last_y=pos_ys[device], min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, speed=speed)
+            # Without the end of the block, the last position is kept, it is never interpolated with a 1 ms step
+            block_xs[device] = np.round(np.concatenate(([pos_xs[device]], next_xs, next_xs[-1:] if steps < block_iterations else [])), decimals=self.position_rounding)
+            block_ys[device] = np.round(np.concatenate(([pos_ys[device]], next_ys, next_ys[-1:] if steps < block_iterations else [])), decimals=self.position_rounding)
+            # Heading leaving each position, the last position of the simulation keeps its heading
+            block_headings[device] = np.concatenate((next_angles, [next_angles[-1] if steps else angles[device]]))[:block_iterations]
+            if steps == block_iterations:
+                pos_xs[device], pos_ys[device], angles[device] = next_xs[-1], next_ys[-1], next_angles[-1]
+        return (block_xs, block_ys, block_headings)
+
+    def _block_trajectory_rows(self, block, trajectory_samplers: list, current_time: int, iteration: int, block_iterations: int) -> list:
+        """
+        Calculate the trajectory rows of a block, every position or only the sampled ones.
+
+        Args:
+            block (list | tuple): The trajectory of the block, as returned by _trajectory_block.
+            trajectory_samplers (list): The trajectory sampler of each device, None to write every position.
+            current_time (int): The time in milliseconds of the first iteration of the block.
+            iteration (int): The number of iterations before the block.
+            block_iterations (int): The number of iterations of the block.
+
+        Returns:
+            list: The columns of the trajectory output.
+        """
+        milliseconds_per_iteration = self._milliseconds_per_iteration()
+        rows = []
+        for device in range(self.config.devices):
+            if isinstance(block, list):
+                block_times = trajectory_samplers[device].candidate_times(current_time, block_iterations, milliseconds_per_iteration, block[device].start_time)
+                block_steps = iteration + 1 + (block_times - current_time) // milliseconds_per_iteration
+                sample_xs, sample_ys, sample_headings = block[device].evaluate(block_times, leaving=True)
+                sample_xs = np.round(sample_xs, decimals=self.position_rounding)
+                sample_ys = np.round(sample_ys, decimals=self.position_rounding)
+            else:
+                block_xs, block_ys, block_headings = block
+                block_steps = np.arange(iteration + 1, iteration + block_iterations + 1)
+                block_times = current_time + np.arange(block_iterations) * milliseconds_per_iteration
+                sample_xs, sample_ys, sample_headings = block_xs[device, :block_iterations], block_ys[device, :block_iterations], block_headings[device]
+            if trajectory_samplers is not None:
+                sampled = trajectory_samplers[device].sample(block_steps, block_times, sample_xs, sample_ys, sample_headings)
+                block_steps, block_times, sample_xs, sample_ys = block_steps[sampled], block_times[sampled], sample_xs[sampled], sample_ys[sampled]
+            rows.append((block_steps, block_times, sample_xs, sample_ys))
+        return self._trajectory_rows(rows, self.config.devices > 1)
+
+    def _closing_trajectory_rows(self, trajectory_samplers: list) -> list:
+        """
+        Calculate the rows that close the sampled trajectory, the last position of each device if it was not sampled.
+
+        Args:
+            trajectory_samplers (list): The trajectory sampler of each device.
+
+        Returns:
+            list: The columns of the trajectory output of each closing row.
+        """
+        last_rows = []
+        for device, trajectory_sampler in enumerate(trajectory_samplers):
+            last_point = trajectory_sampler.finish()
+            if last_point is not None:
+                last_step, last_time, last_x, last_y = last_point
+                last_row = [np.array([last_step], dtype=np.int64), np.array([last_time], dtype=np.float64)/1000, np.array([last_x]), np.array([last_y])]
+                if self.config.devices > 1:
+                    last_row.insert(2, np.array([device], dtype=np.int32))
+                last_rows.append(last_row)
+        return last_rows
+
+    def _event_positions(self, block, event_timestamps: np.ndarray, current_time: int, milliseconds_per_iteration: int) -> tuple:
+        """
+        Calculate the position of every device at every transmission of a block.
+
+        Args:
+            block (list | tuple): The trajectory of the block, as returned by _trajectory_block.
+            event_timestamps (np.ndarray): The timestamp in milliseconds of each transmission.
+            current_time (int): The time in milliseconds of the first iteration of the block.
+            milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+
+        Returns:
+            tuple: The (devices, transmissions) arrays with the x-coordinates and y-coordinates.
+        """
+        if isinstance(block, list):
+            event_xs, event_ys, _ = TrajectorySegments.evaluate_many(block, event_timestamps)
+        else:
+            # Linear interpolation between the iterations before and after each transmission
+            block_xs, block_ys, _ = block
+            event_offsets = event_timestamps - current_time
+            event_block_indexes = event_offsets // milliseconds_per_iteration
+            event_fractions = (event_offsets - event_block_indexes * milliseconds_per_iteration) / milliseconds_per_iteration
+            event_xs = block_xs[:, event_block_indexes] + (block_xs[:, event_block_indexes + 1] - block_xs[:, event_block_indexes]) * event_fractions
+            event_ys = block_ys[:, event_block_indexes] + (block_ys[:, event_block_indexes + 1] - block_ys[:, event_block_indexes]) * event_fractions
+        return (np.round(event_xs, decimals=self.position_rounding), np.round(event_ys, decimals=self.position_rounding))
+
+    def _loop_state(self, current_time: int, iteration: int, positions: tuple, scheduler: StationScheduler, position_simulator_modules: list,
+                    rssi_simulator_module, trajectory_samplers: list) -> dict:
+        """
+        Describe everything the main loop keeps between two blocks, the state of the simulation saved by a checkpoint.
+
+        Args:
+            current_time (int): The time in milliseconds of the next block.
+            iteration (int): The number of iterations before the next block.
+            positions (tuple): The lists with the x-coordinate, y-coordinate and heading of each device.
+            scheduler (StationScheduler): The transmissions scheduler.
+            position_simulator_modules (list): The trajectory simulator of each device.
+            rssi_simulator_module (RssiInterface): The RSSI simulator.
+            trajectory_samplers (list): The trajectory sampler of each device, or None.
+
+        Returns:
+            dict: The state of the simulation.
+        """
+        return {
+            'current_time': int(current_time),
+            'iteration': int(iteration),
+            'positions': np.array(positions, dtype=np.float64),
+            'stations': self.station_table.get_state(),
+            'scheduler': scheduler.get_state(),
+            'trajectory_simulators': [module.get_state() for module in position_simulator_modules],
+            'rssi_simulator': rssi_simulator_module.get_state(),
+            'samplers': [sampler.get_state() for sampler in trajectory_samplers] if trajectory_samplers is not None else None,
+        }
+
+    def _restore_loop_state(self, state: dict, scheduler: StationScheduler, position_simulator_modules: list, rssi_simulator_module, trajectory_samplers: list) -> tuple:
+        """
+        Restore the state of the simulation returned by _loop_state, so the main loop continues the interrupted run.
+
+        Args:
+            state (dict): The state of the simulation.
+            scheduler (StationScheduler): The transmissions scheduler.
+            position_simulator_modules (list): The trajectory simulator of each device.
+            rssi_simulator_module (RssiInterface): The RSSI simulator.
+            trajectory_samplers (list): The trajectory sampler of each device, or None.
+
+        Returns:
+            tuple: The time in milliseconds and the number of iterations of the next block, and the lists with the
+                x-coordinate, y-coordinate and heading of each device.
+        """
+        self.station_table.set_state(state['stations'])
+        scheduler.set_state(state['scheduler'])
+        for module, module_state in zip(position_simulator_modules, state['trajectory_simulators']):
+            module.set_state(module_state)
+        rssi_simulator_module.set_state(state['rssi_simulator'])
+        if trajectory_samplers is not None:
+            for trajectory_sampler, sampler_state in zip(trajectory_samplers, state['samplers']):
+                trajectory_sampler.set_state(sampler_state)
+        return (state['current_time'], state['iteration'], tuple(values.tolist() for values in state['positions']))
+
+    def _milliseconds_per_iteration(self) -> int:
+        """
+        Calculate the time step of the simulation. With the "auto" option, it is a tenth of the shortest transmission
+        period of the stations, so the trajectory is updated at least ten times between two transmissions of any station.
+
+        Returns:
+            int: The time elapsed per iteration in milliseconds.
+        """
+        if self.config.milliseconds_per_iteration != 'auto':
+            return self.config.milliseconds_per_iteration
+        frequencies = self.station_table.frequency[self.station_table.frequency > 0]
+        if not len(frequencies):
+            return 1
+        return max(1, int(frequencies.min()) // self.AUTO_STEP_DIVISOR)
+
+    def _initial_states(self, devices: int, rng: np.random.Generator, min_x: float, max_x: float, min_y: float, max_y: float) -> tuple:
+        """
+        Calculate the initial position and heading of each device. The first device starts at the configured position and
+        angle, the others at uniformly random positions inside the margins and random headings.
+
+        Args:
+            devices (int): The number of devices.
+            rng (np.random.Generator): The random generator of the scenario.
+            min_x (float): The minimum value of the X-axis range.
+            max_x (float): The maximum value of the X-axis range.
+            min_y (float): The minimum value of the Y-axis range.
+            max_y (float): The maximum value of the Y-axis range.
+
+        Returns:
+            tuple: Three lists with the x-coordinate, y-coordinate and heading in radians of each device.
+        """
+        pos_xs = [round(self.config.initial_position['x'], ndigits=self.position_rounding)]
+        pos_ys = [round(self.config.initial_position['y'], ndigits=self.position_rounding)]
+        angles = [math.radians(self.config.initial_angle_degrees)]
+        if devices > 1:
+            pos_xs += np.round(rng.uniform(min_x, max_x, devices - 1), decimals=self.position_rounding).tolist()
+            pos_ys += np.round(rng.uniform(min_y, max_y, devices - 1), decimals=self.position_rounding).tolist()
+            angles += rng.uniform(0, 2 * math.pi, devices - 1).tolist()
+        return (pos_xs, pos_ys, angles)
+
+    def _output_columns(self) -> tuple:
+        """
+        Calculate the columns of the outputs, several devices add the device of each row.
+
+        Returns:
+            tuple: The name and type of the columns of the RSSI output and of the trajectory output.
+        """
+        rssi_columns, trajectory_columns = self.RSSI_COLUMNS, self.TRAJECTORY_COLUMNS
+        if self.config.devices > 1:
+            rssi_columns = rssi_columns[:1] + [self.DEVICE_COLUMN] + rssi_columns[1:]
+            trajectory_columns = trajectory_columns[:2] + [self.DEVICE_COLUMN] + trajectory_columns[2:]
+        return (rssi_columns, trajectory_columns)
+
+    def _records_dtype(self, columns: list) -> np.dtype:
+        """
+        Calculate the type of the records of an output, the dictionary columns hold the MAC addresses as strings.
+
+        Args:
+            columns (list): The name and type of the columns of the output.
+
+        Returns:
+            np.dtype: The structured type of the records.
+        """
+        return np.dtype([(name, self.station_table.mac.dtype if column_type == 'dictionary' else column_type) for name, column_type in columns])
+
+    def _rssi_rows(self, rssi_simulator_module, event_timestamps: np.ndarray, event_stations: np.ndarray, event_xs: np.ndarray, event_ys: np.ndarray,
+                   milliseconds_per_iteration: int, metrics: SimulationMetrics) -> list:
+        """
+        Calculate the RSSI of a block of transmissions, every transmission is received by every device.
+
+        Args:
+            rssi_simulator_module (RssiInterface): The RSSI simulator.
+            event_timestamps (np.ndarray): The timestamp in milliseconds of each transmission.
+            event_stations (np.ndarray): The station index of each transmission.
+            event_xs (np.ndarray): The x-coordinate of every device at every transmission, a (devices, transmissions) array.
+            event_ys (np.ndarray): The y-coordinate of every device at every transmission, a (devices, transmissions) array.
+            milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+            metrics (SimulationMetrics): The metrics of the run.
+
+        Returns:
+            list: The columns of the RSSI output with the received packages, ordered by time and device.
+        """
+        devices = len(event_xs)
+        if devices > 1:
+            event_timestamps = np.repeat(event_timestamps, devices)
+            event_stations = np.repeat(event_stations, devices)
+        event_xs = event_xs.T.ravel()
+        event_ys = event_ys.T.ravel()
+        rssi_values, rssi_status = rssi_simulator_module.calculate_rssi_batch(
+            stations=self.station_table, station_indices=event_stations, timestamps=event_timestamps, milliseconds_per_iteration=milliseconds_per_iteration,
+            positions_x=event_xs, positions_y=event_ys, speed=self.config.speed_meters_second)
+        # Keep the valid RSSI values
+        received = rssi_status == rssi_simulator_module.RECEIVED
+        if metrics.enabled:
+            metrics.count('packets_emitted', len(event_timestamps))
+            metrics.count('packets_received', np.count_nonzero(received))
+            metrics.count('packets_dropped', np.count_nonzero(rssi_status == rssi_simulator_module.DROPPED))
+            metrics.count('packets_below_threshold', np.count_nonzero(rssi_status == rssi_simulator_module.BELOW_THRESHOLD))
+        metrics.lap('rssi')
+        rssi_rows = [event_timestamps[received]/1000, event_xs[received], event_ys[received], self.station_table.mac[event_stations[received]], rssi_values[received]]
+        if devices > 1:
+            rssi_rows.insert(1, np.tile(np.arange(devices, dtype=np.int32), len(received) // devices)[received])
+        metrics.count('rssi_rows', np.count_nonzero(received) if metrics.enabled else 0)
+        return rssi_rows
+
+    def _with_initial_position(self, output: str, columns: list) -> list:
+        """
+        Keep the type of the configured initial position in the rows of the first device at time 0 of the CSV output,
+        so an integer initial_position is written as 2 and not as 2.0, like the csv module writes the configuration value.
+
+        Args:
+            output (str): The output of the rows, "rssi" or "trajectory".
+            columns (list): The columns of the rows.
+
+        Returns:
+            list: The columns, with the positions as lists holding the configured values when the rows include time 0.
+        """
+        initial_x = round(self.config.initial_position['x'], ndigits=self.position_rounding)
+        initial_y = round(self.config.initial_position['y'], ndigits=self.position_rounding)
+        timestamp_index = 0 if output == 'rssi' else 1
+        if self.config.output_format != 'csv' or (isinstance(initial_x, float) and isinstance(initial_y, float)) or \
+                not len(columns[timestamp_index]) or columns[timestamp_index][0] != 0:
+            return columns
+        multi_device = self.config.devices > 1
+        x_index = timestamp_index + (2 if multi_device else 1)
+        initial = columns[timestamp_index] == 0
+        if multi_device:
+            initial &= columns[timestamp_index + 1] == 0
+        xs, ys = columns[x_index].tolist(), columns[x_index + 1].tolist()
+        for row in np.flatnonzero(initial).tolist():
+            xs[row], ys[row] = initial_x, initial_y
+        return columns[:x_index] + [xs, ys] + columns[x_index + 2:]
+
+    def _checkpoint_run(self) -> dict:
+        """
+        Describe the simulation a checkpoint belongs to, a simulation is only resumed from the checkpoints of the same one.
+        The duration is not included, so an interrupted simulation can be resumed with a longer one.
+
+        Returns:
+            dict: The parameters that define the state and the output files of the simulation.
+        """
+        return {
+            'devices': self.config.devices,
+            'stations': self.station_table.mac.tolist(),
+            'milliseconds_per_iteration': self._milliseconds_per_iteration(),
+            'trajectory_simulator': self.config.trajectory_simulator_module,
+            'rssi_simulator': self.config.rssi_simulator_module,
+            'output_format': self.config.output_format,
+            'output_trajectory': self.config.output_trajectory,
+            'trajectory_sampling': self.config.trajectory_sampling,
+        }
+
+    @staticmethod
+    def _trajectory_rows(rows: list, multi_device: bool) -> list:
+        """
+        Join the trajectory rows of the devices in a block, ordered by time and device.
+
+        Args:
+            rows (list): The steps, timestamps in milliseconds, x-coordinates and y-coordinates of the rows of each device.
+            multi_device (bool): Indicates if several devices are simulated, adding the device column.
+
+        Returns:
+            list: The columns of the trajectory output.
+        """
+        if not multi_device:
+            block_steps, block_times, sample_xs, sample_ys = rows[0]
+            return [block_steps, block_times/1000, sample_xs, sample_ys]
+        block_steps, block_times, sample_xs, sample_ys = (np.concatenate(column) for column in zip(*rows))
+        block_devices = np.repeat(np.arange(len(rows), dtype=np.int32), [len(device_rows[0]) for device_rows in rows])
+        order = np.argsort(block_times, kind='stable')
+        return [block_steps[order], block_times[order]/1000, block_devices[order], sample_xs[order], sample_ys[order]]
+
+    def _plot_trajectory(self, trajectory_plotter: TrajectoryPlotter, dim_x: float, dim_y: float, min_x: float, max_x: float, min_y: float, max_y: float, output_name: str):
+        """
+        Plot the trajectory of a mobile device in a given scenario, from the points collected during the simulation.
+
+        Args:
+            trajectory_plotter (TrajectoryPlotter): The plotter with the decimated trajectory.
             dim_x (float): The dimension of the scenario in the X-axis.
             dim_y (float): The dimension of the scenario in the Y-axis.
             min_x (float): The minimum value of the X-axis range.
             max_x (float): The maximum value of the X-axis range.
             min_y (float): The minimum value of the Y-axis range.
             max_y (float): The maximum value of the Y-axis range.
-            output_name (str): The name of the output file.
+            output_name (str): The name of the output file, without extension.
 
         Returns:
             None
         """
-        import matplotlib.pyplot as plt
-        import pandas as pd
-
-        # Load the trajectory data file
-        trajectory_data = pd.read_csv(trajectory_csv_file)
-
-        # Plot the scenario
-        plt.figure(figsize=(10, 10))
-        # Draw the room and margins
-        plt.plot([0, dim_y,  dim_y, 0, 0], [
-                 0, 0, dim_x, dim_x, 0], 'k-', label='Room')
-        plt.plot([min_y, max_y, max_y, min_y, min_y], [
-            min_x, min_x, max_x, max_x, min_x], 'g-', label='Margins')
-        # Draw the trajectory
-        plt.plot(trajectory_data['position_y'],
-                 trajectory_data['position_x'], 'b-')
-        plt.scatter(trajectory_data['position_y'], trajectory_data['position_x'],
-                    c=trajectory_data['timestamp']/1000, cmap='viridis')
-        plt.colorbar(label='Time (sec.)')
-        plt.xlabel('Y (m)')
-        plt.ylabel('X (m)')
-        plt.title('Mobile device Trajectory')
-        plt.grid(True)
-
-        # Draw the stations
-        for station in self.stations:
-            plt.plot(station.y, station.x, 'ro', label=f"Station {station.mac}")
-
-        # Invert Y axis
-        plt.gca().invert_yaxis()
-
-        # Save as PNG and EPS
-        plt.savefig(os.path.join(self.output_dir, f"{output_name}.png"))
-        plt.savefig(os.path.join(self.output_dir, f"{output_name}.eps"))
+        trajectory_plotter.plot(os.path.join(self.output_dir, output_name), self.stations, dim_x=dim_x, dim_y=dim_y, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y)
+
+
+def _run_shard(task: tuple) -> tuple:
+    """
+    Generates the RSSI output of a time shard of a simulation, it is executed in the worker processes.
+
+    Args:
+        task (tuple): The configuration, stations and output directory of the simulation, and the file name, blocks and
+            random streams of the shard and the seed of the clock jitter, as built by Simulation._sharded_stream.
+
+    Returns:
+        tuple: The name of the output file of the shard and the counters of its metrics.
+    """
+    config, station_table, output_dir, shard_name, blocks, random_streams, schedule_seed = task
+    return Simulation(config, station_table, output_dir)._simulate_shard(shard_name, blocks, random_streams, schedule_seed)
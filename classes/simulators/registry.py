@@ -0,0 +1,150 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import inspect
+from typing import Union
+
+
+class SimulatorRegistry:
+    """
+    Registry of the simulators implementing an interface, loaded lazily by name.
+
+    The simulators are registered as "module:Class" references, so their modules are only imported when a simulation
+    uses them, and the loaded classes are cached. Besides the built-in simulators, other packages can provide simulators
+    through the entry point group of the registry, for example in their pyproject.toml:
+
+        [project.entry-points."indoor_positioning_simulator.rssi"]
+        mymodel = "mypackage.mymodel:MyRssiModel"
+
+    Attributes:
+        kind (str): The kind of simulators, used in the entry point group.
+        label (str): The name of the kind of simulators in the error messages.
+        interface (type): The interface implemented by the simulators.
+        entry_point_group (str): The entry point group searched for plugins.
+    """
+
+    ENTRY_POINT_PREFIX = 'indoor_positioning_simulator'
+
+    def __init__(self, kind: str, interface: type, builtins: dict, label: str = None):
+        """
+        Initializes a new instance of the SimulatorRegistry class.
+
+        Args:
+            kind (str): The kind of simulators, e.g. 'trajectory' or 'rssi'.
+            interface (type): The interface implemented by the simulators.
+            builtins (dict): The built-in simulators, name -> "module:Class" reference.
+            label (str, optional): The name of the kind of simulators in the error messages. Defaults to the capitalized kind.
+        """
+        self.kind = kind
+        self.label = label if label is not None else kind.capitalize()
+        self.interface = interface
+        self.entry_point_group = f"{self.ENTRY_POINT_PREFIX}.{kind}"
+        self._references = dict(builtins)
+        self._classes = {}
+        self._entry_points_loaded = False
+
+    def register(self, name: str, simulator: Union[type, str]):
+        """
+        Registers a simulator, replacing any other one with the same name.
+
+        Args:
+            name (str): The name used in the configuration to select the simulator.
+            simulator (type | str): The simulator class or its "module:Class" reference, imported when first used.
+        """
+        self._references[name] = simulator
+        self._classes.pop(name, None)
+
+    def names(self) -> list:
+        """
+        Returns the names of the available simulators, including the entry point plugins.
+        """
+        self._load_entry_points()
+        return list(self._references)
+
+    def __contains__(self, name: str) -> bool:
+        # The installed packages are only scanned for names that are not built-in or registered
+        if name not in self._references:
+            self._load_entry_points()
+        return name in self._references
+
+    def load(self, name: str) -> type:
+        """
+        Returns the class of a simulator, importing its module the first time.
+
+        Args:
+            name (str): The name of the simulator.
+
+        Returns:
+            type: The simulator class.
+
+        Raises:
+            ValueError: If the simulator is not available or does not implement the interface of the registry.
+        """
+        simulator = self._classes.get(name, None)
+        if simulator is not None:
+            return simulator
+        if name not in self:
+            raise ValueError(f"{self.label} simulator {name} not available.")
+
+        simulator = self._references[name]
+        if isinstance(simulator, str):
+            module_name, _, class_name = simulator.partition(':')
+            simulator = getattr(importlib.import_module(module_name), class_name)
+        elif not isinstance(simulator, type) and callable(getattr(simulator, 'load', None)):
+            # Entry point, resolved on first use
+            simulator = simulator.load()
+        if not isinstance(simulator, type) or not issubclass(simulator, self.interface):
+            raise ValueError(f"Simulator {name} does not implement {self.interface.__name__}.")
+        self._classes[name] = simulator
+        return simulator
+
+    def create(self, name: str, constructor_params: dict = None, **injected):
+        """
+        Creates an instance of a simulator.
+
+        The injected objects are passed to the constructor when it accepts them, as a parameter with the same name or
+        through **kwargs. Otherwise they are set as attributes of the instance after its construction, unless it
+        already has an attribute with that name or the object is None.
+
+        Args:
+            name (str): The name of the simulator.
+            constructor_params (dict, optional): The parameters of the simulator from the configuration.
+            **injected: The objects injected by the engine, such as the random generators.
+
+        Returns:
+            The simulator instance.
+        """
+        simulator = self.load(name)
+        parameters = inspect.signature(simulator).parameters
+        accepts_any = any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values())
+        accepted = {key: value for key, value in injected.items() if accepts_any or key in parameters}
+        instance = simulator(**(constructor_params or {}), **accepted)
+        for key, value in injected.items():
+            if key not in accepted and value is not None and not hasattr(instance, key):
+                setattr(instance, key, value)
+        return instance
+
+    def _load_entry_points(self):
+        """
+        Adds the simulators published in the entry point group, without importing them. The built-in and explicitly
+        registered simulators take precedence over the plugins with the same name.
+        """
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        # Scanning the installed packages is slow, it is only done when a plugin may be needed
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=self.entry_point_group):
+            self._references.setdefault(entry_point.name, entry_point)
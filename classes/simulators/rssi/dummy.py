@@ -14,13 +14,21 @@
 
 from classes.simulators.rssi.interface import RssiInterface
 from classes.models.station import Station
-import random
+import numpy as np
 
 class DummyRssiModule(RssiInterface):
     """
     DummyRssiModule is a class that implements the RssiInterface to simulate RSSI (Received Signal Strength Indicator) values.
     """
 
+    def __init__(self, noise_rng: np.random.Generator = None, loss_rng: np.random.Generator = None):
+        """
+        Args:
+            noise_rng (np.random.Generator, optional): The random generator of the RSSI values. Defaults to a new generator seeded by the OS.
+            loss_rng (np.random.Generator, optional): Not used in this model.
+        """
+        self.noise_rng = noise_rng if noise_rng is not None else np.random.default_rng()
+
     def calculate_rssi(self, station: Station, current_time: int, milliseconds_per_iteration: int, current_x: float, current_y: float, speed: float) -> int:
         """
         Returns a random value between -100 and 0 as RSSI value.
@@ -36,4 +44,4 @@ class DummyRssiModule(RssiInterface):
         Returns:
             int: The calculated RSSI value, ranging from -100 to 0.
         """
-        return random.randint(-100, 0)
\ No newline at end of file
+        return int(self.noise_rng.integers(-100, 0, endpoint=True))
\ No newline at end of file
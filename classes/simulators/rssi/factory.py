@@ -12,21 +12,51 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from classes.simulators.registry import SimulatorRegistry
 from classes.simulators.rssi.interface import RssiInterface
+import numpy as np
 
 class RssiFactory:
     """
     A factory class for creating RSSI simulators.
+
+    The simulators are looked up by name in the registry, which holds the built-in simulators, the ones added with
+    register and the plugins published in the indoor_positioning_simulator.rssi entry point group.
     """
 
-    @staticmethod
-    def create_rssi_simulator(simulator_name: str, constructor_params: dict = {}) -> RssiInterface:
+    registry = SimulatorRegistry('rssi', RssiInterface, {
+        'dummy': 'classes.simulators.rssi.dummy:DummyRssiModule',
+        'logdistance': 'classes.simulators.rssi.logdistance:LogDistancePathLossModel',
+    }, label='RSSI')
+
+    @classmethod
+    def register(cls, simulator_name: str, simulator):
+        """
+        Registers an RSSI simulator.
+
+        Args:
+            simulator_name (str): The name used in the configuration to select the simulator.
+            simulator (type | str): The RssiInterface implementation or its "module:Class" reference.
+        """
+        cls.registry.register(simulator_name, simulator)
+
+    @classmethod
+    def available(cls) -> list:
+        """
+        Returns the names of the available RSSI simulators.
+        """
+        return cls.registry.names()
+
+    @classmethod
+    def create_rssi_simulator(cls, simulator_name: str, constructor_params: dict = {}, noise_rng: np.random.Generator = None, loss_rng: np.random.Generator = None) -> RssiInterface:
         """
         Creates an RSSI simulator based on the given simulator name.
 
         Args:
             simulator_name (str): The name of the simulator.
             constructor_params (dict): Optional dictionary of constructor parameters.
+            noise_rng (np.random.Generator): Optional random generator for the RSSI noise injected into the simulator.
+            loss_rng (np.random.Generator): Optional random generator for the missing packages injected into the simulator.
 
         Returns:
             RssiInterface: An instance of the RSSI simulator.
@@ -34,11 +64,4 @@ class RssiFactory:
         Raises:
             ValueError: If the simulator name is not available.
         """
-        if simulator_name == 'dummy':
-            from classes.simulators.rssi.dummy import DummyRssiModule
-            return DummyRssiModule(**constructor_params)
-        elif simulator_name == 'logdistance':
-            from classes.simulators.rssi.logdistance import LogDistancePathLossModel
-            return LogDistancePathLossModel(**constructor_params)
-        else:
-            raise ValueError(f"RSSI simulator {simulator_name} not available.")
+        return cls.registry.create(simulator_name, constructor_params, noise_rng=noise_rng, loss_rng=loss_rng)
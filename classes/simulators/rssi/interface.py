@@ -14,12 +14,58 @@
 
 from abc import ABC, abstractmethod
 from classes.models.station import Station
+from classes.models.stationtable import StationTable
+import numpy as np
 
 class RssiInterface(ABC):
     """
     RssiInterface is an abstract base class that defines the interface for calculating RSSI (Received Signal Strength Indicator).
+
+    Attributes:
+        RECEIVED (int): Status of a package whose RSSI was received.
+        DROPPED (int): Status of a package that was lost, so it has no RSSI value.
+        BELOW_THRESHOLD (int): Status of a package whose RSSI is lower than the receiver sensitivity.
     """
 
+    RECEIVED = 0
+    DROPPED = 1
+    BELOW_THRESHOLD = 2
+
+    def prepare(self, stations: StationTable, dim_x: float, dim_y: float):
+        """
+        Prepares the simulator for a simulation with the given stations and room, before any RSSI is calculated.
+
+        This default implementation does nothing, simulators can override it to precompute data of the scenario.
+
+        Args:
+            stations (StationTable): The stations of the simulation.
+            dim_x (float): The x dimension of the room in meters.
+            dim_y (float): The y dimension of the room in meters.
+        """
+        pass
+
+    def get_state(self) -> dict:
+        """
+        Returns the internal state of the simulator, so a simulation can continue from a checkpoint.
+
+        This default implementation returns the state of the random generators of the simulator, simulators keeping
+        other state between calls should extend it.
+
+        Returns:
+            dict: The state of the simulator, made of JSON serializable values.
+        """
+        return {'rngs': {name: value.bit_generator.state for name, value in vars(self).items() if isinstance(value, np.random.Generator)}}
+
+    def set_state(self, state: dict):
+        """
+        Restores the internal state of the simulator returned by get_state.
+
+        Args:
+            state (dict): The state of the simulator.
+        """
+        for name, generator_state in state['rngs'].items():
+            getattr(self, name).bit_generator.state = generator_state
+
     @abstractmethod
     def calculate_rssi(self, station: Station, current_time: int, milliseconds_per_iteration: int, current_x: float, current_y: float, speed: float) -> int:
         """
@@ -36,4 +82,61 @@ class RssiInterface(ABC):
         Returns:
             int: The calculated RSSI value.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def calculate_rssi_batch(self, stations: StationTable, station_indices: np.ndarray, timestamps: np.ndarray, milliseconds_per_iteration: int, positions_x: np.ndarray, positions_y: np.ndarray, speed: float) -> tuple:
+        """
+        Calculate the RSSI of a batch of packages at once.
+
+        Each package i is transmitted by the station station_indices[i] at timestamps[i] and received at (positions_x[i], positions_y[i]).
+        This default implementation calls calculate_rssi once per package, simulators able to process the whole batch at once should override it.
+
+        Args:
+            stations (StationTable): The stations of the simulation.
+            station_indices (np.ndarray): The row in the stations table of the transmitter of each package.
+            timestamps (np.ndarray): The time in milliseconds of each package.
+            milliseconds_per_iteration (int): The number of milliseconds per iteration in the simulation.
+            positions_x (np.ndarray): The x-coordinate of the receiver for each package.
+            positions_y (np.ndarray): The y-coordinate of the receiver for each package.
+            speed (float): The speed of the receiver.
+
+        Returns:
+            tuple: Two numpy arrays, the integer RSSI of each package and its status (RECEIVED, DROPPED or BELOW_THRESHOLD).
+                   The status is the mask of valid packages, the RSSI of the non received ones is meaningless.
+        """
+        station_views = stations.stations
+        size = len(station_indices)
+        rssi = np.zeros(size, dtype=np.int64)
+        status = np.full(size, self.DROPPED, dtype=np.int8)
+        for i in range(size):
+            value = self.calculate_rssi(station=station_views[station_indices[i]], current_time=timestamps[i], milliseconds_per_iteration=milliseconds_per_iteration,
+                                        current_x=positions_x[i], current_y=positions_y[i], speed=speed)
+            if value is not None:
+                rssi[i] = value
+                status[i] = self.RECEIVED
+        return (rssi, status)
+
+
+    def calculate_rssi_grid(self, stations: StationTable, positions_x: np.ndarray, positions_y: np.ndarray, samples: int) -> tuple:
+        """
+        Calculate several RSSI samples of every station at every given static position.
+
+        This default implementation flattens the grid into a batch of packages for calculate_rssi_batch, simulators able to
+        reuse the per position and station terms across the samples should override it.
+
+        Args:
+            stations (StationTable): The stations of the simulation.
+            positions_x (np.ndarray): The x-coordinate of each receiver position.
+            positions_y (np.ndarray): The y-coordinate of each receiver position.
+            samples (int): The number of samples of each station at each position.
+
+        Returns:
+            tuple: Two numpy arrays of shape (positions, stations, samples), the integer RSSI of each sample and its status
+                   (RECEIVED, DROPPED or BELOW_THRESHOLD).
+        """
+        shape = (len(positions_x), len(stations), samples)
+        station_indices = np.broadcast_to(np.arange(shape[1])[None, :, None], shape).ravel()
+        rssi, status = self.calculate_rssi_batch(stations=stations, station_indices=station_indices, timestamps=np.zeros(station_indices.size, dtype=np.int64), milliseconds_per_iteration=1,
+                                                 positions_x=np.broadcast_to(np.asarray(positions_x)[:, None, None], shape).ravel(),
+                                                 positions_y=np.broadcast_to(np.asarray(positions_y)[:, None, None], shape).ravel(), speed=0)
+        return (rssi.reshape(shape), status.reshape(shape))
@@ -15,15 +15,80 @@
 from classes.simulators.rssi.interface import RssiInterface
 from classes.models.station import Station
 from classes.lib.functionmodels import functionmodels
+from classes.lib.pathlosslookuptable import PathLossLookupTable
+from classes.models.stationtable import StationTable
 from math import sqrt
+import os
 import numpy as np
-import random
 
 class LogDistancePathLossModel(RssiInterface):
     '''
     LogDistancePathLossModel is a class that implements the RssiInterface to calculate the Received Signal Strength Indicator (RSSI) using the Log-Distance Path Loss model.
+
+    Attributes:
+        noise_rng (np.random.Generator): The random generator of the RSSI noise.
+        loss_rng (np.random.Generator): The random generator of the missing packages model.
+        lookup_resolution_meters (float | None): The resolution of the precomputed path loss table, None to always use the exact formulas.
+        lookup_exact_radius_meters (float | None): The distance to a station under which the exact formulas are used instead of the table.
+        lookup_cache_dir (str | None): The directory where the tables are saved and shared between runs.
+        lookup_table (PathLossLookupTable | None): The path loss table of the current stations, built by prepare.
     '''
 
+    # Path loss tables built by this process, shared by the following simulations with the same stations and grid
+    _lookup_tables = {}
+    _lookup_tables_size = 4
+
+    def __init__(self, lookup_resolution_meters: float = None, lookup_exact_radius_meters: float = None, lookup_cache_dir: str = None,
+                 noise_rng: np.random.Generator = None, loss_rng: np.random.Generator = None):
+        """
+        Args:
+            lookup_resolution_meters (float, optional): The resolution of the precomputed path loss table. Defaults to None, no table.
+            lookup_exact_radius_meters (float, optional): The distance to a station under which the exact formulas are used. Defaults to None, four table cells.
+            lookup_cache_dir (str, optional): The directory where the tables are saved and memory-mapped from. Defaults to None, the table is built in memory.
+            noise_rng (np.random.Generator, optional): The random generator of the RSSI noise. Defaults to a new generator seeded by the OS.
+            loss_rng (np.random.Generator, optional): The random generator of the missing packages model. Defaults to a new generator seeded by the OS.
+        """
+        self.noise_rng = noise_rng if noise_rng is not None else np.random.default_rng()
+        self.loss_rng = loss_rng if loss_rng is not None else np.random.default_rng()
+        self.lookup_resolution_meters = lookup_resolution_meters
+        self.lookup_exact_radius_meters = lookup_exact_radius_meters
+        self.lookup_cache_dir = lookup_cache_dir
+        self.lookup_table = None
+
+    def prepare(self, stations: StationTable, dim_x: float, dim_y: float):
+        """
+        Builds the path loss table of the stations over the whole room, if a lookup resolution is configured.
+        A table already built by this process for the same stations and grid is reused, and with a cache directory,
+        a table saved by other runs is memory-mapped instead.
+        Args:
+            stations (StationTable): The stations of the simulation.
+            dim_x (float): The x dimension of the room in meters.
+            dim_y (float): The y dimension of the room in meters.
+        """
+        self.lookup_table = None
+        if self.lookup_resolution_meters is None:
+            return
+        exact_radius = self.lookup_exact_radius_meters if self.lookup_exact_radius_meters is not None else 4 * self.lookup_resolution_meters
+        fingerprint = PathLossLookupTable.compute_fingerprint(
+            [stations.x, stations.y, stations.Tx, stations.n, stations.miss_model, stations.miss_params], 0, dim_x, 0, dim_y, self.lookup_resolution_meters, exact_radius)
+        table = self._lookup_tables.get(fingerprint, None)
+        if table is None:
+            path = os.path.join(self.lookup_cache_dir, f"pathloss_{fingerprint[:16]}") if self.lookup_cache_dir else None
+            if path is not None and os.path.isdir(path):
+                table = PathLossLookupTable.load(path)
+            else:
+                def exact(station_indices, xs, ys):
+                    return self.path_loss_terms(stations, station_indices, xs, ys)
+                table = PathLossLookupTable.build(exact, stations.x, stations.y, 0, dim_x, 0, dim_y, self.lookup_resolution_meters,
+                                                  exact_radius_meters=exact_radius, fingerprint=fingerprint)
+                if path is not None:
+                    table.save(path)
+            # Keep only the most recent tables
+            if len(self._lookup_tables) >= self._lookup_tables_size:
+                del self._lookup_tables[next(iter(self._lookup_tables))]
+            self._lookup_tables[fingerprint] = table
+        self.lookup_table = table
+
     def calculate_rssi(self, station: Station, current_time: int, milliseconds_per_iteration: int, current_x: float, current_y: float, speed: float) -> int:
         """
         Calculate the Received Signal Strength Indicator (RSSI) for a given station and current position.
@@ -60,7 +125,7 @@ class LogDistancePathLossModel(RssiInterface):
 
         # Add noise to the rssi
         if station.noise_std_dev > 0:
-            noise = np.random.normal(0, station.noise_std_dev)
+            noise = self.noise_rng.normal(0, station.noise_std_dev)
             rssi += noise
 
         if rssi < -100:
@@ -80,48 +145,166 @@ class LogDistancePathLossModel(RssiInterface):
             bool: True if the package should be missed, False otherwise.
         """
 
-        # 1 - Determine if have all the required params
-        if station.missing_packages_probability is None:
-            return False
-        
-        function_model = station.missing_packages_probability.get('function_model', None)
-        function_params = station.missing_packages_probability.get('params', None)
-        if function_model is None or function_params is None:
+        # 1 - Get the model compiled by the stations table
+        table, index = station.table, station.index
+        if table.miss_model[index] == StationTable.MISS_MODEL_NONE:
             return False
-        
-        # 2 - Calculate the probability
-        miss_probability = 0
-        if function_model == 'sigmoid':
-            param_a = function_params.get('a', None)
-            param_b = function_params.get('b', None)
-            if param_a is None or param_b is None:
-                raise ValueError("Missing parameters 'a' and 'b' for the sigmoid function model.")
-            miss_probability = functionmodels.sigmoid(distance, param_a, param_b)
-        elif function_model == 'exponential':
-            param_a = function_params.get('a', None)
-            param_b = function_params.get('b', None)
-            if param_a is None or param_b is None:
-                raise ValueError("Missing parameters 'a' and 'b' for the exponential function model.")
-            miss_probability = functionmodels.exponential(distance, param_a, param_b)
-        elif function_model == 'lineal':
-            param_a = function_params.get('a', None)
-            param_b = function_params.get('b', None)
-            if param_a is None or param_b is None:
-                raise ValueError("Missing parameters 'a' and 'b' for the lineal function model.")
-            miss_probability = functionmodels.lineal(distance, param_a, param_b)
 
-        else:
-            return False
-        
-        # Limit probability to 0-100
-        miss_probability = miss_probability * 100
-        miss_probability = max(0, min(100, miss_probability))
+        # 2 - Calculate the probability, limited to 0-1
+        miss_probability = functionmodels.evaluate_one(table.miss_model[index], table.miss_params[index], distance)
+        miss_probability = max(0, min(1, miss_probability))
 
         # 3 - Determine if the package should be missed
         if miss_probability == 0:
             return False
-        elif miss_probability == 100:
+        elif miss_probability == 1:
             return True
-        
-        random_number = random.randint(0, 100)
-        return random_number <= miss_probability
+
+        return self.loss_rng.random() < miss_probability
+
+    def calculate_rssi_batch(self, stations: StationTable, station_indices: np.ndarray, timestamps: np.ndarray, milliseconds_per_iteration: int, positions_x: np.ndarray, positions_y: np.ndarray, speed: float) -> tuple:
+        """
+        Calculate the RSSI of a batch of packages with a single vectorized pass for the distances, the path loss, the noise and the missing packages.
+        Args:
+            stations (StationTable): The stations of the simulation.
+            station_indices (np.ndarray): The row in the stations table of the transmitter of each package.
+            timestamps (np.ndarray): The time in milliseconds of each package. Not used in this model.
+            milliseconds_per_iteration (int): The time interval per iteration in milliseconds. Not used in this model.
+            positions_x (np.ndarray): The x-coordinate of the receiver for each package.
+            positions_y (np.ndarray): The y-coordinate of the receiver for each package.
+            speed (float): The speed of the receiver. Not used in this model.
+        Returns:
+            tuple: Two numpy arrays, the RSSI of each package rounded to the nearest integer and its status (RECEIVED, DROPPED or BELOW_THRESHOLD).
+        Raises:
+            ValueError: If the Tx or n values are not available for any transmitting station.
+        """
+        station_indices = np.asarray(station_indices, dtype=np.int64)
+        positions_x = np.asarray(positions_x, dtype=float)
+        positions_y = np.asarray(positions_y, dtype=float)
+        unavailable = np.isnan(stations.Tx[station_indices]) | np.isnan(stations.n[station_indices])
+        if unavailable.any():
+            raise ValueError(f"Tx and n values are not available for the station with MAC {stations.mac[station_indices[np.argmax(unavailable)]]}.")
+
+        # Mean rssi and missing probability of each package, interpolated from the path loss table when available
+        if self.lookup_table is not None:
+            mean_rssi, miss_probability, exact = self.lookup_table.lookup(station_indices, positions_x, positions_y)
+            if exact.any():
+                mean_rssi[exact], miss_probability[exact] = self.path_loss_terms(stations, station_indices[exact], positions_x[exact], positions_y[exact])
+        else:
+            mean_rssi, miss_probability = self.path_loss_terms(stations, station_indices, positions_x, positions_y)
+
+        # Check which packages should be missed
+        missed = self._draw_missed_packages(miss_probability)
+
+        # Add noise to the rssi, the stations without noise have a standard deviation of 0
+        rssi = mean_rssi + self.noise_rng.normal(0, np.maximum(stations.noise_std_dev[station_indices], 0))
+
+        status = np.full(len(station_indices), self.RECEIVED, dtype=np.int8)
+        status[rssi < -100] = self.BELOW_THRESHOLD
+        status[missed] = self.DROPPED
+        return (np.rint(rssi).astype(np.int64), status)
+
+    def path_loss_terms(self, stations: StationTable, station_indices: np.ndarray, positions_x: np.ndarray, positions_y: np.ndarray) -> tuple:
+        """
+        Calculate the exact noiseless terms of the model for a batch of packages.
+        Args:
+            stations (StationTable): The stations of the simulation.
+            station_indices (np.ndarray): The row in the stations table of the transmitter of each package.
+            positions_x (np.ndarray): The x-coordinate of the receiver for each package.
+            positions_y (np.ndarray): The y-coordinate of the receiver for each package.
+        Returns:
+            tuple: Two numpy arrays, the mean RSSI (Tx - 10 n log10(d)) and the missing probability (0-100) of each package.
+        """
+        Tx = stations.Tx[station_indices]
+        n = stations.n[station_indices]
+
+        # Calculate distance between the stations and the current locations
+        distance = np.hypot(stations.x[station_indices] - positions_x, stations.y[station_indices] - positions_y)
+
+        # Calculate the rssi, the distance 0 keeps the Tx value
+        with np.errstate(divide='ignore'):
+            path_loss = 10 * n * np.log10(distance)
+        mean_rssi = Tx - np.where(distance != 0, path_loss, 0)
+        return (mean_rssi, self.miss_probability_batch(stations, station_indices, distance))
+
+    def calculate_rssi_grid(self, stations: StationTable, positions_x: np.ndarray, positions_y: np.ndarray, samples: int) -> tuple:
+        """
+        Calculate several RSSI samples of every station at every given static position.
+        The distances, the path loss and the missing probabilities are calculated once per position and station, and
+        broadcasted over the samples, which only differ in their noise and missing package draws.
+        Args:
+            stations (StationTable): The stations of the simulation.
+            positions_x (np.ndarray): The x-coordinate of each receiver position.
+            positions_y (np.ndarray): The y-coordinate of each receiver position.
+            samples (int): The number of samples of each station at each position.
+        Returns:
+            tuple: Two numpy arrays of shape (positions, stations, samples), the RSSI of each sample rounded to the nearest integer and its status.
+        Raises:
+            ValueError: If the Tx or n values are not available for any station.
+        """
+        unavailable = np.isnan(stations.Tx) | np.isnan(stations.n)
+        if unavailable.any():
+            raise ValueError(f"Tx and n values are not available for the station with MAC {stations.mac[np.argmax(unavailable)]}.")
+        positions_x = np.asarray(positions_x, dtype=float)
+        positions_y = np.asarray(positions_y, dtype=float)
+        shape = (len(positions_x), len(stations), samples)
+
+        # Distance between each position and each station
+        distance = np.hypot(stations.x[None, :] - positions_x[:, None], stations.y[None, :] - positions_y[:, None])
+
+        # Check which samples should be missed
+        station_indices = np.broadcast_to(np.arange(shape[1]), shape[:2]).ravel()
+        miss_probability = self.miss_probability_batch(stations, station_indices, distance.ravel()).reshape(shape[:2])[:, :, None]
+        missed = self.loss_rng.random(size=shape) * 100 < miss_probability
+
+        # Calculate the rssi, the distance 0 keeps the Tx value
+        with np.errstate(divide='ignore'):
+            path_loss = 10 * stations.n[None, :] * np.log10(distance)
+        rssi = (stations.Tx[None, :] - np.where(distance != 0, path_loss, 0))[:, :, None]
+
+        # Add noise to the rssi, the stations without noise have a standard deviation of 0
+        rssi = rssi + self.noise_rng.normal(0, np.maximum(stations.noise_std_dev, 0)[None, :, None], size=shape)
+
+        status = np.full(shape, self.RECEIVED, dtype=np.int8)
+        status[rssi < -100] = self.BELOW_THRESHOLD
+        status[missed] = self.DROPPED
+        return (np.rint(rssi).astype(np.int64), status)
+
+    def miss_probability_batch(self, stations: StationTable, station_indices: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        """
+        Calculates the probability, between 0 and 100, of missing each package of a batch.
+
+        Args:
+            stations (StationTable): The stations of the simulation.
+            station_indices (np.ndarray): The row in the stations table of the transmitter of each package.
+            distance (np.ndarray): The distance between the transmitter and receiver of each package.
+
+        Returns:
+            np.ndarray: The missing probability of each package.
+        """
+        # The models are validated and compiled by the stations table
+        miss_probability = functionmodels.evaluate(stations.miss_model[station_indices], stations.miss_params[station_indices], distance)
+
+        # Limit probability to 0-100
+        return np.clip(miss_probability * 100, 0, 100)
+
+    def should_miss_package_batch(self, stations: StationTable, station_indices: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        """
+        Determines which packages of a batch should be missed, following the same rules as should_miss_package.
+
+        Args:
+            stations (StationTable): The stations of the simulation.
+            station_indices (np.ndarray): The row in the stations table of the transmitter of each package.
+            distance (np.ndarray): The distance between the transmitter and receiver of each package.
+
+        Returns:
+            np.ndarray: Boolean array, True for the packages that should be missed.
+        """
+        return self._draw_missed_packages(self.miss_probability_batch(stations, station_indices, distance))
+
+    def _draw_missed_packages(self, miss_probability: np.ndarray) -> np.ndarray:
+        """
+        Draws which packages are missed given their missing probability (0-100).
+        """
+        # Bernoulli draw with the continuous probability, 0 is never missed and 100 always
+        return self.loss_rng.random(size=len(miss_probability)) * 100 < miss_probability
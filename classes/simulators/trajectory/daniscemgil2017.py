@@ -14,7 +14,6 @@
 
 from classes.simulators.trajectory.interface import TrajectoryInterface
 import numpy as np
-import random
 
 class DanisCemgil2017(TrajectoryInterface):
     """
@@ -22,17 +21,21 @@ class DanisCemgil2017(TrajectoryInterface):
 
     Parameters:
         s (float): Standard deviation of the normal distribution used to randomize the angle. Default is 0.07.   
+        rng (np.random.Generator): Random generator of the simulator. Default is a new generator seeded by the OS.
         
     Attributes:
         s (float): Standard deviation of the normal distribution used to randomize the angle. Default is 0.07.
+        rng (np.random.Generator): Random generator of the simulator.
         outbounds_ration (float): Additional value to manipulate sampled rotation values to prevent the virtual mobile device from leaving the area. Default is π/8.
          
     """
 
-    def __init__(self, s: float = 0.07):
+    def __init__(self, s: float = 0.07, rng: np.random.Generator = None):
         # Inicialización de variables
         self.s = s                          # desviación estandar de la distribución normal usada para aleatorizar el ángulo. 0 = no hay varianza en el ángulo
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.outbounds_ration = np.pi / 8   # To prevent our virtual mobile device from leaving the area, sampled rotation values are deliberately manipulated by an additional value of π8 according to the current orientation
+        self.max_block_steps = 65536        # Maximum number of steps generated at once by calculate_positions
 
     def calculate_position(self, current_time: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> tuple:
         """
@@ -61,7 +64,7 @@ class DanisCemgil2017(TrajectoryInterface):
             delta_angle = self.outbounds_ration
         else:
             # ̃δθ_t ∼ N(0, s)
-            delta_angle = np.random.normal(0, self.s)
+            delta_angle = self.rng.normal(0, self.s)
 
         angle = last_angle + delta_angle
 
@@ -77,3 +80,59 @@ class DanisCemgil2017(TrajectoryInterface):
         # Devolvemos
         return (x, y, angle)
 
+    def calculate_positions(self, start_time: int, steps: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> tuple:
+        """
+        Calculate a block of consecutive positions at once.
+
+        The angle increments of the whole block are drawn in bulk and accumulated into the headings, the positions are
+        obtained with vectorized cos/sin. The block is cut when the object leaves the area, the bounce steps are resolved
+        one by one and the generation continues with a new block, so the random walk follows the same rules as calculate_position.
+        Parameters:
+        start_time (int): The time in milliseconds of the first step.
+        steps (int): The number of steps to calculate.
+        milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+        last_angle (float): The last known angle of the object in radians.
+        last_x (float): The last known x-coordinate of the object.
+        last_y (float): The last known y-coordinate of the object.
+        min_x (float): The minimum x-coordinate boundary.
+        max_x (float): The maximum x-coordinate boundary.
+        min_y (float): The minimum y-coordinate boundary.
+        max_y (float): The maximum y-coordinate boundary.
+        speed (float): The speed of the object in meters per second.
+        Returns:
+        tuple: A tuple of numpy arrays with the x-coordinates, y-coordinates and angles (in radians) of each step.
+        """
+        xs = np.empty(steps)
+        ys = np.empty(steps)
+        angles = np.empty(steps)
+        delta_l = speed * milliseconds_per_iteration / 1000
+        x, y, angle = last_x, last_y, last_angle
+
+        done = 0
+        block_steps = 256
+        while done < steps:
+            # Bounce steps, the rotation is deterministic while the object is out of the area
+            if x < min_x or x > max_x or y < min_y or y > max_y:
+                angle += self.outbounds_ration
+                x += delta_l * np.cos(angle)
+                y += delta_l * np.sin(angle)
+                xs[done], ys[done], angles[done] = x, y, angle
+                done += 1
+                block_steps = 256
+                continue
+
+            # ̃δθ_t ∼ N(0, s) for the whole block
+            size = min(block_steps, steps - done)
+            headings = angle + np.cumsum(self.rng.normal(0, self.s, size))
+            block_xs, block_ys = self._integrate_headings(x, y, headings, delta_l, min_x, max_x, min_y, max_y)
+            accepted = len(block_xs)
+            xs[done:done + accepted] = block_xs
+            ys[done:done + accepted] = block_ys
+            angles[done:done + accepted] = headings[:accepted]
+            x, y, angle = block_xs[-1], block_ys[-1], headings[accepted - 1]
+            done += accepted
+            # Grow the block while the object stays inside the area
+            if accepted == size:
+                block_steps = min(block_steps * 2, self.max_block_steps)
+
+        return (xs, ys, angles)
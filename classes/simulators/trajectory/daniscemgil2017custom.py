@@ -12,9 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from classes.models.trajectorysegments import TrajectorySegments
 from classes.simulators.trajectory.interface import TrajectoryInterface
 import numpy as np
-import random
 
 
 class DanisCemgil2017Custom(TrajectoryInterface):
@@ -26,18 +26,23 @@ class DanisCemgil2017Custom(TrajectoryInterface):
     Parameters:
     - keep_angle_ms (int): The duration in milliseconds for which the angle is kept constant.
     - s (float): The standard deviation of the normal distribution used to randomize the angle. A value of 0 means no variance in the angle.
+    - rng (np.random.Generator): The random generator of the simulator. A new generator seeded by the OS if not provided.
 
     Attributes:
     - s (float): The standard deviation of the normal distribution used to randomize the angle.
+    - rng (np.random.Generator): The random generator of the simulator.
     - outbounds_ration (float): The additional value of π/8 added to the sampled rotation values to prevent the simulation from leaving the area.
     - keep_angle_ms (int): The duration in milliseconds for which the angle is kept constant.
 
     '''
 
-    def __init__(self, keep_angle_ms: int = 300, s: float = 0.07):
+    supports_segments = True
+
+    def __init__(self, keep_angle_ms: int = 300, s: float = 0.07, rng: np.random.Generator = None):
         # Inicialización de variables
         # desviación estandar de la distribución normal usada para aleatorizar el ángulo. 0 = no hay varianza en el ángulo
         self.s = s
+        self.rng = rng if rng is not None else np.random.default_rng()
         # To prevent our simulation from leaving the area, sampled rotation values are deliberately manipulated by an additional value of π/8 according to the current orientation
         self.outbounds_ration = np.pi / 8   
         # In order to avoid the simulation from being too chaotic, the angle is kept constant for x ms
@@ -73,7 +78,7 @@ class DanisCemgil2017Custom(TrajectoryInterface):
         # If we are in the area and the it is the time to change the angle
         elif current_time - self._last_angle_change_time > self.keep_angle_ms:
             # ̃δθ_t ∼ N(0, s)
-            delta_angle = np.random.normal(0, self.s)
+            delta_angle = self.rng.normal(0, self.s)
             self._last_angle_change_time = current_time
 
         angle = last_angle + delta_angle
@@ -90,3 +95,140 @@ class DanisCemgil2017Custom(TrajectoryInterface):
 
         # Devolvemos
         return (x, y, angle)
+
+    def get_state(self) -> dict:
+        """
+        Returns the internal state of the simulator: the state of its random generator and the time of the last angle change.
+        """
+        state = super().get_state()
+        state['last_angle_change_time'] = int(self._last_angle_change_time)
+        return state
+
+    def set_state(self, state: dict):
+        """
+        Restores the internal state of the simulator returned by get_state.
+        Parameters:
+        - state (dict): The state of the simulator.
+        """
+        super().set_state(state)
+        self._last_angle_change_time = state['last_angle_change_time']
+
+    def calculate_positions(self, start_time: int, steps: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> tuple:
+        """
+        Calculate a block of consecutive positions at once.
+
+        The trajectory of the block is generated as segments (see calculate_segments) and every position is evaluated
+        in closed form from the start of its segment.
+        Parameters:
+        - start_time (int): The time in milliseconds of the first step.
+        - steps (int): The number of steps to calculate.
+        - milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+        - last_angle (float): The last recorded angle of movement in radians.
+        - last_x (float): The last recorded x-coordinate.
+        - last_y (float): The last recorded y-coordinate.
+        - min_x (float): The minimum x-coordinate boundary.
+        - max_x (float): The maximum x-coordinate boundary.
+        - min_y (float): The minimum y-coordinate boundary.
+        - max_y (float): The maximum y-coordinate boundary.
+        - speed (float): The speed of the moving object in meters per second.
+        Returns:
+        - tuple: A tuple of numpy arrays with the x-coordinates, y-coordinates and angles of each step.
+        """
+        if steps == 0:
+            return (np.empty(0), np.empty(0), np.empty(0))
+        segments = self.calculate_segments(start_time=start_time - milliseconds_per_iteration, steps=steps, milliseconds_per_iteration=milliseconds_per_iteration,
+                                           last_angle=last_angle, last_x=last_x, last_y=last_y, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, speed=speed)
+        return segments.evaluate(start_time + np.arange(steps) * milliseconds_per_iteration)
+
+    def calculate_segments(self, start_time: int, steps: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> TrajectorySegments:
+        """
+        Calculate the trajectory of a block of consecutive steps as segments of constant heading.
+
+        The heading only changes when the angle lock expires or when the object is out of the area, so each segment lasts
+        until the next lock expiration or until the first step out of the area, both solved analytically. The work is
+        proportional to the number of segments instead of the number of steps, and the positions are never accumulated
+        step by step.
+        Parameters:
+        - start_time (int): The time in milliseconds of the starting point, the first step is one iteration later.
+        - steps (int): The number of steps to calculate.
+        - milliseconds_per_iteration (int): The time elapsed per iteration in milliseconds.
+        - last_angle (float): The last recorded angle of movement in radians.
+        - last_x (float): The last recorded x-coordinate.
+        - last_y (float): The last recorded y-coordinate.
+        - min_x (float): The minimum x-coordinate boundary.
+        - max_x (float): The maximum x-coordinate boundary.
+        - min_y (float): The minimum y-coordinate boundary.
+        - max_y (float): The maximum y-coordinate boundary.
+        - speed (float): The speed of the moving object in meters per second.
+        Returns:
+        - TrajectorySegments: The segments of the trajectory.
+        """
+        delta_l = speed * milliseconds_per_iteration / 1000
+        segments = ([], [], [], [], [], [], [])
+        time, x, y, angle = start_time, last_x, last_y, last_angle
+
+        done = 0
+        while done < steps:
+            # The rules of calculate_position on the first step of the segment
+            current_time = time + milliseconds_per_iteration
+            if x < min_x or x > max_x or y < min_y or y > max_y:
+                angle += self.outbounds_ration
+                self._last_angle_change_time = current_time
+            elif current_time - self._last_angle_change_time > self.keep_angle_ms:
+                # ̃δθ_t ∼ N(0, s)
+                angle += self.rng.normal(0, self.s)
+                self._last_angle_change_time = current_time
+            step_x = delta_l * np.cos(angle)
+            step_y = delta_l * np.sin(angle)
+
+            # The segment lasts until the step before the angle lock expires, or until the first step out of the area
+            length = (self._last_angle_change_time + self.keep_angle_ms - time) // milliseconds_per_iteration
+            length = min(length, steps - done, self._first_outbound_step(x, y, step_x, step_y, min_x, max_x, min_y, max_y, limit=length))
+
+            for column, value in zip(segments, (time, x, y, step_x, step_y, angle, length)):
+                column.append(value)
+            time += length * milliseconds_per_iteration
+            x = x + length * step_x
+            y = y + length * step_y
+            done += length
+
+        return TrajectorySegments(milliseconds_per_iteration, *segments)
+
+    @staticmethod
+    def _first_outbound_step(x: float, y: float, step_x: float, step_y: float, min_x: float, max_x: float, min_y: float, max_y: float, limit: int) -> int:
+        """
+        Calculate the first step of a straight movement whose position is out of the area.
+        Parameters:
+        - x (float): The x-coordinate of the starting point.
+        - y (float): The y-coordinate of the starting point.
+        - step_x (float): The x displacement of each step.
+        - step_y (float): The y displacement of each step.
+        - min_x (float): The minimum x-coordinate boundary.
+        - max_x (float): The maximum x-coordinate boundary.
+        - min_y (float): The minimum y-coordinate boundary.
+        - max_y (float): The maximum y-coordinate boundary.
+        - limit (int): The maximum step to look for, returned if the movement stays in the area until then.
+        Returns:
+        - int: The first step (starting at 1) out of the area, or limit.
+        """
+        def outbound(k):
+            position_x = x + k * step_x
+            position_y = y + k * step_y
+            return position_x < min_x or position_x > max_x or position_y < min_y or position_y > max_y
+
+        if outbound(1):
+            return 1
+        # Crossing of each margin the object is moving towards, k = floor((bound - start) / step) + 1
+        step = limit
+        for position, delta, low, high in ((x, step_x, min_x, max_x), (y, step_y, min_y, max_y)):
+            if delta > 0:
+                step = min(step, int((high - position) // delta) + 1)
+            elif delta < 0:
+                step = min(step, int((position - low) // -delta) + 1)
+        step = max(step, 1)
+        # Fix the rounding errors of the division, the result must match the evaluated positions
+        while step > 1 and outbound(step - 1):
+            step -= 1
+        while step < limit and not outbound(step):
+            step += 1
+        return step
@@ -13,12 +13,19 @@
 # limitations under the License.
 
 from classes.simulators.trajectory.interface import TrajectoryInterface
-import random
+import numpy as np
 
 class DummyPositionModule(TrajectoryInterface):
     """
     DummyPositionModule is a class that simulates the calculation of a random position within specified bounds.
     """
+
+    def __init__(self, rng: np.random.Generator = None):
+        """
+        Args:
+            rng (np.random.Generator, optional): The random generator of the simulator. Defaults to a new generator seeded by the OS.
+        """
+        self.rng = rng if rng is not None else np.random.default_rng()
     
     def calculate_position(self, current_time: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> tuple:
         """
@@ -37,6 +44,6 @@ class DummyPositionModule(TrajectoryInterface):
             speed (float): The speed of movement.
 
         Returns:
-            tuple: A tuple containing the new x and y coordinates.
+            tuple: A tuple containing the new x and y coordinates and the unchanged angle.
         """
-        return (random.uniform(min_x, max_x), random.uniform(min_y, max_y))
\ No newline at end of file
+        return (self.rng.uniform(min_x, max_x), self.rng.uniform(min_y, max_y), last_angle)
\ No newline at end of file
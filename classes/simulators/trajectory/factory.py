@@ -12,21 +12,51 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from classes.simulators.registry import SimulatorRegistry
 from classes.simulators.trajectory.interface import TrajectoryInterface
+import numpy as np
 
 class TrajectoryFactory:
     """
     A factory class for creating trajectory simulators.
+
+    The simulators are looked up by name in the registry, which holds the built-in simulators, the ones added with
+    register and the plugins published in the indoor_positioning_simulator.trajectory entry point group.
     """
 
-    @staticmethod
-    def create_trajectory_simulator(simulator_name: str, constructor_params: dict = {}) -> TrajectoryInterface:
+    registry = SimulatorRegistry('trajectory', TrajectoryInterface, {
+        'dummy': 'classes.simulators.trajectory.dummy:DummyPositionModule',
+        'daniscemgil2017': 'classes.simulators.trajectory.daniscemgil2017:DanisCemgil2017',
+        'daniscemgil2017custom': 'classes.simulators.trajectory.daniscemgil2017custom:DanisCemgil2017Custom',
+    })
+
+    @classmethod
+    def register(cls, simulator_name: str, simulator):
+        """
+        Registers a trajectory simulator.
+
+        Args:
+            simulator_name (str): The name used in the configuration to select the simulator.
+            simulator (type | str): The TrajectoryInterface implementation or its "module:Class" reference.
+        """
+        cls.registry.register(simulator_name, simulator)
+
+    @classmethod
+    def available(cls) -> list:
+        """
+        Returns the names of the available trajectory simulators.
+        """
+        return cls.registry.names()
+
+    @classmethod
+    def create_trajectory_simulator(cls, simulator_name: str, constructor_params: dict = {}, rng: np.random.Generator = None) -> TrajectoryInterface:
         """
         Creates a trajectory simulator based on the given simulator name.
 
         Args:
             simulator_name (str): The name of the simulator.
             constructor_params (dict): Optional dictionary of constructor parameters.
+            rng (np.random.Generator): Optional random generator injected into the simulator.
 
         Returns:
             TrajectoryInterface: An instance of the trajectory simulator.
@@ -34,14 +64,4 @@ class TrajectoryFactory:
         Raises:
             ValueError: If the simulator name is not available.
         """
-        if simulator_name == 'dummy':
-            from classes.simulators.trajectory.dummy import DummyPositionModule
-            return DummyPositionModule(**constructor_params)
-        elif simulator_name == 'daniscemgil2017':
-            from classes.simulators.trajectory.daniscemgil2017 import DanisCemgil2017
-            return DanisCemgil2017(**constructor_params)
-        elif simulator_name == 'daniscemgil2017custom':
-            from classes.simulators.trajectory.daniscemgil2017custom import DanisCemgil2017Custom
-            return DanisCemgil2017Custom(**constructor_params)
-        else:
-            raise ValueError(f"Trajectory simulator {simulator_name} not available.")
+        return cls.registry.create(simulator_name, constructor_params, rng=rng)
@@ -13,6 +13,9 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+import numpy as np
+
+from classes.models.trajectorysegments import TrajectorySegments
 
 class TrajectoryInterface(ABC):
     """
@@ -20,8 +23,14 @@ class TrajectoryInterface(ABC):
 
     This class defines the interface for calculating the position of an object
     based on various parameters.
+
+    Attributes:
+        supports_segments (bool): Indicates if the simulator generates its trajectory natively as segments, so the
+            positions can be evaluated only at the required times instead of at every iteration.
     """
 
+    supports_segments = False
+
     @abstractmethod
     def calculate_position(self, current_time: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> tuple:
         """
@@ -40,6 +49,124 @@ class TrajectoryInterface(ABC):
             speed (float): The speed of the object defined in meters per second.
 
         Returns:
-            tuple: A tuple containing the calculated x and y coordinates of the object.
+            tuple: A tuple containing the calculated x and y coordinates and the angle (in radians) of the object.
+        """
+        pass
+
+    def get_state(self) -> dict:
+        """
+        Returns the internal state of the simulator, so a simulation can continue from a checkpoint.
+
+        This default implementation returns the state of the random generators of the simulator, simulators keeping
+        other state between calls should extend it.
+
+        Returns:
+            dict: The state of the simulator, made of JSON serializable values.
+        """
+        return {'rngs': {name: value.bit_generator.state for name, value in vars(self).items() if isinstance(value, np.random.Generator)}}
+
+    def set_state(self, state: dict):
+        """
+        Restores the internal state of the simulator returned by get_state.
+
+        Args:
+            state (dict): The state of the simulator.
+        """
+        for name, generator_state in state['rngs'].items():
+            getattr(self, name).bit_generator.state = generator_state
+
+    def calculate_positions(self, start_time: int, steps: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> tuple:
+        """
+        Calculates a block of consecutive positions of the object.
+
+        The result is equivalent to calling calculate_position once per iteration, with current_time taking the values
+        start_time, start_time + milliseconds_per_iteration, ... and chaining each result into the next call.
+        This default implementation does exactly that, simulators able to generate the whole block at once should override it.
+
+        Args:
+            start_time (int): The time in milliseconds of the first position of the block.
+            steps (int): The number of positions to calculate.
+            milliseconds_per_iteration (int): The number of milliseconds per iteration.
+            last_angle (float): The angle of the object before the first step [0, 2pi].
+            last_x (float): The x-coordinate of the object before the first step.
+            last_y (float): The y-coordinate of the object before the first step.
+            min_x (float): The minimum x-coordinate value.
+            max_x (float): The maximum x-coordinate value.
+            min_y (float): The minimum y-coordinate value.
+            max_y (float): The maximum y-coordinate value.
+            speed (float): The speed of the object defined in meters per second.
+
+        Returns:
+            tuple: A tuple of three numpy arrays of length steps with the x-coordinates, y-coordinates and angles of the object.
+        """
+        xs = np.empty(steps)
+        ys = np.empty(steps)
+        angles = np.empty(steps)
+        x, y, angle = last_x, last_y, last_angle
+        for step in range(steps):
+            x, y, angle = self.calculate_position(current_time=start_time + step * milliseconds_per_iteration, milliseconds_per_iteration=milliseconds_per_iteration,
+                                                  last_angle=angle, last_x=x, last_y=y, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, speed=speed)
+            xs[step] = x
+            ys[step] = y
+            angles[step] = angle
+        return (xs, ys, angles)
+
+    def calculate_segments(self, start_time: int, steps: int, milliseconds_per_iteration: int, last_angle: float, last_x: float, last_y: float, min_x: float, max_x: float, min_y: float, max_y: float, speed: float) -> TrajectorySegments:
+        """
+        Calculates the trajectory of a block of consecutive iterations as segments of constant heading.
+
+        The trajectory is the same one calculate_positions would generate for the iterations following start_time.
+        This default implementation calculates every position and returns one segment per iteration, simulators whose
+        heading stays constant for several iterations should override it and set supports_segments.
+
+        Args:
+            start_time (int): The time in milliseconds of the starting point, the first iteration is one iteration later.
+            steps (int): The number of iterations to calculate.
+            milliseconds_per_iteration (int): The number of milliseconds per iteration.
+            last_angle (float): The angle of the object at the starting point [0, 2pi].
+            last_x (float): The x-coordinate of the starting point.
+            last_y (float): The y-coordinate of the starting point.
+            min_x (float): The minimum x-coordinate value.
+            max_x (float): The maximum x-coordinate value.
+            min_y (float): The minimum y-coordinate value.
+            max_y (float): The maximum y-coordinate value.
+            speed (float): The speed of the object defined in meters per second.
+
+        Returns:
+            TrajectorySegments: The segments of the trajectory, from start_time to start_time + steps * milliseconds_per_iteration.
+        """
+        xs, ys, angles = self.calculate_positions(start_time=start_time + milliseconds_per_iteration, steps=steps, milliseconds_per_iteration=milliseconds_per_iteration,
+                                                  last_angle=last_angle, last_x=last_x, last_y=last_y, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y, speed=speed)
+        previous_xs = np.concatenate(([last_x], xs[:-1]))
+        previous_ys = np.concatenate(([last_y], ys[:-1]))
+        return TrajectorySegments(milliseconds_per_iteration, start_time + np.arange(steps) * milliseconds_per_iteration, previous_xs, previous_ys,
+                                  xs - previous_xs, ys - previous_ys, angles, np.ones(steps))
+
+    @staticmethod
+    def _integrate_headings(last_x: float, last_y: float, headings: np.ndarray, delta_l: float, min_x: float, max_x: float, min_y: float, max_y: float) -> tuple:
+        """
+        Integrates a block of steps of constant length over the given headings.
+
+        The block is truncated just after the first step that leaves the area, the following step has to be resolved
+        by the simulator with its bounce rule.
+
+        Args:
+            last_x (float): The x-coordinate before the first step.
+            last_y (float): The y-coordinate before the first step.
+            headings (np.ndarray): The heading (in radians) of each step.
+            delta_l (float): The distance travelled on each step.
+            min_x (float): The minimum x-coordinate value.
+            max_x (float): The maximum x-coordinate value.
+            min_y (float): The minimum y-coordinate value.
+            max_y (float): The maximum y-coordinate value.
+
+        Returns:
+            tuple: The x-coordinates and y-coordinates of the accepted steps.
         """
-        pass
\ No newline at end of file
+        xs = last_x + np.cumsum(delta_l * np.cos(headings))
+        ys = last_y + np.cumsum(delta_l * np.sin(headings))
+        outbounds = (xs < min_x) | (xs > max_x) | (ys < min_y) | (ys > max_y)
+        if outbounds.any():
+            accepted = int(np.argmax(outbounds)) + 1
+            return (xs[:accepted], ys[:accepted])
+        return (xs, ys)
@@ -12,19 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# Only the standard library is imported at module load, the simulator packages (and numpy) are imported when they are
+# used, so the command line parsing and the short runs launched by schedulers start fast
 import argparse
-import math
+import itertools
 import os
 import json
-import random
-from classes.models.station import Station
-from classes.lib.bufferedcsvfilewriter import BufferedCsvFileWriter
-from classes.simulators.trajectory.factory import TrajectoryFactory
-from classes.simulators.rssi.factory import RssiFactory
-from classes.config import Config
-from classes.simulation import Simulation
-import datetime
-import numpy as np
 
 
 class App:
@@ -33,9 +26,11 @@ class App:
 
     Attributes:
         config (Config): Configuration settings loaded from the config file.
+        station_table (StationTable): Columnar registry of the loaded stations.
+        stations (List[Station]): The loaded stations, views of the station_table rows.
         output_dir (str): Directory where output files will be saved.
     """
-    def __init__(self, config_path, stations_path, output_dir):
+    def __init__(self, config_path, stations_path, output_dir, config_overrides=None):
         """
         Initializes the simulator with the given configuration and station data.
 
@@ -43,9 +38,12 @@ class App:
             config_path (str): Path to the configuration file.
             stations_path (str): Path to the file containing station data.
             output_dir (str): Directory where output files will be saved.
+            config_overrides (dict, optional): Values replacing the ones of the configuration file, see Config. Defaults to None.
         """
+        from classes.config import Config
+
         # Load settings and stations
-        self.config = Config(config_path=config_path)
+        self.config = Config(config_path=config_path, overrides=config_overrides)
         self.loadStations(stations_path=stations_path)
         self.output_dir = output_dir 
 
@@ -56,13 +54,13 @@ class App:
             stations_path (str): The file path to the JSON file containing station definitions.
         Raises:
             FileNotFoundError: If the stations definition file does not exist.
-            ValueError: If the stations definition file format is invalid or if required fields are missing.
+            ValueError: If the stations definition file format is invalid, if required fields are missing or if a frequency or initial timestamp is not a whole number of milliseconds.
         The JSON file should contain a list of station definitions, where each station is a dictionary
         with, at least, the following keys:
             - mac (str): The MAC address of the station.
             - x (float): The x-coordinate of the station.
             - y (float): The y-coordinate of the station.
-            - frequency (float): The frequency of the station.
+            - frequency (int): The transmission period of the station in milliseconds.
         Example of a valid JSON file content:
         [
             {
@@ -74,6 +72,8 @@ class App:
             ...
         ]
         """
+        from classes.models.stationtable import StationTable
+
         # First check if the config file exists
         if not os.path.exists(stations_path):
             raise FileNotFoundError(
@@ -88,41 +88,315 @@ class App:
             raise ValueError("Invalid stations definition file format.")
 
         # Lets go, load all the stations
-        self.stations = []
         for station in stationsConfig:
             # Check if all the required fields are present
             if not all([field in station for field in ['mac', 'x', 'y', 'frequency']]):
                 raise ValueError("Invalid station definition format.")
-            self.stations.append(Station(**station))
+        self.station_table = StationTable(stationsConfig)
+        self.stations = self.station_table.stations
 
-    def run_simulation(self):
+    def run_simulation(self, output_prefix=None, resume=False):
         """
         Runs the indoor positioning simulation.
 
         This method initializes a Simulation object with the provided configuration,
         stations, and output directory, and then starts the simulation process.
 
+        Args:
+            output_prefix (str, optional): Prefix of the output file names. Defaults to None, based on the current date and time.
+            resume (bool, optional): Continue an interrupted simulation from its checkpoint. Without output prefix, the most
+                recent checkpoint of the output directory is resumed. Defaults to False.
+
         Returns:
             None
+
+        Raises:
+            FileNotFoundError: If the simulation is resumed and there is no checkpoint.
         """
-        simulation = Simulation(self.config, self.stations, self.output_dir)
+        from classes.simulation import Simulation
+        if resume and output_prefix is None:
+            output_prefix = self.latest_checkpoint_prefix()
+        simulation = Simulation(self.config, self.station_table, self.output_dir, output_prefix=output_prefix, resume=resume)
         simulation.start()
 
+    def latest_checkpoint_prefix(self):
+        """
+        Finds the most recent checkpoint of the output directory.
 
-def main():
+        Returns:
+            str: The output prefix of the checkpointed simulation.
+
+        Raises:
+            FileNotFoundError: If there are no checkpoints in the output directory.
+        """
+        from classes.simulation import Simulation
+        checkpoints = [name for name in os.listdir(self.output_dir) if name.endswith(Simulation.CHECKPOINT_SUFFIX)] if os.path.isdir(self.output_dir) else []
+        if not checkpoints:
+            raise FileNotFoundError(f"No checkpoint found in {self.output_dir}")
+        latest = max(checkpoints, key=lambda name: os.path.getmtime(os.path.join(self.output_dir, name)))
+        return latest[:-len(Simulation.CHECKPOINT_SUFFIX)]
+
+    def run_fingerprint_grid(self, resolution_meters, samples_per_point=1, output_prefix=None):
+        """
+        Generates a static radio map over a regular grid of the room, see FingerprintGrid.
+
+        Args:
+            resolution_meters (float): The distance between two consecutive points of the grid.
+            samples_per_point (int, optional): The number of RSSI samples of each station at each point. Defaults to 1.
+            output_prefix (str, optional): Prefix of the output file name. Defaults to None, based on the current date and time.
+
+        Returns:
+            str: The name of the output file.
+        """
+        from classes.fingerprintgrid import FingerprintGrid
+        fingerprint_grid = FingerprintGrid(self.config, self.station_table, self.output_dir, resolution_meters=resolution_meters,
+                                           samples_per_point=samples_per_point, output_prefix=output_prefix)
+        return fingerprint_grid.start()
+
+
+class BatchApp:
+    """
+    BatchApp class for running many independent simulations over a process pool.
+
+    The runs are defined by a sweep specification, a JSON file with the following optional keys:
+        - configs: List of configurations. Each item is either the path to a config file (relative to the sweep file)
+          or a dictionary of overrides of the base config file.
+        - grid: Dictionary mapping configuration keys (nested keys joined with dots) to the list of values to sweep.
+    Every config is combined with every point of the grid, and each combination is repeated `runs` times.
+
+    Attributes:
+        config_path (str): Path to the base configuration file.
+        stations_path (str): Path to the file containing station data.
+        output_dir (str): Directory where output files will be saved.
+        runs (int): Number of repetitions of each sweep combination.
+        workers (int): Number of worker processes.
+        seed (int | None): Root seed of the runs, each run gets its own independent stream.
+        overrides (dict): Overrides applied to every run, before the ones of the sweep.
+    """
+    def __init__(self, config_path, stations_path, output_dir, sweep_path=None, runs=1, workers=None, seed=None, overrides=None):
+        """
+        Initializes the batch with the given base configuration, station data and sweep specification.
+
+        Args:
+            config_path (str): Path to the base configuration file.
+            stations_path (str): Path to the file containing station data.
+            output_dir (str): Directory where output files will be saved.
+            sweep_path (str, optional): Path to the sweep specification file. Defaults to None, only the base configuration.
+            runs (int, optional): Number of repetitions of each sweep combination. Defaults to 1.
+            workers (int, optional): Number of worker processes. Defaults to None, the number of CPUs.
+            seed (int, optional): Root seed of the runs. Defaults to None, a random one that is stored in the manifest.
+            overrides (dict, optional): Overrides applied to every run, before the ones of the sweep. Defaults to None.
+        """
+        import numpy as np
+
+        if runs < 1:
+            raise ValueError("The number of runs must be greater than 0.")
+        self.config_path = config_path
+        self.stations_path = stations_path
+        self.output_dir = output_dir
+        self.runs = runs
+        self.workers = workers or os.cpu_count()
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy
+        self.overrides = overrides or {}
+        self.sweep = self._load_sweep(sweep_path)
+
+    def _load_sweep(self, sweep_path):
+        """
+        Loads the sweep specification and expands it into the list of (config path, overrides) combinations.
+
+        Args:
+            sweep_path (str | None): Path to the sweep specification file.
+
+        Returns:
+            list: The combinations of the sweep.
+
+        Raises:
+            FileNotFoundError: If the sweep specification file does not exist.
+            ValueError: If the sweep specification format is invalid.
+        """
+        if sweep_path is None:
+            return [(self.config_path, {})]
+        if not os.path.exists(sweep_path):
+            raise FileNotFoundError(f"Sweep specification file {sweep_path} not found")
+        with open(sweep_path, 'r') as file:
+            sweep = json.load(file)
+        if not isinstance(sweep, dict):
+            raise ValueError("Invalid sweep specification format.")
+
+        # Configs of the sweep
+        configs = []
+        for config in sweep.get('configs', [{}]):
+            if isinstance(config, str):
+                configs.append((os.path.join(os.path.dirname(sweep_path), config), {}))
+            elif isinstance(config, dict):
+                configs.append((self.config_path, config))
+            else:
+                raise ValueError("Invalid sweep specification format, configs must be paths or dictionaries.")
+
+        # Grid points
+        grid = sweep.get('grid', {})
+        if not isinstance(grid, dict) or not all(isinstance(values, list) and values for values in grid.values()):
+            raise ValueError("Invalid sweep specification format, grid must map each key to a non empty list of values.")
+        keys = list(grid.keys())
+        points = [dict(zip(keys, values)) for values in itertools.product(*[grid[key] for key in keys])]
+
+        return [(config_path, {**overrides, **point}) for config_path, overrides in configs for point in points]
+
+    def build_runs(self):
+        """
+        Builds the definition of every run of the batch.
+
+        Every run is seeded with the root seed of the batch and the spawn key of its own child of the root SeedSequence,
+        so the streams of the runs keep the independence of the SeedSequence tree, and any run can be repeated alone with
+        its seed and seed_spawn_key.
+
+        Returns:
+            list: One dictionary per run with its id, config path, overrides, seed, seed spawn key and output prefix.
+        """
+        total_runs = len(self.sweep) * self.runs
+        seed_sequences = self.seed_sequence.spawn(total_runs)
+        batch_runs = []
+        for run_id, ((config_path, overrides), _) in enumerate(itertools.product(self.sweep, range(self.runs))):
+            batch_runs.append({
+                'run_id': run_id,
+                'config': config_path,
+                'stations': self.stations_path,
+                'output_dir': self.output_dir,
+                'overrides': {**self.overrides, **overrides},
+                'seed': self.seed,
+                'seed_spawn_key': list(seed_sequences[run_id].spawn_key),
+                'output_prefix': f"run_{run_id:05d}"
+            })
+        return batch_runs
+
+    def run(self):
+        """
+        Runs all the simulations of the batch and writes a manifest describing them.
+
+        Returns:
+            None
+        """
+        batch_runs = self.build_runs()
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, 'batch_manifest.json'), 'w') as file:
+            json.dump({'seed': self.seed, 'runs': batch_runs}, file, indent=4)
+
+        if self.workers == 1:
+            for batch_run in batch_runs:
+                run_batch_item(batch_run)
+            return
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for _ in executor.map(run_batch_item, batch_runs):
+                pass
+
+
+def run_batch_item(batch_run):
+    """
+    Runs a single simulation of a batch, it is executed in the worker processes.
+
+    Args:
+        batch_run (dict): The run definition, as built by BatchApp.build_runs.
+
+    Returns:
+        int: The id of the run.
+    """
+    # Independent random streams for each run, the child of the batch seed given by the spawn key
+    overrides = {**batch_run['overrides'], 'seed': batch_run['seed'], 'seed_spawn_key': batch_run['seed_spawn_key']}
+    app = App(batch_run['config'], batch_run['stations'], batch_run['output_dir'], config_overrides=overrides)
+    app.run_simulation(output_prefix=batch_run['output_prefix'])
+    return batch_run['run_id']
+
+
+def _add_common_arguments(parser, suppress_defaults=False):
     # Set default config dir
     default_config_dir = os.path.join(os.path.dirname(__file__), 'config', 'danis2022')
+    # The subcommands do not set defaults, so the values given before the subcommand are kept
+    defaults = {
+        'config': os.path.join(default_config_dir, 'config.json'),
+        'stations': os.path.join(default_config_dir, 'stations.json'),
+        'outdir': os.path.join(os.path.dirname(__file__), 'output/')
+    }
+    for name, default in defaults.items():
+        parser.add_argument(f'--{name}', default=argparse.SUPPRESS if suppress_defaults else default)
+    parser.add_argument('--seed', type=int, default=argparse.SUPPRESS if suppress_defaults else None,
+                        help='Root seed of the random streams, it replaces the one of the config file. In batch mode, the root seed of the whole batch.')
+    parser.add_argument('--no-plot', dest='no_plot', action='store_true', default=argparse.SUPPRESS if suppress_defaults else False,
+                        help='Do not plot the trajectory, it replaces the plot_trajectory field of the config file.')
+    parser.add_argument('--metrics', dest='metrics', action='store_true', default=argparse.SUPPRESS if suppress_defaults else False,
+                        help='Write the time of each phase and the counters of the run to a JSON file next to the output files.')
+    parser.add_argument('--profile', dest='profile', action='store_true', default=argparse.SUPPRESS if suppress_defaults else False,
+                        help='Profile the run with cProfile, writing the statistics next to the output files.')
+
+
+def _add_shard_arguments(parser, suppress_defaults=False):
+    # The batch command passes the shards to every run
+    parser.add_argument('--shards', type=int, default=argparse.SUPPRESS if suppress_defaults else None,
+                        help='Number of time shards whose RSSI values are generated in parallel, it replaces the shards field of the config file.')
+    parser.add_argument('--shard-workers', dest='shard_workers', type=int, default=argparse.SUPPRESS if suppress_defaults else None,
+                        help='Number of worker processes of the shards, defaults to the number of CPUs.')
+
+
+def main():
     # Load arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument(
-        '--config', default=os.path.join(default_config_dir, 'config.json'))
-    parser.add_argument(
-        '--stations', default=os.path.join(default_config_dir, 'stations.json'))
-    parser.add_argument(
-        '--outdir', default=os.path.join(os.path.dirname(__file__), 'output/'))
+    _add_common_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command')
+    batch_parser = subparsers.add_parser('batch', help='Run many independent simulations in parallel.')
+    _add_common_arguments(batch_parser, suppress_defaults=True)
+    batch_parser.add_argument('--sweep', default=None, help='Path to the sweep specification file.')
+    batch_parser.add_argument('--runs', type=int, default=1, help='Number of repetitions of each sweep combination.')
+    batch_parser.add_argument('--workers', type=int, default=None, help='Number of worker processes, defaults to the number of CPUs.')
+    parser.add_argument('--checkpoint-interval', dest='checkpoint_interval', type=float, default=None,
+                        help='Seconds between two checkpoints of the simulation state, it replaces the checkpoint_interval_seconds field of the config file.')
+    _add_shard_arguments(parser)
+    _add_shard_arguments(batch_parser, suppress_defaults=True)
+    parser.add_argument('--resume', nargs='?', const='', default=None, metavar='PREFIX',
+                        help='Continue an interrupted simulation from its checkpoint, appending to its output files. '
+                             'Without PREFIX, the most recent checkpoint of the output directory.')
+    grid_parser = subparsers.add_parser('grid', help='Generate a static radio map over a regular grid of the room.')
+    _add_common_arguments(grid_parser, suppress_defaults=True)
+    grid_parser.add_argument('--resolution', type=float, default=1.0, help='Distance in meters between two consecutive points of the grid.')
+    grid_parser.add_argument('--samples', type=int, default=1, help='Number of RSSI samples of each station at each point.')
     args = parser.parse_args()
+    # The checkpoints belong to a single simulation, the subcommands would ignore them
+    if args.command is not None:
+        for option, value in (('--checkpoint-interval', args.checkpoint_interval), ('--resume', args.resume)):
+            if value is not None:
+                parser.error(f"{option} is not supported by the {args.command} command.")
+    # The grid has no time loop to split in shards
+    if args.command == 'grid':
+        for option, value in (('--shards', args.shards), ('--shard-workers', args.shard_workers)):
+            if value is not None:
+                parser.error(f"{option} is not supported by the grid command.")
+
+    overrides = {'plot_trajectory': False} if args.no_plot else {}
+    if args.metrics:
+        overrides['metrics'] = True
+    if args.profile:
+        overrides['profile'] = True
+    if args.shards is not None:
+        overrides['shards'] = args.shards
+    if args.shard_workers is not None:
+        overrides['shard_workers'] = args.shard_workers
+    if args.command == 'batch':
+        batch = BatchApp(args.config, args.stations, args.outdir, sweep_path=args.sweep, runs=args.runs, workers=args.workers, seed=args.seed,
+                         overrides=overrides)
+        batch.run()
+        return
 
-    app = App(args.config, args.stations, args.outdir)
+    if args.seed is not None:
+        overrides['seed'] = args.seed
+    if args.checkpoint_interval is not None:
+        overrides['checkpoint_interval_seconds'] = args.checkpoint_interval
+    app = App(args.config, args.stations, args.outdir, config_overrides=overrides or None)
+    if args.command == 'grid':
+        app.run_fingerprint_grid(resolution_meters=args.resolution, samples_per_point=args.samples)
+        return
+    if args.resume is not None:
+        app.run_simulation(output_prefix=args.resume or None, resume=True)
+        return
     app.run_simulation()
 
 
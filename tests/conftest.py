@@ -0,0 +1,113 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shared setup of the tests: the repository root is added to the import path, and the fixtures create and run
+simulations of the danis2022 configuration, read their output and compare the distributions of samples.
+"""
+
+import csv
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Definimos los paths generales
+script_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(script_dir, "..")
+sys.path.append(root_dir)
+
+
+@pytest.fixture
+def config_dir():
+    """
+    The directory of the danis2022 configuration and stations.
+    """
+    return os.path.join(root_dir, "config", "danis2022")
+
+
+@pytest.fixture
+def simulation_overrides():
+    """
+    The configuration overrides of every simulation of a test module, which redefines this fixture to change them.
+    """
+    return {}
+
+
+@pytest.fixture
+def create_app(config_dir, simulation_overrides):
+    """
+    Returns a function creating the App of a simulation in an output directory, with the overrides of the module
+    replaced by the ones of the call. The trajectory is never plotted.
+    """
+    from main import App
+
+    def create(output_dir, **overrides):
+        os.makedirs(output_dir, exist_ok=True)
+        overrides = {"plot_trajectory": False, **simulation_overrides, **overrides}
+        return App(os.path.join(config_dir, "config.json"), os.path.join(config_dir, "stations.json"), str(output_dir), config_overrides=overrides)
+
+    return create
+
+
+@pytest.fixture
+def run_simulation(create_app):
+    """
+    Returns a function running a simulation with the output prefix "run" in an output directory, see create_app.
+    """
+    def run(output_dir, **overrides):
+        app = create_app(output_dir, **overrides)
+        app.run_simulation(output_prefix="run")
+        return app
+
+    return run
+
+
+@pytest.fixture
+def read_rows():
+    """
+    Returns a function reading the rows of a CSV file as dictionaries.
+    """
+    def read(filename):
+        with open(filename, newline="") as file:
+            return list(csv.DictReader(file))
+
+    return read
+
+
+@pytest.fixture
+def read_bytes():
+    """
+    Returns a function reading the content of a file.
+    """
+    def read(filename):
+        with open(filename, "rb") as file:
+            return file.read()
+
+    return read
+
+
+@pytest.fixture
+def ks_statistic():
+    """
+    Returns a function computing the two sample Kolmogorov-Smirnov statistic, the maximum distance between the
+    empirical distributions of two samples.
+    """
+    def statistic(first, second):
+        first, second = np.sort(first), np.sort(second)
+        values = np.union1d(first, second)
+        return np.max(np.abs(np.searchsorted(first, values, side='right') / len(first) - np.searchsorted(second, values, side='right') / len(second)))
+
+    return statistic
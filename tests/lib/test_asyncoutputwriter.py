@@ -0,0 +1,87 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import numpy as np
+import pytest
+
+from classes.lib.asyncoutputwriter import AsyncOutputWriter
+from classes.lib.bufferedcsvfilewriter import BufferedCsvFileWriter
+from classes.lib.outputwriterinterface import OutputWriterInterface
+
+
+class _FailingWriter(OutputWriterInterface):
+    """Writer that fails on its second block, and blocks the first one until it is released."""
+
+    def __init__(self):
+        self.enabled = True
+        self.release = threading.Event()
+        self.blocks = 0
+        self.closed = False
+
+    @property
+    def filename(self):
+        return "failing"
+
+    def write(self, line):
+        pass
+
+    def write_columns(self, columns):
+        self.release.wait()
+        self.blocks += 1
+        if self.blocks == 2:
+            raise IOError("disk full")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_async_output_matches_sync_output(tmp_path):
+    columns = [np.arange(5000), np.arange(5000) / 1000, np.linspace(0, 1, 5000)]
+    sync_writer = BufferedCsvFileWriter(str(tmp_path / "sync.csv"), buffer_bytes=1024)
+    async_writer = AsyncOutputWriter(BufferedCsvFileWriter(str(tmp_path / "async.csv"), buffer_bytes=1024), queue_size=2)
+    for writer in (sync_writer, async_writer):
+        writer.write(["step", "timestamp", "position"])
+        for start in range(0, 5000, 500):
+            writer.write_columns([column[start:start + 500] for column in columns])
+        writer.close()
+
+    with open(tmp_path / "sync.csv", "rb") as sync_file, open(tmp_path / "async.csv", "rb") as async_file:
+        assert sync_file.read() == async_file.read()
+
+
+def test_errors_are_raised_in_the_producer():
+    inner = _FailingWriter()
+    writer = AsyncOutputWriter(inner, queue_size=1)
+    writer.write_columns([[1]])
+    writer.write_columns([[2]])
+    inner.release.set()
+
+    # The failed block is reported by a later call, and the pending blocks are discarded
+    with pytest.raises(IOError):
+        for _ in range(100):
+            writer.write_columns([[3]])
+        writer.close()
+    writer.close()
+    assert inner.closed
+    assert inner.blocks == 2
+
+
+def test_queue_size_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncOutputWriter(_FailingWriter(), queue_size=0)
@@ -0,0 +1,92 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import os
+
+import numpy as np
+
+from classes.lib.bufferedcsvfilewriter import BufferedCsvFileWriter
+
+
+def _csv_module_output(path, rows):
+    with open(path, "w", newline="") as file:
+        csv.writer(file).writerows(rows)
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_bulk_formatting_matches_csv_module(tmp_path):
+    rng = np.random.default_rng(0)
+    steps = np.arange(1, 2001)
+    xs = np.round(rng.uniform(0, 20, 2000), 9)
+    ys = rng.uniform(0, 20, 2000).astype(np.float32)
+    macs = np.array(["00:00:00:00:00:01", "with,comma", 'with"quote'])[steps % 3]
+    rssi = rng.integers(-100, -30, 2000).astype(np.int8)
+
+    # Small buffer, so the rows are written to the file in many flushes
+    writer = BufferedCsvFileWriter(str(tmp_path / "bulk.csv"), buffer_bytes=4096)
+    writer.write(["step", "position_x", "position_y", "station_mac", "rssi"])
+    writer.write_columns([steps[:1000], xs[:1000], ys[:1000], macs[:1000] == macs[0], rssi[:1000]])
+    writer.write_columns([steps[1000:], xs[1000:], ys[1000:], macs[1000:], rssi[1000:]])
+    writer.write([0, 0.5, None, "", -1])
+    writer.close()
+
+    rows = [["step", "position_x", "position_y", "station_mac", "rssi"]]
+    rows += list(zip(steps[:1000].tolist(), xs[:1000].tolist(), ys[:1000].tolist(), (macs[:1000] == macs[0]).tolist(), rssi[:1000].tolist()))
+    rows += list(zip(steps[1000:].tolist(), xs[1000:].tolist(), ys[1000:].tolist(), macs[1000:].tolist(), rssi[1000:].tolist()))
+    rows += [[0, 0.5, None, "", -1]]
+    with open(tmp_path / "bulk.csv", "rb") as file:
+        assert file.read() == _csv_module_output(tmp_path / "expected.csv", rows)
+
+
+def test_list_columns_keep_the_type_of_each_value(tmp_path):
+    writer = BufferedCsvFileWriter(str(tmp_path / "types.csv"))
+    writer.write_columns([[0.0, 0.001], [2, 2.0005], np.array([3.0, 3.0])])
+    writer.close()
+
+    with open(tmp_path / "types.csv", "rb") as file:
+        assert file.read() == _csv_module_output(tmp_path / "expected.csv", [[0.0, 2, 3.0], [0.001, 2.0005, 3.0]])
+
+
+def test_disabled_writer_creates_no_file(tmp_path):
+    writer = BufferedCsvFileWriter(str(tmp_path / "disabled.csv"), enabled=False)
+    writer.write(["step"])
+    writer.write_columns([np.arange(10)])
+    writer.close()
+
+    assert not os.path.exists(tmp_path / "disabled.csv")
+
+
+def test_buffer_size_limits_the_buffered_rows(tmp_path):
+    writer = BufferedCsvFileWriter(str(tmp_path / "rows.csv"), buffer_size=2)
+    writer.write([1])
+    assert not os.path.exists(tmp_path / "rows.csv")
+    writer.write([2])
+    with open(tmp_path / "rows.csv") as file:
+        assert file.read() == "1\n2\n"
+    writer.close()
+
+
+def test_buffer_bytes_counts_the_encoded_bytes(tmp_path):
+    writer = BufferedCsvFileWriter(str(tmp_path / "bytes.csv"), buffer_bytes=10)
+    # 6 characters, but 10 bytes in UTF-8
+    writer.write(["ññññ"])
+    assert writer.flushes == 1
+    writer.write_columns([np.array(["ñ", "ñ"])])
+    assert writer.flushes == 1
+    writer.close()
+
+    with open(tmp_path / "bytes.csv", "rb") as file:
+        assert file.read() == "ññññ\r\nñ\r\nñ\r\n".encode("utf-8")
@@ -0,0 +1,70 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.lib.functionmodels import functionmodels
+from classes.models.station import Station
+from classes.models.stationtable import StationTable
+from classes.simulators.rssi.logdistance import LogDistancePathLossModel
+
+
+def test_compile_and_evaluate_builtin_models():
+    definitions = [
+        None,
+        {"function_model": "sigmoid", "params": {"a": 0.5, "b": 10}},
+        {"function_model": "exponential", "params": {"a": 0.01, "b": 0.2}},
+        {"function_model": "lineal", "params": {"a": 0.05, "b": 0.1}},
+    ]
+    compiled = [functionmodels.compile(definition) for definition in definitions]
+    codes = np.array([code for code, _ in compiled])
+    params = np.array([np.pad(values, (0, 2 - len(values)), constant_values=np.nan) for _, values in compiled])
+    distance = np.array([3.0, 4.0, 5.0, 6.0])
+
+    assert codes[0] == functionmodels.NONE
+    np.testing.assert_allclose(functionmodels.evaluate(codes, params, distance),
+                               [0, functionmodels.sigmoid(4.0, 0.5, 10), functionmodels.exponential(5.0, 0.01, 0.2), functionmodels.lineal(6.0, 0.05, 0.1)])
+    # The scalar evaluation calls the same functions
+    assert [functionmodels.evaluate_one(code, values, x) for code, values, x in zip(codes, params, distance)] == functionmodels.evaluate(codes, params, distance).tolist()
+
+
+@pytest.mark.parametrize("definition", [
+    {"function_model": "quadratic", "params": {"a": 1, "b": 2}},
+    {"params": {"a": 1, "b": 2}},
+    {"function_model": "sigmoid", "params": {"a": 1}},
+    {"function_model": "lineal"},
+])
+def test_invalid_definitions_are_rejected_when_the_station_is_built(definition):
+    with pytest.raises(ValueError):
+        Station(mac="a", x=0, y=0, frequency=100, Tx=-30, n=2, missing_packages_probability=definition)
+
+
+def test_registered_model_is_used_by_the_simulator():
+    if "step" not in functionmodels.names():
+        functionmodels.register("step", lambda x, threshold: (x > threshold).astype(float), params=("threshold",))
+    stations = StationTable([
+        {"mac": "a", "x": 0, "y": 0, "frequency": 100, "Tx": -30, "n": 2, "missing_packages_probability": {"function_model": "step", "params": {"threshold": 5}}},
+    ])
+    module = LogDistancePathLossModel()
+    positions_x = np.array([1.0, 4.0, 6.0, 9.0])
+
+    _, status = module.calculate_rssi_batch(stations=stations, station_indices=np.zeros(4, dtype=np.int64), timestamps=np.arange(4), milliseconds_per_iteration=1,
+                                            positions_x=positions_x, positions_y=np.zeros(4), speed=0)
+
+    np.testing.assert_array_equal(status == module.DROPPED, [False, False, True, True])
+    assert not module.should_miss_package(stations.stations[0], 1.0)
+    assert module.should_miss_package(stations.stations[0], 9.0)
+    with pytest.raises(ValueError):
+        functionmodels.register("step", lambda x, threshold: x)
@@ -0,0 +1,119 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import zipfile
+
+import numpy as np
+import pytest
+
+from classes.lib.outputwriterfactory import OutputWriterFactory
+from classes.simulation import Simulation
+
+
+def _write_rows(output_format, filename, row_group_size):
+    writer = OutputWriterFactory.create_writer(output_format, filename, Simulation.RSSI_COLUMNS, row_group_size=row_group_size)
+    macs = np.array(["00:00:00:00:00:01", "00:00:00:00:00:02", "00:00:00:00:00:03"])
+    timestamps = np.arange(10) * 0.1
+    writer.write_columns([timestamps, timestamps + 1, timestamps + 2, macs[np.arange(10) % 3], -np.arange(40, 50)])
+    writer.write([1.0, 2.5, 3.5, "00:00:00:00:00:04", -60])
+    writer.close()
+    return writer.filename
+
+
+@pytest.mark.parametrize("output_format", ["csv", "npz", "parquet"])
+def test_output_roundtrip(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+
+    filename = _write_rows(output_format, str(tmp_path / "rssi"), row_group_size=4)
+    data = OutputWriterFactory.read(output_format, filename)
+
+    assert filename.endswith(f".{output_format}")
+    assert list(data.keys()) == [name for name, _ in Simulation.RSSI_COLUMNS]
+    assert len(data["timestamp"]) == 11
+    np.testing.assert_allclose(data["position_y"][:10], np.arange(10) * 0.1 + 2, rtol=1e-6)
+    assert data["station_mac"].tolist()[:4] == ["00:00:00:00:00:01", "00:00:00:00:00:02", "00:00:00:00:00:03", "00:00:00:00:00:01"]
+    assert data["station_mac"][-1] == "00:00:00:00:00:04"
+    assert data["rssi"].tolist() == list(range(-40, -50, -1)) + [-60]
+
+
+def test_npz_columns_are_typed(tmp_path):
+    filename = _write_rows("npz", str(tmp_path / "rssi"), row_group_size=4)
+
+    with np.load(filename) as archive:
+        assert archive["rssi.000000"].dtype == np.int8
+        assert archive["position_x.000002"].dtype == np.float32
+        assert archive["station_mac.000000"].dtype == np.int32
+        assert archive["station_mac.dictionary"].tolist() == ["00:00:00:00:00:01", "00:00:00:00:00:02", "00:00:00:00:00:03", "00:00:00:00:00:04"]
+
+
+@pytest.mark.parametrize("output_format", ["npz", "parquet"])
+def test_append_file_streams_the_row_groups(tmp_path, monkeypatch, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    shard_filename = _write_rows(output_format, str(tmp_path / "shard"), row_group_size=4)
+    writer = OutputWriterFactory.create_writer(output_format, str(tmp_path / "rssi"), Simulation.RSSI_COLUMNS, row_group_size=4)
+
+    # The shard is never loaded whole
+    row_groups = list(type(writer).iter_row_groups(shard_filename))
+    assert [len(row_group["rssi"]) for row_group in row_groups] == [4, 4, 3]
+    with monkeypatch.context() as patch:
+        patch.setattr(type(writer), "read", staticmethod(lambda filename: pytest.fail("append_file must not load the whole file")))
+        writer.append_file(shard_filename)
+        writer.append_file(shard_filename)
+        writer.close()
+
+    data = OutputWriterFactory.read(output_format, writer.filename)
+    expected = OutputWriterFactory.read(output_format, shard_filename)
+    for name, values in expected.items():
+        assert data[name].tolist() == values.tolist() * 2
+
+
+def test_row_groups_of_uneven_blocks(tmp_path):
+    writer = OutputWriterFactory.create_writer("npz", str(tmp_path / "rssi"), Simulation.RSSI_COLUMNS, row_group_size=4)
+    start = 0
+    for rows in (3, 1, 10, 2, 5):
+        timestamps = np.arange(start, start + rows, dtype=np.float64)
+        writer.write_columns([timestamps, timestamps, timestamps, ["00:00:00:00:00:01"] * rows, np.full(rows, -50)])
+        start += rows
+    writer.close()
+
+    row_groups = list(type(writer).iter_row_groups(writer.filename))
+    assert [len(row_group["timestamp"]) for row_group in row_groups] == [4, 4, 4, 4, 4, 1]
+    assert np.concatenate([row_group["timestamp"] for row_group in row_groups]).tolist() == list(range(21))
+
+
+@pytest.mark.parametrize("rssi", [128, -129, np.nan])
+def test_integer_columns_reject_values_out_of_range(tmp_path, rssi):
+    writer = OutputWriterFactory.create_writer("npz", str(tmp_path / "rssi"), Simulation.RSSI_COLUMNS, row_group_size=4)
+    writer.write_columns([np.zeros(2), np.zeros(2), np.zeros(2), np.array(["00:00:00:00:00:01"] * 2), np.array([-60, rssi])])
+
+    with pytest.raises(ValueError, match="rssi"):
+        writer.close()
+
+
+@pytest.mark.parametrize("compression, compress_type", [(True, zipfile.ZIP_DEFLATED), (False, zipfile.ZIP_STORED)])
+def test_npz_compression(tmp_path, compression, compress_type):
+    writer = OutputWriterFactory.create_writer("npz", str(tmp_path / "rssi"), Simulation.RSSI_COLUMNS, row_group_size=4, compression=compression)
+    writer.write_columns([np.zeros(10), np.zeros(10), np.zeros(10), ["00:00:00:00:00:01"] * 10, np.full(10, -50)])
+    writer.close()
+
+    with zipfile.ZipFile(writer.filename) as archive:
+        assert {member.compress_type for member in archive.infolist()} == {compress_type}
+    assert OutputWriterFactory.read("npz", writer.filename)["rssi"].tolist() == [-50] * 10
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        OutputWriterFactory.create_writer("xlsx", "rssi", Simulation.RSSI_COLUMNS)
@@ -0,0 +1,42 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.lib.randomstreams import RandomStreams
+
+
+def test_spawned_streams_report_the_root_seed_and_their_spawn_key():
+    root = RandomStreams(1234)
+    children = root.spawn(3)
+    grandchild = children[2].spawn(2)[1]
+
+    assert root.seed == 1234 and root.spawn_key == ()
+    assert [child.seed for child in children] == [1234] * 3
+    # The first children of every hierarchy are its own streams
+    first_child = len(RandomStreams.STREAMS)
+    assert [child.spawn_key for child in children] == [(first_child,), (first_child + 1,), (first_child + 2,)]
+    assert grandchild.spawn_key == (first_child + 2, first_child + 1)
+
+
+def test_spawned_streams_are_rebuilt_from_the_seed_and_the_spawn_key():
+    child = RandomStreams(1234).spawn(3)[1].spawn(2)[0]
+    rebuilt = RandomStreams(child.seed, spawn_key=child.spawn_key)
+
+    for name in RandomStreams.STREAMS:
+        np.testing.assert_array_equal(getattr(rebuilt, name).random(5), getattr(child, name).random(5))
+    assert rebuilt.schedule_seed == child.schedule_seed
+    with pytest.raises(ValueError):
+        RandomStreams(np.random.SeedSequence(1), spawn_key=(0,))
@@ -0,0 +1,78 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from classes.lib.simulationcheckpoint import SimulationCheckpoint
+from classes.lib.stationscheduler import StationScheduler
+from classes.models.stationtable import StationTable
+from classes.simulators.trajectory.daniscemgil2017custom import DanisCemgil2017Custom
+
+
+def test_state_round_trip(tmp_path):
+    rng = np.random.default_rng(3)
+    state = {
+        "current_time": 120000,
+        "positions": np.array([[1.5, 2.5], [3.0, 4.0], [0.1, 0.2]]),
+        "nested": [{"rng": rng.bit_generator.state, "value": np.float64(0.25)}, None],
+        "timestamps": np.arange(5, dtype=np.int64),
+    }
+    filename = tmp_path / "checkpoint.npz"
+    SimulationCheckpoint.write(str(filename), state)
+    loaded = SimulationCheckpoint.read(str(filename))
+
+    assert loaded["current_time"] == 120000
+    np.testing.assert_array_equal(loaded["positions"], state["positions"])
+    assert loaded["timestamps"].dtype == np.int64
+    assert loaded["nested"][0]["rng"] == rng.bit_generator.state
+    assert loaded["nested"][0]["value"] == 0.25
+    assert loaded["nested"][1] is None
+    assert not os.path.exists(f"{filename}.tmp")
+
+
+def test_missing_checkpoint(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SimulationCheckpoint.read(str(tmp_path / "missing.npz"))
+
+
+def test_simulator_and_scheduler_states_continue_the_run(tmp_path):
+    stations = [{"mac": f"00:00:00:00:00:{index:02d}", "x": index, "y": 1, "frequency": 100 + 7 * index, "initial_timestamp": index} for index in range(5)]
+    parameters = dict(milliseconds_per_iteration=1, min_x=0.5, max_x=9.5, min_y=0.5, max_y=9.5, speed=1.0)
+
+    simulator = DanisCemgil2017Custom(rng=np.random.default_rng(5))
+    table = StationTable(stations)
+    scheduler = StationScheduler(table)
+    x, y, angle = simulator.calculate_positions(start_time=1, steps=1000, last_angle=0.3, last_x=5, last_y=5, **parameters)
+    scheduler.pop_events(0, 1000)
+    filename = str(tmp_path / "checkpoint.npz")
+    SimulationCheckpoint.write(filename, {"simulator": simulator.get_state(), "stations": table.get_state(), "scheduler": scheduler.get_state()})
+    expected_positions = simulator.calculate_positions(start_time=1001, steps=1000, last_angle=angle[-1], last_x=x[-1], last_y=y[-1], **parameters)
+    expected_events = scheduler.pop_events(1000, 2000)
+
+    state = SimulationCheckpoint.read(filename)
+    resumed_simulator = DanisCemgil2017Custom(rng=np.random.default_rng(99))
+    resumed_simulator.set_state(state["simulator"])
+    resumed_table = StationTable(stations)
+    resumed_table.set_state(state["stations"])
+    resumed_scheduler = StationScheduler(resumed_table)
+    resumed_scheduler.set_state(state["scheduler"])
+
+    positions = resumed_simulator.calculate_positions(start_time=1001, steps=1000, last_angle=angle[-1], last_x=x[-1], last_y=y[-1], **parameters)
+    for values, expected_values in zip(positions, expected_positions):
+        np.testing.assert_array_equal(values, expected_values)
+    assert resumed_scheduler.pop_events(1000, 2000) == expected_events
+    np.testing.assert_array_equal(resumed_table.last_transmission_timestamp, table.last_transmission_timestamp)
@@ -0,0 +1,75 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from classes.lib.trajectoryplotter import TrajectoryPlotter
+from classes.models.station import Station
+
+
+def _add_in_blocks(plotter, total, block_sizes):
+    timestamps = np.arange(total, dtype=float)
+    start = 0
+    for size in block_sizes:
+        plotter.add(timestamps[start:start + size], timestamps[start:start + size], -timestamps[start:start + size])
+        start += size
+    assert start == total
+
+
+def test_decimation_is_bounded_and_independent_of_blocks():
+    total = 12345
+    single = TrajectoryPlotter(max_points=100)
+    _add_in_blocks(single, total, [total])
+    blocks = TrajectoryPlotter(max_points=100)
+    sizes = [1, 7, 500, 3, 2000] + [1000] * 9 + [834]
+    _add_in_blocks(blocks, total, sizes)
+
+    assert len(single) <= 100
+    assert single.stride == blocks.stride
+    for single_values, blocks_values in zip(single.points(), blocks.points()):
+        np.testing.assert_array_equal(single_values, blocks_values)
+
+    # Evenly spaced points, closed with the last received one
+    timestamps, xs, ys = single.points()
+    assert np.all(np.diff(timestamps[:-1]) == single.stride)
+    assert timestamps[0] == 0 and timestamps[-1] == total - 1
+    np.testing.assert_array_equal(xs, timestamps)
+    np.testing.assert_array_equal(ys, -timestamps)
+
+
+def test_short_trajectory_keeps_every_point():
+    plotter = TrajectoryPlotter(max_points=100)
+    _add_in_blocks(plotter, 50, [20, 30])
+    assert plotter.stride == 1
+    assert len(plotter.points()[0]) == 50
+
+
+def test_invalid_max_points():
+    with pytest.raises(ValueError):
+        TrajectoryPlotter(max_points=1)
+
+
+def test_plot_writes_configured_formats(tmp_path):
+    plotter = TrajectoryPlotter(max_points=50, formats=['png'])
+    _add_in_blocks(plotter, 1000, [400, 600])
+    stations = [Station("00:00:00:00:00:01", 1, 1, 100)]
+
+    filenames = plotter.plot(str(tmp_path / "trajectory_plot"), stations, dim_x=10, dim_y=10, min_x=1, max_x=9, min_y=1, max_y=9)
+
+    assert filenames == [str(tmp_path / "trajectory_plot.png")]
+    assert os.path.getsize(filenames[0]) > 0
+    assert not os.path.exists(tmp_path / "trajectory_plot.eps")
@@ -0,0 +1,65 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.lib.trajectorysampler import TrajectorySampler
+
+
+def _trajectory(points=1000):
+    # Straight segments of 250 steps with a heading change between them, 1 mm per step
+    headings = np.repeat([0.0, np.pi / 2, np.pi, np.pi / 2], points // 4)
+    xs = np.concatenate(([0.0], np.cumsum(np.cos(headings[:-1]) * 0.001)))
+    ys = np.concatenate(([0.0], np.cumsum(np.sin(headings[:-1]) * 0.001)))
+    steps = np.arange(1, points + 1)
+    return steps, steps - 1, xs, ys, headings
+
+
+def _sample(sampler, trajectory, block_size):
+    selected = []
+    for start in range(0, len(trajectory[0]), block_size):
+        block = [values[start:start + block_size] for values in trajectory]
+        selected.extend(block[0][sampler.sample(*block)].tolist())
+    last_point = sampler.finish()
+    if last_point is not None:
+        selected.append(int(last_point[0]))
+    return selected
+
+
+@pytest.mark.parametrize("parameters", [{"mode": "interval", "interval_ms": 100}, {"mode": "distance", "distance_meters": 0.03}, {"mode": "heading"}])
+def test_selection_does_not_depend_on_blocks(parameters):
+    trajectory = _trajectory()
+    whole = _sample(TrajectorySampler(**parameters), trajectory, 1000)
+    blocks = _sample(TrajectorySampler(**parameters), trajectory, 77)
+
+    assert whole == blocks
+    assert whole[0] == 1 and whole[-1] == 1000
+
+
+def test_sampling_modes():
+    trajectory = _trajectory()
+
+    assert _sample(TrajectorySampler("interval", interval_ms=250), trajectory, 100) == [1, 251, 501, 751, 1000]
+    # A point every 30 travelled steps of 1 mm
+    assert _sample(TrajectorySampler("distance", distance_meters=0.03), trajectory, 100)[:3] == [1, 31, 61]
+    # The vertices of the trajectory, where the heading leaving the point changes
+    assert _sample(TrajectorySampler("heading"), trajectory, 100) == [1, 251, 501, 751, 1000]
+
+
+def test_invalid_sampling():
+    with pytest.raises(ValueError):
+        TrajectorySampler("random")
+    with pytest.raises(ValueError):
+        TrajectorySampler("distance", distance_meters=0)
@@ -0,0 +1,114 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.lib.stationscheduler import StationScheduler
+from classes.lib.transmissionschedule import next_transmission_timestamp, transmission_events
+from classes.models.stationtable import StationTable
+
+
+def _table(**clock):
+    return StationTable([
+        {"mac": "00:00:00:00:00:01", "x": 1, "y": 1, "frequency": 315, "initial_timestamp": 0, **clock},
+        {"mac": "00:00:00:00:00:02", "x": 2, "y": 1, "frequency": 200, "initial_timestamp": 0, **clock},
+        {"mac": "00:00:00:00:00:03", "x": 3, "y": 1, "frequency": 0, "initial_timestamp": 0},
+        {"mac": "00:00:00:00:00:04", "x": 4, "y": 1, "frequency": 100, "initial_timestamp": -250, **clock},
+        {"mac": "00:00:00:00:00:05", "x": 5, "y": 1, "frequency": 455, "initial_timestamp": 1000, **clock},
+    ])
+
+
+def _windows(table, bounds, seed):
+    events = [transmission_events(table, start, end, milliseconds_per_iteration=10, seed=seed) for start, end in zip(bounds[:-1], bounds[1:])]
+    return (np.concatenate([event[0] for event in events]), np.concatenate([event[1] for event in events]))
+
+
+def test_events_follow_the_frequency_of_the_stations():
+    timestamps, indexes = transmission_events(_table(), 0, 1000, milliseconds_per_iteration=10)
+
+    np.testing.assert_array_equal(timestamps[indexes == 0], [315, 630, 945])
+    np.testing.assert_array_equal(timestamps[indexes == 2], np.arange(0, 1000, 10))
+    # The transmissions before the start of the simulation happen at its start
+    np.testing.assert_array_equal(timestamps[indexes == 3], np.arange(0, 1000, 100))
+    assert not np.any(indexes == 4)
+    # Sorted by timestamp and station definition order
+    assert np.all(np.diff(timestamps) >= 0)
+    ties = np.diff(timestamps) == 0
+    assert np.all(np.diff(indexes)[ties] > 0)
+
+
+def test_clock_drift_stretches_the_period():
+    table = _table(clock_drift_ppm=1000)
+    timestamps, indexes = transmission_events(table, 0, 10000, milliseconds_per_iteration=10)
+
+    # 1000 ppm adds 0.2 ms to each period of 200 ms, rounded to the millisecond
+    expected = np.floor(200 + np.arange(49) * 200.2 + 0.5).astype(np.int64)
+    np.testing.assert_array_equal(timestamps[indexes == 1], expected)
+    # The stations without clock settings are not affected
+    np.testing.assert_array_equal(timestamps[indexes == 2], np.arange(0, 10000, 10))
+
+
+def test_clock_jitter_is_bounded_and_depends_on_the_seed():
+    table = _table(clock_jitter_ms=20)
+    timestamps, indexes = transmission_events(table, 0, 10000, milliseconds_per_iteration=10, seed=1)
+    other_timestamps, _ = transmission_events(table, 0, 10000, milliseconds_per_iteration=10, seed=2)
+
+    # Far from the end of the window, whose neighbouring transmissions may move in or out of it
+    deviations = timestamps[indexes == 1][:45] - np.arange(200, 9200, 200)
+    assert np.all(np.abs(deviations) <= 20)
+    assert np.std(deviations) > 5
+    np.testing.assert_array_equal(timestamps, transmission_events(table, 0, 10000, milliseconds_per_iteration=10, seed=1)[0])
+    assert not np.array_equal(timestamps, other_timestamps)
+
+
+@pytest.mark.parametrize("clock", [{}, {"clock_jitter_ms": 30}, {"clock_drift_ppm": -2500, "clock_jitter_ms": 7.5}])
+def test_windows_split_the_events_without_losing_or_repeating_them(clock):
+    table = _table(**clock)
+    timestamps, indexes = transmission_events(table, 0, 20000, milliseconds_per_iteration=10, seed=4)
+    window_timestamps, window_indexes = _windows(table, [0, 1, 333, 4000, 4007, 12345, 20000], seed=4)
+
+    np.testing.assert_array_equal(window_timestamps, timestamps)
+    np.testing.assert_array_equal(window_indexes, indexes)
+
+
+@pytest.mark.parametrize("clock", [{}, {"clock_jitter_ms": 30}, {"clock_drift_ppm": -2500, "clock_jitter_ms": 7.5}, {"clock_jitter_ms": 400}])
+def test_next_transmission_is_the_first_event_of_the_window(clock):
+    table = _table(**clock)
+    timestamps, _ = transmission_events(table, 0, 25000, milliseconds_per_iteration=10, seed=4)
+
+    for start_time in range(0, 20000, 37):
+        expected = timestamps[timestamps >= start_time][0]
+        assert next_transmission_timestamp(table, start_time, milliseconds_per_iteration=10, seed=4) == expected
+    assert next_transmission_timestamp(StationTable([]), 0) is None
+
+
+def test_exact_scheduler_uses_the_clock_of_the_stations():
+    table = _table(clock_drift_ppm=300, clock_jitter_ms=12)
+    expected = transmission_events(table, 0, 5000, milliseconds_per_iteration=10, seed=9)
+    scheduler = StationScheduler(_table(clock_drift_ppm=300, clock_jitter_ms=12), milliseconds_per_iteration=10, seed=9)
+
+    assert scheduler.next_transmission_timestamp == expected[0][0]
+    blocks = [scheduler.pop_event_arrays(start, min(start + 640, 5000)) for start in range(0, 5000, 640)]
+    np.testing.assert_array_equal(np.concatenate([block[0] for block in blocks]), expected[0])
+    np.testing.assert_array_equal(np.concatenate([block[1] for block in blocks]), expected[1])
+    last = [expected[0][expected[1] == index][-1] for index in range(4)]
+    np.testing.assert_array_equal(scheduler.station_table.last_transmission_timestamp[:4], last)
+
+
+def test_invalid_clock_settings():
+    with pytest.raises(ValueError):
+        _table(clock_jitter_ms=-1)
+    with pytest.raises(ValueError):
+        _table(clock_drift_ppm=-1e6)
@@ -0,0 +1,80 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.lib.functionmodels import functionmodels
+from classes.models.station import Station
+from classes.models.stationtable import StationTable
+
+definitions = [
+    {"mac": "00:00:00:00:00:00", "x": 0, "y": 0, "frequency": 300, "initial_timestamp": 15, "Tx": -30, "n": 4.5, "noise_std_dev": 2,
+     "missing_packages_probability": {"function_model": "sigmoid", "params": {"a": 0.5, "b": 10}}},
+    {"mac": "00:00:00:00:00:01", "x": 15, "y": 15, "frequency": 200},
+]
+
+
+def test_station_views():
+    table = StationTable(definitions)
+    first, second = table.stations
+
+    assert (first.mac, first.x, first.y, first.frequency, first.Tx, first.n, first.noise_std_dev) == ("00:00:00:00:00:00", 0.0, 0.0, 300, -30.0, 4.5, 2.0)
+    assert first.missing_packages_probability == definitions[0]["missing_packages_probability"]
+    assert (second.Tx, second.n, second.missing_packages_probability) == (None, None, None)
+    np.testing.assert_array_equal(table.miss_model, [functionmodels.compile(definitions[0]["missing_packages_probability"])[0], StationTable.MISS_MODEL_NONE])
+    np.testing.assert_array_equal(table.miss_params[0], [0.5, 10])
+
+    # The schedule is stored in the table
+    assert first.next_transmission_timestamp == 315
+    first.last_transmission_timestamp = 400
+    assert table.next_transmission_timestamp[0] == 700
+
+
+def test_from_stations():
+    table = StationTable(definitions)
+    assert StationTable.from_stations(table.stations) is table
+
+    stations = [Station(**definition) for definition in definitions]
+    stations[1].last_transmission_timestamp = 50
+    table = StationTable.from_stations(stations)
+    assert table.stations == stations
+    assert all(station.table is table for station in stations)
+    np.testing.assert_array_equal(table.next_transmission_timestamp, [315, 250])
+
+
+def test_invalid_definition():
+    with pytest.raises(TypeError):
+        StationTable([{"mac": "a", "x": 0, "y": 0, "frequency": 1, "unknown": 1}])
+
+
+def test_many_registered_models(monkeypatch):
+    # Registry restored after the test
+    monkeypatch.setattr(functionmodels, "_registry", dict(functionmodels._registry))
+    monkeypatch.setattr(functionmodels, "_by_code", list(functionmodels._by_code))
+    for number in range(300):
+        code = functionmodels.register(f"model_{number}", functionmodels.lineal)
+
+    table = StationTable([{**definitions[0], "missing_packages_probability": {"function_model": "model_299", "params": {"a": 0, "b": 1}}}])
+    assert table.miss_model[0] == code > 255
+
+
+@pytest.mark.parametrize("field", ["frequency", "initial_timestamp"])
+def test_fractional_milliseconds_are_rejected(field):
+    # Whole floats are accepted
+    table = StationTable([{**definitions[0], field: 600.0}])
+    assert getattr(table, field)[0] == 600
+    for value in (600.5, True, "600"):
+        with pytest.raises(ValueError, match=field):
+            StationTable([{**definitions[0], field: value}])
@@ -0,0 +1,114 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from classes.lib.pathlosslookuptable import PathLossLookupTable
+from classes.models.stationtable import StationTable
+from classes.simulators.rssi.logdistance import LogDistancePathLossModel
+
+
+def _build_stations():
+    return StationTable([
+        {"mac": "a", "x": 0.5, "y": 0.5, "frequency": 100, "Tx": -30, "n": 4.5},
+        {"mac": "b", "x": 7.3, "y": 4.1, "frequency": 200, "Tx": -45, "n": 2,
+         "missing_packages_probability": {"function_model": "sigmoid", "params": {"a": 0.8, "b": 6}}},
+        {"mac": "c", "x": 9.95, "y": 9.95, "frequency": 200, "Tx": -50, "n": 3,
+         "missing_packages_probability": {"function_model": "lineal", "params": {"a": 0.05, "b": 0}}},
+    ])
+
+
+def _random_positions(size, seed=0):
+    generator = np.random.default_rng(seed)
+    return (generator.integers(0, 3, size), generator.uniform(-1, 11, size), generator.uniform(-1, 11, size))
+
+
+@pytest.mark.parametrize("resolution", [0.2, 0.05])
+def test_interpolation_error_is_within_the_declared_bound(resolution):
+    stations = _build_stations()
+    module = LogDistancePathLossModel(lookup_resolution_meters=resolution)
+    module.prepare(stations, 10, 10)
+    table = module.lookup_table
+    station_indices, xs, ys = _random_positions(200000)
+
+    mean_rssi, miss_probability, exact = table.lookup(station_indices, xs, ys)
+    expected_rssi, expected_probability = module.path_loss_terms(stations, station_indices, xs, ys)
+
+    # Out of the room or close to the station the exact formulas are used
+    outside = (xs < 0) | (xs > 10) | (ys < 0) | (ys > 10)
+    assert exact[outside].all()
+    distance = np.hypot(stations.x[station_indices] - xs, stations.y[station_indices] - ys)
+    assert exact[distance < table.exact_radius_meters].all()
+    assert not exact[~outside & (distance > table.exact_radius_meters + 2 * resolution)].any()
+    assert table.max_rssi_error < 0.25
+    assert np.abs(mean_rssi - expected_rssi)[~exact].max() <= table.max_rssi_error + 1e-4
+    assert np.abs(miss_probability - expected_probability)[~exact].max() <= table.max_miss_probability_error + 1e-4
+
+
+def test_batch_with_table_matches_the_exact_batch():
+    stations = _build_stations()
+    station_indices, xs, ys = _random_positions(5000, seed=1)
+    results = []
+    for lookup_resolution_meters in (None, 0.02):
+        module = LogDistancePathLossModel(lookup_resolution_meters=lookup_resolution_meters, noise_rng=np.random.default_rng(5), loss_rng=np.random.default_rng(6))
+        module.prepare(stations, 10, 10)
+        results.append(module.calculate_rssi_batch(stations=stations, station_indices=station_indices, timestamps=np.arange(5000), milliseconds_per_iteration=1,
+                                                   positions_x=xs, positions_y=ys, speed=0))
+
+    (exact_rssi, exact_status), (table_rssi, table_status) = results
+    # Only the roundings and draws at the interpolation error boundary may differ
+    assert np.mean(exact_status != table_status) < 0.01
+    assert np.abs(exact_rssi - table_rssi).max() <= 1
+
+
+def test_table_is_saved_and_memory_mapped(tmp_path):
+    stations = _build_stations()
+    cache_dir = str(tmp_path / "cache")
+    built = LogDistancePathLossModel(lookup_resolution_meters=0.1, lookup_cache_dir=cache_dir)
+    built.prepare(stations, 10, 10)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # Another process only finds the saved table
+    LogDistancePathLossModel._lookup_tables.clear()
+    loaded = LogDistancePathLossModel(lookup_resolution_meters=0.1, lookup_cache_dir=cache_dir)
+    loaded.prepare(stations, 10, 10)
+    assert isinstance(loaded.lookup_table.values, np.memmap)
+    assert loaded.lookup_table.metadata == built.lookup_table.metadata
+    station_indices, xs, ys = _random_positions(1000)
+    for built_values, loaded_values in zip(built.lookup_table.lookup(station_indices, xs, ys), loaded.lookup_table.lookup(station_indices, xs, ys)):
+        np.testing.assert_array_equal(built_values, loaded_values)
+
+    # Other stations build a new table
+    moved = LogDistancePathLossModel(lookup_resolution_meters=0.1, lookup_cache_dir=cache_dir)
+    moved.prepare(StationTable([{"mac": "a", "x": 1, "y": 1, "frequency": 100, "Tx": -30, "n": 4.5}]), 10, 10)
+    assert len(os.listdir(cache_dir)) == 2
+    assert moved.lookup_table.fingerprint != built.lookup_table.fingerprint
+
+
+def test_invalid_resolution():
+    with pytest.raises(ValueError):
+        PathLossLookupTable.build(lambda indices, xs, ys: (xs, ys), [0], [0], 0, 1, 0, 1, 0)
+
+
+def test_simulation_with_lookup_table(tmp_path, run_simulation):
+    overrides = {"simulation_duration_seconds": 5, "output_trajectory": False, "seed": 1,
+                 "simulators": {"trajectory": "daniscemgil2017custom", "trajectory_parameters": {},
+                                "rssi": "logdistance", "rssi_parameters": {"logdistance": {"lookup_resolution_meters": 0.05}}}}
+    run_simulation(tmp_path, **overrides)
+
+    with open(os.path.join(tmp_path, "run_rssi.csv"), "r") as file:
+        assert len(file.readlines()) > 1
@@ -0,0 +1,77 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.models.stationtable import StationTable
+from classes.simulators.rssi.factory import RssiFactory
+from classes.simulators.rssi.interface import RssiInterface
+
+
+def _build_stations(noise_std_dev=0, missing_packages_probability=None):
+    return StationTable([
+        {"mac": "a", "x": 0, "y": 0, "frequency": 100, "Tx": -30, "n": 4.5, "noise_std_dev": noise_std_dev, "missing_packages_probability": missing_packages_probability},
+        {"mac": "b", "x": 15, "y": 15, "frequency": 200, "Tx": -45, "n": 2, "noise_std_dev": noise_std_dev, "missing_packages_probability": missing_packages_probability},
+    ])
+
+
+def _random_packages(size, seed=0):
+    generator = np.random.default_rng(seed)
+    return (generator.integers(0, 2, size), np.arange(size), generator.uniform(0, 20, size), generator.uniform(0, 20, size))
+
+
+def test_batch_matches_scalar_without_noise():
+    stations = _build_stations()
+    module = RssiFactory.create_rssi_simulator('logdistance')
+    station_indices, timestamps, xs, ys = _random_packages(2000)
+    # Include a package received exactly at the station position
+    xs[0], ys[0], station_indices[0] = 0, 0, 0
+
+    rssi, status = module.calculate_rssi_batch(stations=stations, station_indices=station_indices, timestamps=timestamps, milliseconds_per_iteration=1,
+                                               positions_x=xs, positions_y=ys, speed=0)
+
+    for i in range(len(station_indices)):
+        expected = module.calculate_rssi(station=stations.stations[station_indices[i]], current_time=timestamps[i], milliseconds_per_iteration=1,
+                                         current_x=xs[i], current_y=ys[i], speed=0)
+        if expected is None:
+            assert status[i] == RssiInterface.BELOW_THRESHOLD
+        else:
+            assert status[i] == RssiInterface.RECEIVED
+            assert rssi[i] == expected
+
+
+def test_batch_missing_packages_probability():
+    stations = _build_stations(missing_packages_probability={"function_model": "lineal", "params": {"a": 0, "b": 0.3}})
+    module = RssiFactory.create_rssi_simulator('logdistance')
+    station_indices, timestamps, _, _ = _random_packages(20000)
+    positions = np.full(len(station_indices), 1.0)
+
+    _, status = module.calculate_rssi_batch(stations=stations, station_indices=station_indices, timestamps=timestamps, milliseconds_per_iteration=1,
+                                            positions_x=positions, positions_y=positions, speed=0)
+
+    # Continuous probability, the same as the scalar implementation
+    assert np.mean(status == RssiInterface.DROPPED) == pytest.approx(0.3, abs=0.02)
+
+
+def test_default_batch_implementation():
+    stations = _build_stations()
+    module = RssiFactory.create_rssi_simulator('dummy')
+    station_indices, timestamps, xs, ys = _random_packages(100)
+
+    rssi, status = module.calculate_rssi_batch(stations=stations, station_indices=station_indices, timestamps=timestamps, milliseconds_per_iteration=1,
+                                               positions_x=xs, positions_y=ys, speed=0)
+
+    assert np.all(status == RssiInterface.RECEIVED)
+    assert np.all((rssi >= -100) & (rssi <= 0))
@@ -0,0 +1,45 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+# Output of the original simulation loop, which wrote every row with the csv module, for a deterministic trajectory
+# (no random rotation, heading 0) and stations without noise, starting at the integer position (2, 3)
+baseline_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_files", "baseline")
+
+CUSTOM_SIMULATORS = {"trajectory": "daniscemgil2017custom", "trajectory_parameters": {"daniscemgil2017custom": {"s": 0}},
+                     "rssi": "logdistance", "rssi_parameters": {}}
+
+
+@pytest.fixture
+def config_dir():
+    return baseline_dir
+
+
+@pytest.mark.parametrize("overrides", [{}, {"output_async": True}, {"simulators": CUSTOM_SIMULATORS}])
+def test_csv_output_matches_the_baseline(tmp_path, run_simulation, read_bytes, overrides):
+    run_simulation(tmp_path, **overrides)
+
+    assert read_bytes(tmp_path / "run_rssi.csv") == read_bytes(os.path.join(baseline_dir, "rssi.csv"))
+    assert read_bytes(tmp_path / "run_trajectory.csv") == read_bytes(os.path.join(baseline_dir, "trajectory.csv"))
+
+
+@pytest.mark.parametrize("shards", [1, 2])
+def test_segments_rssi_output_matches_the_baseline(tmp_path, run_simulation, read_bytes, shards):
+    # Without trajectory output the custom simulator generates segments, in the loop or in the shards
+    run_simulation(tmp_path, simulators=CUSTOM_SIMULATORS, output_trajectory=False, shards=shards, shard_workers=1)
+
+    assert read_bytes(tmp_path / "run_rssi.csv") == read_bytes(os.path.join(baseline_dir, "rssi.csv"))
@@ -0,0 +1,118 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import pytest
+
+from main import BatchApp
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 3, "output_trajectory": False}
+
+
+@pytest.fixture
+def create_batch(config_dir, simulation_overrides):
+    def create(output_dir, sweep=None, **kwargs):
+        sweep_path = None
+        if sweep is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            sweep_path = os.path.join(output_dir, "sweep.json")
+            with open(sweep_path, "w") as file:
+                json.dump(sweep, file)
+        overrides = {"plot_trajectory": False, **simulation_overrides}
+        return BatchApp(os.path.join(config_dir, "config.json"), os.path.join(config_dir, "stations.json"), str(output_dir), sweep_path=sweep_path,
+                        overrides=overrides, **kwargs)
+
+    return create
+
+
+@pytest.fixture
+def read_outputs(read_bytes):
+    def read(output_dir):
+        return {name: read_bytes(os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir))}
+
+    return read
+
+
+def test_sweep_expands_configs_grid_and_runs(tmp_path, config_dir, create_batch):
+    sweep = {
+        "configs": ["other_config.json", {"output_trajectory": True}],
+        "grid": {"speed_meters_second": [0.35, 0.5], "initial_position.x": [2, 10]},
+    }
+    batch_runs = create_batch(tmp_path, sweep, runs=3, seed=1).build_runs()
+
+    assert len(batch_runs) == 2 * 4 * 3
+    assert [batch_run["run_id"] for batch_run in batch_runs] == list(range(24))
+    # Every config with every grid point, each one repeated runs times
+    assert [batch_run["config"] for batch_run in batch_runs[:12]] == [os.path.join(str(tmp_path), "other_config.json")] * 12
+    assert [batch_run["config"] for batch_run in batch_runs[12:]] == [os.path.join(config_dir, "config.json")] * 12
+    points = [(batch_run["overrides"]["speed_meters_second"], batch_run["overrides"]["initial_position.x"]) for batch_run in batch_runs[:12]]
+    assert points == [(0.35, 2)] * 3 + [(0.35, 10)] * 3 + [(0.5, 2)] * 3 + [(0.5, 10)] * 3
+    # The overrides of the sweep replace the ones of the batch
+    assert all(batch_run["overrides"]["output_trajectory"] is False for batch_run in batch_runs[:12])
+    assert all(batch_run["overrides"]["output_trajectory"] is True for batch_run in batch_runs[12:])
+    assert all(batch_run["overrides"]["simulation_duration_seconds"] == 3 for batch_run in batch_runs)
+
+
+def test_invalid_sweeps(tmp_path, config_dir, create_batch):
+    with pytest.raises(FileNotFoundError):
+        BatchApp(os.path.join(config_dir, "config.json"), os.path.join(config_dir, "stations.json"), str(tmp_path), sweep_path=str(tmp_path / "missing.json"))
+    with pytest.raises(ValueError):
+        create_batch(tmp_path / "grid", {"grid": {"speed_meters_second": []}})
+    with pytest.raises(ValueError):
+        create_batch(tmp_path / "configs", {"configs": [1]})
+    with pytest.raises(ValueError):
+        create_batch(tmp_path / "runs", runs=0)
+
+
+def test_run_prefixes_and_seeds_are_deterministic(tmp_path, create_batch):
+    batch_runs = create_batch(tmp_path, {"grid": {"speed_meters_second": [0.35, 0.5]}}, runs=2, seed=7).build_runs()
+    same_runs = create_batch(tmp_path, {"grid": {"speed_meters_second": [0.35, 0.5]}}, runs=2, seed=7).build_runs()
+    other_runs = create_batch(tmp_path, {"grid": {"speed_meters_second": [0.35, 0.5]}}, runs=2, seed=8).build_runs()
+
+    assert batch_runs == same_runs
+    assert [batch_run["output_prefix"] for batch_run in batch_runs] == ["run_00000", "run_00001", "run_00002", "run_00003"]
+    # The runs are the children of the root seed
+    assert [batch_run["seed"] for batch_run in batch_runs] == [7] * 4
+    assert [batch_run["seed_spawn_key"] for batch_run in batch_runs] == [[0], [1], [2], [3]]
+    assert [batch_run["seed"] for batch_run in other_runs] == [8] * 4
+
+
+def test_batches_with_the_same_seed_give_the_same_output(tmp_path, create_batch, read_outputs, create_app, read_bytes):
+    sweep = {"grid": {"speed_meters_second": [0.35, 0.5]}}
+    create_batch(tmp_path / "first", sweep, runs=2, seed=3, workers=1).run()
+    create_batch(tmp_path / "second", sweep, runs=2, seed=3, workers=2).run()
+
+    first = read_outputs(tmp_path / "first")
+    second = read_outputs(tmp_path / "second")
+    assert first.keys() == second.keys()
+    # The manifests only differ by the output directory
+    first_manifest, second_manifest = (json.loads(outputs.pop("batch_manifest.json")) for outputs in (first, second))
+    for manifest in (first_manifest, second_manifest):
+        for batch_run in manifest["runs"]:
+            batch_run.pop("output_dir")
+    assert first_manifest == second_manifest
+    assert first == second
+    # The repetitions of the same combination draw from different streams
+    assert first["run_00000_rssi.csv"] != first["run_00001_rssi.csv"]
+
+    # A run is repeated alone with the seed and spawn key of the manifest
+    batch_run = first_manifest["runs"][1]
+    overrides = {**batch_run["overrides"], "seed": batch_run["seed"], "seed_spawn_key": batch_run["seed_spawn_key"]}
+    create_app(tmp_path / "alone", **overrides).run_simulation(output_prefix="alone")
+    assert read_bytes(tmp_path / "alone" / "alone_rssi.csv") == first["run_00001_rssi.csv"]
@@ -0,0 +1,113 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import pytest
+
+from classes.lib.stationscheduler import StationScheduler
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 60, "seed": 11}
+
+
+def _interrupt_after_blocks(monkeypatch, blocks):
+    # The run is killed while generating the transmissions of a block
+    pop_event_arrays = StationScheduler.pop_event_arrays
+    calls = []
+
+    def interrupted_pop_event_arrays(self, start_time, end_time):
+        calls.append(start_time)
+        if len(calls) > blocks:
+            raise KeyboardInterrupt
+        return pop_event_arrays(self, start_time, end_time)
+
+    monkeypatch.setattr(StationScheduler, "pop_event_arrays", interrupted_pop_event_arrays)
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"trajectory_sampling": {"mode": "heading"}},
+    {"trajectory_sampling": {"mode": "distance", "distance_meters": 1}},
+    {"devices": 3},
+    {"output_async": True},
+    {"output_trajectory": False},
+])
+def test_resumed_run_matches_the_uninterrupted_run(tmp_path, monkeypatch, run_simulation, create_app, read_bytes, overrides):
+    run_simulation(tmp_path / "reference", **overrides)
+
+    with monkeypatch.context() as patch:
+        _interrupt_after_blocks(patch, 3)
+        with pytest.raises(KeyboardInterrupt):
+            run_simulation(tmp_path / "resumed", checkpoint_interval_seconds=1e-9, **overrides)
+    assert os.path.exists(tmp_path / "resumed" / "run_checkpoint.npz")
+
+    create_app(tmp_path / "resumed", checkpoint_interval_seconds=1e-9, **overrides).run_simulation(output_prefix="run", resume=True)
+
+    outputs = ["run_rssi.csv"] + ([] if overrides.get("output_trajectory") is False else ["run_trajectory.csv"])
+    for output in outputs:
+        assert read_bytes(tmp_path / "resumed" / output) == read_bytes(tmp_path / "reference" / output)
+    assert not os.path.exists(tmp_path / "resumed" / "run_checkpoint.npz")
+
+
+def test_resume_without_prefix_uses_the_latest_checkpoint(tmp_path, monkeypatch, run_simulation, create_app, read_bytes):
+    run_simulation(tmp_path / "reference")
+    with monkeypatch.context() as patch:
+        _interrupt_after_blocks(patch, 2)
+        with pytest.raises(KeyboardInterrupt):
+            run_simulation(tmp_path / "resumed", checkpoint_interval_seconds=1e-9)
+
+    app = create_app(tmp_path / "resumed")
+    assert app.latest_checkpoint_prefix() == "run"
+    app.run_simulation(resume=True)
+    assert read_bytes(tmp_path / "resumed" / "run_rssi.csv") == read_bytes(tmp_path / "reference" / "run_rssi.csv")
+
+
+def test_resume_errors(tmp_path, monkeypatch, run_simulation, create_app):
+    with pytest.raises(FileNotFoundError):
+        create_app(tmp_path).run_simulation(output_prefix="run", resume=True)
+    with pytest.raises(FileNotFoundError):
+        create_app(tmp_path).run_simulation(resume=True)
+
+    with monkeypatch.context() as patch:
+        _interrupt_after_blocks(patch, 1)
+        with pytest.raises(KeyboardInterrupt):
+            run_simulation(tmp_path, checkpoint_interval_seconds=1e-9)
+    # The checkpoint belongs to a single device simulation
+    with pytest.raises(ValueError):
+        create_app(tmp_path, devices=2).run_simulation(output_prefix="run", resume=True)
+
+
+@pytest.mark.parametrize("interval, checkpoints", [(1e-9, 6), (3600, 0)])
+def test_checkpoints_are_written_at_the_interval(tmp_path, run_simulation, interval, checkpoints):
+    run_simulation(tmp_path, checkpoint_interval_seconds=interval, metrics=True)
+    with open(tmp_path / "run_metrics.json") as file:
+        counters = json.load(file)["counters"]
+    # One checkpoint at the end of each block of 10 seconds at most
+    assert counters["checkpoints"] == checkpoints
+    assert not os.path.exists(tmp_path / "run_checkpoint.npz")
+
+
+@pytest.mark.parametrize("overrides", [
+    {"checkpoint_interval_seconds": -1},
+    {"checkpoint_interval_seconds": True},
+    {"checkpoint_interval_seconds": "60"},
+    {"checkpoint_interval_seconds": 60, "output_format": "npz"},
+])
+def test_invalid_checkpoint_configuration(tmp_path, create_app, overrides):
+    with pytest.raises(ValueError):
+        create_app(tmp_path, **overrides)
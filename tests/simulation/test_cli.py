@@ -0,0 +1,59 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+
+import pytest
+
+import main
+
+
+def _main(monkeypatch, *arguments):
+    monkeypatch.setattr(sys, "argv", ["main.py", *arguments])
+    main.main()
+
+
+@pytest.mark.parametrize("arguments", [
+    ["--checkpoint-interval", "5", "batch"],
+    ["--checkpoint-interval", "5", "grid"],
+    ["--resume", "run", "batch"],
+    ["--resume", "run", "grid"],
+    ["--shards", "4", "grid"],
+    ["--shard-workers", "2", "grid"],
+])
+def test_single_simulation_options_are_rejected_by_the_subcommands(monkeypatch, capsys, arguments):
+    with pytest.raises(SystemExit) as error:
+        _main(monkeypatch, *arguments)
+    assert error.value.code == 2
+    assert "is not supported by the" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("arguments", [
+    ["--shards", "4", "--shard-workers", "2", "batch"],
+    ["batch", "--shards", "4", "--shard-workers", "2"],
+])
+def test_batch_passes_the_shards_to_every_run(monkeypatch, arguments):
+    batches = []
+
+    class RecordedBatchApp:
+        def __init__(self, *args, overrides=None, **kwargs):
+            batches.append(overrides)
+
+        def run(self):
+            pass
+
+    monkeypatch.setattr(main, "BatchApp", RecordedBatchApp)
+    _main(monkeypatch, *arguments)
+
+    assert batches == [{"shards": 4, "shard_workers": 2}]
@@ -0,0 +1,70 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.fingerprintgrid import FingerprintGrid
+from classes.lib.outputwriterfactory import OutputWriterFactory
+from classes.models.stationtable import StationTable
+from classes.simulators.rssi.interface import RssiInterface
+from classes.simulators.rssi.logdistance import LogDistancePathLossModel
+
+
+@pytest.fixture
+def create_grid(create_app):
+    def create(output_dir, **parameters):
+        app = create_app(output_dir, seed=3, output_format="npz")
+        grid = FingerprintGrid(app.config, app.station_table, str(output_dir), output_prefix="map", **parameters)
+        return grid, OutputWriterFactory.read("npz", grid.start())
+
+    return create
+
+
+def test_grid_covers_the_room_without_margins(tmp_path, create_grid):
+    grid, data = create_grid(tmp_path / "grid", resolution_meters=0.5, samples_per_point=4)
+    config = grid.config
+    points_x, points_y = grid.grid_points()
+
+    assert points_x.min() == config.margin_meters and points_y.min() == config.margin_meters
+    assert points_x.max() <= config.room_dim_meters['x'] - config.margin_meters
+    assert points_y.max() <= config.room_dim_meters['y'] - config.margin_meters
+    assert len(data["position_x"]) == len(points_x) * 4
+    assert data["sample"][:5].tolist() == [0, 1, 2, 3, 0]
+    assert set(grid.station_table.mac.tolist()) <= set(data.keys())
+
+
+def test_chunks_do_not_change_the_radio_map(tmp_path, create_grid):
+    _, whole = create_grid(tmp_path / "whole", resolution_meters=1, samples_per_point=3)
+    _, chunked = create_grid(tmp_path / "chunked", resolution_meters=1, samples_per_point=3, max_chunk_samples=100)
+
+    assert whole.keys() == chunked.keys()
+    for name in whole:
+        np.testing.assert_array_equal(whole[name], chunked[name])
+
+
+def test_logdistance_grid_matches_the_batch_api():
+    stations = StationTable([
+        {"mac": "a", "x": 1, "y": 1, "frequency": 100, "Tx": -50, "n": 2},
+        {"mac": "b", "x": 0, "y": 3, "frequency": 100, "Tx": -60, "n": 3},
+    ])
+    module = LogDistancePathLossModel()
+    positions_x, positions_y = np.array([1, 5, 20, 2.5]), np.array([1, 2, 20, 0.5])
+
+    rssi, status = module.calculate_rssi_grid(stations, positions_x, positions_y, 2)
+    expected_rssi, expected_status = RssiInterface.calculate_rssi_grid(module, stations, positions_x, positions_y, 2)
+
+    assert rssi.shape == (4, 2, 2)
+    np.testing.assert_array_equal(status, expected_status)
+    np.testing.assert_array_equal(rssi[status == module.RECEIVED], expected_rssi[expected_status == module.RECEIVED])
@@ -0,0 +1,101 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from classes.simulation import Simulation
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 10, "seed": 7}
+
+
+@pytest.fixture
+def create_simulation(create_app):
+    def create(output_dir, **overrides):
+        # The stations keep the transmissions schedule, every simulation needs its own ones
+        app = create_app(output_dir, **overrides)
+        return Simulation(app.config, app.station_table, str(output_dir))
+
+    return create
+
+
+def _collect(chunks):
+    collected = {"rssi": [], "trajectory": []}
+    for output, records in chunks:
+        collected[output].append(records)
+    return collected
+
+
+@pytest.mark.parametrize("overrides", [{}, {"trajectory_sampling": {"mode": "heading"}}, {"devices": 3}])
+def test_stream_matches_the_output_files(tmp_path, run_simulation, create_simulation, read_rows, overrides):
+    run_simulation(tmp_path / "files", **overrides)
+    collected = _collect(create_simulation(tmp_path / "stream", **overrides).iter_readings(chunk_size=1000))
+
+    for output in ("rssi", "trajectory"):
+        rows = read_rows(tmp_path / "files" / f"run_{output}.csv")
+        records = np.concatenate(collected[output])
+        assert list(records.dtype.names) == list(rows[0])
+        assert len(records) == len(rows)
+        for name in records.dtype.names:
+            column = [row[name] for row in rows]
+            if records.dtype[name].kind == "f":
+                # The positions are single precision in the records, as in the binary outputs
+                np.testing.assert_allclose(records[name], np.array(column, dtype=float).astype(records.dtype[name]))
+            else:
+                assert records[name].astype(str).tolist() == column
+    assert not os.listdir(tmp_path / "stream")
+
+
+def test_chunks_have_the_requested_size(tmp_path, create_simulation):
+    collected = _collect(create_simulation(tmp_path, simulation_duration_seconds=30).iter_readings(chunk_size=500))
+
+    for output in ("rssi", "trajectory"):
+        sizes = [len(records) for records in collected[output]]
+        assert len(sizes) > 1
+        assert all(size == 500 for size in sizes[:-1])
+        assert 0 < sizes[-1] <= 500
+        assert all(isinstance(records, np.recarray) for records in collected[output])
+    # The records are in time order across the chunks
+    timestamps = np.concatenate([records.timestamp for records in collected["rssi"]])
+    assert np.all(np.diff(timestamps) >= 0)
+
+
+def test_stream_is_lazy(tmp_path, create_simulation):
+    simulation = create_simulation(tmp_path, simulation_duration_seconds=3600, output_trajectory=False)
+    readings = simulation.iter_readings(chunk_size=100)
+    first_chunks = list(itertools.islice(readings, 3))
+    readings.close()
+
+    assert [output for output, _ in first_chunks] == ["rssi"] * 3
+    # Only the first blocks of the hour are simulated
+    assert first_chunks[-1][1].timestamp[-1] < 60
+    assert not os.listdir(tmp_path)
+
+
+def test_trajectory_can_be_left_out(tmp_path, create_simulation):
+    collected = _collect(create_simulation(tmp_path).iter_readings(chunk_size=1000, trajectory=False))
+    assert collected["rssi"]
+    assert not collected["trajectory"]
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1, 1.5, True])
+def test_invalid_chunk_size(tmp_path, create_simulation, chunk_size):
+    with pytest.raises(ValueError):
+        next(create_simulation(tmp_path).iter_readings(chunk_size=chunk_size))
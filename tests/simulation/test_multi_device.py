@@ -0,0 +1,69 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 10, "seed": 7}
+
+
+@pytest.mark.parametrize("overrides", [{}, {"trajectory_sampling": {"mode": "heading"}}])
+def test_first_device_follows_the_single_device_trajectory(tmp_path, run_simulation, read_rows, overrides):
+    run_simulation(tmp_path / "single", **overrides)
+    run_simulation(tmp_path / "multi", devices=4, **overrides)
+
+    single = read_rows(tmp_path / "single" / "run_trajectory.csv")
+    multi = read_rows(tmp_path / "multi" / "run_trajectory.csv")
+    assert "device_id" not in single[0]
+    first_device = [{key: value for key, value in row.items() if key != "device_id"} for row in multi if row["device_id"] == "0"]
+    assert first_device == single
+    assert {row["device_id"] for row in multi} == {"0", "1", "2", "3"}
+    # Rows ordered by time
+    timestamps = [float(row["timestamp"]) for row in multi]
+    assert timestamps == sorted(timestamps)
+
+
+def test_every_transmission_reaches_every_device(tmp_path, run_simulation, read_rows):
+    devices = 5
+    run_simulation(tmp_path / "single", output_trajectory=False)
+    run_simulation(tmp_path / "multi", devices=devices, output_trajectory=False)
+    single = read_rows(tmp_path / "single" / "run_rssi.csv")
+    rows = read_rows(tmp_path / "multi" / "run_rssi.csv")
+
+    assert list(rows[0]) == ["timestamp", "device_id", "position_x", "position_y", "station_mac", "rssi"]
+    # Some packages are lost, but every device receives around the same number as a single device
+    received = np.bincount([int(row["device_id"]) for row in rows], minlength=devices)
+    assert np.all(np.abs(received - len(single)) < 0.2 * len(single))
+    timestamps = [float(row["timestamp"]) for row in rows]
+    assert timestamps == sorted(timestamps)
+    # The devices are at different places
+    first_positions = {(row["position_x"], row["position_y"]) for row in rows if row["timestamp"] == rows[0]["timestamp"]}
+    assert len(first_positions) == devices
+
+
+def test_multi_device_run_is_reproducible(tmp_path, run_simulation, read_bytes):
+    run_simulation(tmp_path / "first", devices=3)
+    run_simulation(tmp_path / "second", devices=3)
+
+    for name in ("run_rssi.csv", "run_trajectory.csv"):
+        assert read_bytes(tmp_path / "first" / name) == read_bytes(tmp_path / "second" / name)
+
+
+@pytest.mark.parametrize("devices", [0, -1, 2.5, True])
+def test_invalid_number_of_devices(tmp_path, run_simulation, devices):
+    with pytest.raises(ValueError):
+        run_simulation(tmp_path, devices=devices)
@@ -0,0 +1,88 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from classes.lib.outputwriterfactory import OutputWriterFactory
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 45, "seed": 5, "trajectory_sampling": {"mode": "heading"}}
+
+
+def test_sharded_run_matches_the_single_loop(tmp_path, run_simulation, read_rows, read_bytes):
+    run_simulation(tmp_path / "loop", metrics=True)
+    run_simulation(tmp_path / "sharded", shards=3, shard_workers=1, metrics=True)
+
+    # The trajectory is generated by the same loop
+    assert read_bytes(tmp_path / "sharded" / "run_trajectory.csv") == read_bytes(tmp_path / "loop" / "run_trajectory.csv")
+    assert sorted(os.listdir(tmp_path / "sharded")) == sorted(os.listdir(tmp_path / "loop"))
+
+    # The same transmissions, only the random RSSI noise and missing packages differ
+    with open(tmp_path / "loop" / "run_metrics.json") as file:
+        loop_counters = json.load(file)["counters"]
+    with open(tmp_path / "sharded" / "run_metrics.json") as file:
+        sharded_counters = json.load(file)["counters"]
+    assert sharded_counters["packets_emitted"] == loop_counters["packets_emitted"]
+    assert sharded_counters["rssi_rows"] == sharded_counters["packets_received"]
+
+    loop = {(row["timestamp"], row["station_mac"]): (row["position_x"], row["position_y"]) for row in read_rows(tmp_path / "loop" / "run_rssi.csv")}
+    sharded = read_rows(tmp_path / "sharded" / "run_rssi.csv")
+    assert abs(len(sharded) - len(loop)) < 0.1 * len(loop)
+    timestamps = [float(row["timestamp"]) for row in sharded]
+    assert timestamps == sorted(timestamps)
+    common = [row for row in sharded if (row["timestamp"], row["station_mac"]) in loop]
+    assert len(common) > 0.8 * len(loop)
+    assert all(loop[(row["timestamp"], row["station_mac"])] == (row["position_x"], row["position_y"]) for row in common)
+
+
+@pytest.mark.parametrize("overrides", [{}, {"devices": 3}, {"output_format": "npz"}, {"output_trajectory": False}, {"shards": 16}])
+def test_sharded_output_does_not_depend_on_the_workers(tmp_path, run_simulation, read_bytes, overrides):
+    overrides = {"shards": 4, **overrides}
+    run_simulation(tmp_path / "serial", shard_workers=1, **overrides)
+    run_simulation(tmp_path / "parallel", shard_workers=2, **overrides)
+
+    assert sorted(os.listdir(tmp_path / "parallel")) == sorted(os.listdir(tmp_path / "serial"))
+    for name in os.listdir(tmp_path / "serial"):
+        if name.endswith(".csv"):
+            assert read_bytes(tmp_path / "parallel" / name) == read_bytes(tmp_path / "serial" / name)
+        else:
+            serial = OutputWriterFactory.read("npz", str(tmp_path / "serial" / name))
+            parallel = OutputWriterFactory.read("npz", str(tmp_path / "parallel" / name))
+            assert serial.keys() == parallel.keys()
+            for column in serial:
+                np.testing.assert_array_equal(parallel[column], serial[column])
+
+
+def test_sharded_run_requires_segments(tmp_path, run_simulation):
+    # Every position of the trajectory is written, so the trajectory is not generated as segments
+    with pytest.raises(ValueError):
+        run_simulation(tmp_path, shards=2, trajectory_sampling=None)
+    assert not [name for name in os.listdir(tmp_path) if "shard" in name]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"shards": 0},
+    {"shards": True},
+    {"shard_workers": 0},
+    {"shards": 2, "checkpoint_interval_seconds": 60},
+])
+def test_invalid_shards_configuration(tmp_path, run_simulation, overrides):
+    with pytest.raises(ValueError):
+        run_simulation(tmp_path, **overrides)
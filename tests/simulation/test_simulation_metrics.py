@@ -0,0 +1,81 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import pytest
+
+from classes.lib.simulationmetrics import SimulationMetrics
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 30, "seed": 1}
+
+
+def _rows(filename):
+    # Without the header
+    with open(filename) as file:
+        return sum(1 for _ in file) - 1
+
+
+def test_metrics_summary_matches_the_output(tmp_path, run_simulation):
+    run_simulation(tmp_path, metrics=True)
+
+    with open(tmp_path / "run_metrics.json") as file:
+        summary = json.load(file)
+    counters = summary["counters"]
+    assert counters["iterations"] == 30000
+    assert counters["trajectory_rows"] == _rows(tmp_path / "run_trajectory.csv")
+    assert counters["rssi_rows"] == counters["packets_received"] == _rows(tmp_path / "run_rssi.csv")
+    assert counters["packets_emitted"] == counters["packets_received"] + counters["packets_dropped"] + counters["packets_below_threshold"]
+    assert counters["packets_dropped"] > 0
+    assert counters["bytes_written"] == os.path.getsize(tmp_path / "run_rssi.csv") + os.path.getsize(tmp_path / "run_trajectory.csv")
+    assert counters["flushes"] >= 2
+    assert set(SimulationMetrics.PHASES) <= set(summary["phases_seconds"])
+    assert sum(summary["phases_seconds"].values()) <= summary["wall_seconds"]
+
+
+def test_metrics_and_profile_are_disabled_by_default(tmp_path, run_simulation):
+    run_simulation(tmp_path)
+
+    assert sorted(os.listdir(tmp_path)) == ["run_rssi.csv", "run_trajectory.csv"]
+
+
+def test_metrics_do_not_change_the_output(tmp_path, run_simulation, read_bytes):
+    run_simulation(tmp_path / "plain")
+    run_simulation(tmp_path / "metrics", metrics=True)
+
+    for name in ("run_rssi.csv", "run_trajectory.csv"):
+        assert read_bytes(tmp_path / "plain" / name) == read_bytes(tmp_path / "metrics" / name)
+
+
+def test_profile_writes_the_statistics(tmp_path, run_simulation):
+    run_simulation(tmp_path, profile=True)
+
+    assert os.path.getsize(tmp_path / "run_profile.prof") > 0
+    with open(tmp_path / "run_profile.txt") as file:
+        assert "_run" in file.read()
+
+
+def test_disabled_metrics_ignore_every_call():
+    metrics = SimulationMetrics(enabled=False)
+    metrics.start()
+    metrics.lap("rssi")
+    metrics.count("iterations", 10)
+    metrics.stop()
+
+    assert metrics.phases["rssi"] == 0.0
+    assert metrics.counters["iterations"] == 0
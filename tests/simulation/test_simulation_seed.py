@@ -0,0 +1,38 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 5, "output_trajectory": False}
+
+
+@pytest.fixture
+def run_seed(run_simulation, read_bytes):
+    def run(output_dir, seed):
+        run_simulation(output_dir, seed=seed)
+        return read_bytes(output_dir / "run_rssi.csv")
+
+    return run
+
+
+def test_same_seed_reproduces_the_run(tmp_path, run_seed):
+    first = run_seed(tmp_path / "first", 42)
+    second = run_seed(tmp_path / "second", 42)
+    other = run_seed(tmp_path / "other", 43)
+
+    assert first == second
+    assert first != other
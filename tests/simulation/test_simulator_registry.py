@@ -0,0 +1,104 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from classes.simulators.registry import SimulatorRegistry
+from classes.simulators.rssi.factory import RssiFactory
+from classes.simulators.rssi.interface import RssiInterface
+from classes.simulators.trajectory.factory import TrajectoryFactory
+from classes.simulators.trajectory.interface import TrajectoryInterface
+
+
+class ConstantRssiModule(RssiInterface):
+    def __init__(self, value: int = -60, noise_rng=None, loss_rng=None):
+        self.value = value
+
+    def calculate_rssi(self, station, current_time, milliseconds_per_iteration, current_x, current_y, speed):
+        return self.value
+
+    def calculate_rssi_batch(self, stations, station_indices, timestamps, milliseconds_per_iteration, positions_x, positions_y, speed):
+        return (np.full(len(station_indices), self.value), np.full(len(station_indices), self.RECEIVED, dtype=np.int8))
+
+
+def test_builtin_simulators_are_loaded_lazily():
+    registry = SimulatorRegistry('trajectory', TrajectoryInterface, {'dummy': 'classes.simulators.trajectory.dummy:DummyPositionModule'})
+
+    assert registry._classes == {}
+    simulator = registry.load('dummy')
+    assert registry.load('dummy') is simulator
+    with pytest.raises(ValueError, match="not available"):
+        registry.load('unknown')
+
+
+def test_simulator_must_implement_the_interface():
+    registry = SimulatorRegistry('rssi', RssiInterface, {'wrong': 'classes.simulators.trajectory.dummy:DummyPositionModule'}, label='RSSI')
+    with pytest.raises(ValueError, match="RssiInterface"):
+        registry.load('wrong')
+
+
+class PlainRssiModule(RssiInterface):
+    # A plugin without constructor, it uses the generator set by the factory
+    def calculate_rssi(self, station, current_time, milliseconds_per_iteration, current_x, current_y, speed):
+        return int(self.noise_rng.integers(-90, -30))
+
+
+class PlainPositionModule(TrajectoryInterface):
+    def calculate_position(self, current_time, milliseconds_per_iteration, last_angle, last_x, last_y, min_x, max_x, min_y, max_y, speed):
+        return (self.rng.uniform(min_x, max_x), self.rng.uniform(min_y, max_y), last_angle)
+
+
+def test_simulators_without_constructor_get_the_generators_as_attributes():
+    RssiFactory.register('plain', PlainRssiModule)
+    TrajectoryFactory.register('plain', PlainPositionModule)
+    noise_rng, loss_rng, rng = (np.random.default_rng(seed) for seed in range(3))
+
+    rssi_module = RssiFactory.create_rssi_simulator('plain', {}, noise_rng=noise_rng, loss_rng=loss_rng)
+    assert rssi_module.noise_rng is noise_rng and rssi_module.loss_rng is loss_rng
+    assert -90 <= rssi_module.calculate_rssi(None, 0, 1, 0, 0, 0.5) < -30
+    position_module = TrajectoryFactory.create_trajectory_simulator('plain', {}, rng=rng)
+    assert position_module.rng is rng
+    # Without generators nothing is set
+    assert not hasattr(RssiFactory.create_rssi_simulator('plain', {}), 'noise_rng')
+    # The parameters of the configuration still reach the constructor
+    with pytest.raises(TypeError):
+        RssiFactory.create_rssi_simulator('plain', {'value': 1})
+
+
+def test_constructor_generators_are_passed_as_arguments():
+    noise_rng = np.random.default_rng(0)
+    module = RssiFactory.create_rssi_simulator('logdistance', {}, noise_rng=noise_rng, loss_rng=np.random.default_rng(1))
+    assert module.noise_rng is noise_rng
+
+
+def test_registered_simulator_runs_a_simulation(tmp_path, run_simulation):
+    RssiFactory.register('constant', ConstantRssiModule)
+    assert 'constant' in RssiFactory.available()
+    overrides = {"simulation_duration_seconds": 2, "output_trajectory": False, "seed": 1,
+                 "simulators": {"trajectory": "daniscemgil2017custom", "trajectory_parameters": {},
+                                "rssi": "constant", "rssi_parameters": {"constant": {"value": -42}}}}
+    run_simulation(tmp_path, **overrides)
+
+    with open(os.path.join(tmp_path, "run_rssi.csv"), "r") as file:
+        lines = file.read().splitlines()
+    assert len(lines) > 1 and all(line.endswith(",-42") for line in lines[1:])
+
+
+def test_unknown_simulator_is_rejected_by_the_configuration(tmp_path, create_app):
+    overrides = {"simulators": {"trajectory": "daniscemgil2017custom", "rssi": "missing"}}
+    with pytest.raises(ValueError, match="RSSI simulator missing not available"):
+        create_app(tmp_path, **overrides)
@@ -0,0 +1,57 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import subprocess
+import sys
+
+# Definimos los paths generales
+script_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(script_dir, "..", "..")
+config_dir = os.path.join(root_dir, "config", "danis2022")
+
+
+def _imported_modules(code):
+    # Fresh interpreter, the modules imported by other tests do not count
+    result = subprocess.run([sys.executable, "-c", code + "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"],
+                            cwd=root_dir, capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def test_main_module_only_imports_the_standard_library():
+    modules = _imported_modules("import main")
+    assert "numpy" not in modules
+    assert not any(name.startswith("classes.") for name in modules)
+
+
+def test_run_without_plot_does_not_import_plotting_libraries(tmp_path):
+    modules = _imported_modules(
+        "from main import App\n"
+        f"app = App({os.path.join(config_dir, 'config.json')!r}, {os.path.join(config_dir, 'stations.json')!r}, {str(tmp_path)!r},"
+        " config_overrides={'simulation_duration_seconds': 1, 'plot_trajectory': False})\n"
+        "app.run_simulation(output_prefix='run')")
+
+    assert "matplotlib" not in modules and "pandas" not in modules
+    assert os.path.exists(tmp_path / "run_trajectory.csv")
+    assert not os.path.exists(tmp_path / "run_trajectory_plot.png")
+
+
+def test_no_plot_option(tmp_path):
+    subprocess.run([sys.executable, "main.py", "--config", os.path.join(config_dir, "config.json"), "--stations", os.path.join(config_dir, "stations.json"),
+                    "--outdir", str(tmp_path), "--no-plot", "--seed", "1"], cwd=root_dir, check=True, capture_output=True)
+
+    outputs = os.listdir(tmp_path)
+    assert any(name.endswith("_trajectory.csv") for name in outputs)
+    assert not any(name.endswith(".png") for name in outputs)
@@ -0,0 +1,88 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from classes.models.station import Station
+from classes.lib.stationscheduler import StationScheduler
+
+
+def _scan_schedule(stations, duration):
+    """Reference schedule, scanning every station on every millisecond."""
+    events = []
+    for current_time in range(duration):
+        for index, station in enumerate(stations):
+            if station.next_transmission_timestamp <= current_time:
+                station.last_transmission_timestamp = current_time
+                events.append((current_time, index))
+    return events
+
+
+def _build_stations():
+    return [
+        Station(mac="a", x=0, y=0, frequency=300, initial_timestamp=15),
+        Station(mac="b", x=1, y=1, frequency=200),
+        Station(mac="c", x=2, y=2, frequency=0),
+        Station(mac="d", x=3, y=3, frequency=200),
+    ]
+
+
+def test_scheduler_matches_full_scan():
+    duration = 2000
+    expected = _scan_schedule(_build_stations(), duration)
+
+    scheduler = StationScheduler(_build_stations())
+    events = []
+    for current_time in range(duration):
+        timestamps, indexes = scheduler.pop_events(current_time, current_time + 1)
+        events.extend(zip(timestamps, indexes))
+
+    assert events == expected
+
+
+def test_scheduler_next_transmission_timestamp():
+    stations = _build_stations()[:2]
+    scheduler = StationScheduler(stations)
+    assert scheduler.next_transmission_timestamp == 200
+    assert scheduler.pop_events(0, 200) == ([], [])
+    assert scheduler.pop_events(200, 201) == ([200], [1])
+    assert stations[1].last_transmission_timestamp == 200
+    assert scheduler.next_transmission_timestamp == 315
+    assert StationScheduler([]).next_transmission_timestamp is None
+
+
+def test_scheduler_events_by_block_match_full_scan():
+    duration = 2000
+    expected = _scan_schedule(_build_stations(), duration)
+
+    scheduler = StationScheduler(_build_stations())
+    events = []
+    for block_start in range(0, duration, 128):
+        timestamps, indexes = scheduler.pop_events(block_start, min(block_start + 128, duration))
+        events.extend(zip(timestamps, indexes))
+
+    assert events == expected
+
+
+def test_scheduler_exact_events_do_not_depend_on_the_step():
+    duration = 2000
+    # Without the stations of frequency 0, which transmit once per iteration
+    expected = [event for event in _scan_schedule(_build_stations(), duration) if event[1] != 2]
+
+    stations = [station for index, station in enumerate(_build_stations()) if index != 2]
+    scheduler = StationScheduler(stations, milliseconds_per_iteration=45)
+    events = []
+    for block_start in range(0, duration, 45 * 7):
+        timestamps, indexes = scheduler.pop_events(block_start, min(block_start + 45 * 7, duration))
+        events.extend(zip(timestamps, [index + (index >= 2) for index in indexes]))
+
+    assert events == expected
@@ -0,0 +1,82 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from classes.simulation import Simulation
+
+STANDARD_MODEL = {"trajectory": "daniscemgil2017", "rssi": "logdistance"}
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 60, "output_trajectory": False, "seed": 1, "metrics": True}
+
+
+@pytest.fixture
+def run_time_step(run_simulation, read_rows):
+    def run(output_dir, milliseconds_per_iteration, **overrides):
+        run_simulation(output_dir, milliseconds_per_iteration=milliseconds_per_iteration, **overrides)
+        with open(os.path.join(output_dir, "run_metrics.json")) as file:
+            counters = json.load(file)["counters"]
+        return (read_rows(os.path.join(output_dir, "run_rssi.csv")), counters)
+
+    return run
+
+
+def test_auto_step_is_a_tenth_of_the_shortest_period(tmp_path, create_app):
+    app = create_app(tmp_path, milliseconds_per_iteration="auto")
+    simulation = Simulation(app.config, app.station_table, str(tmp_path))
+
+    assert simulation._milliseconds_per_iteration() == int(app.station_table.frequency.min()) // 10
+
+
+@pytest.mark.parametrize("simulators", [None, STANDARD_MODEL])
+def test_transmissions_keep_their_exact_timestamps(tmp_path, run_time_step, config_dir, simulators):
+    overrides = {"simulators": simulators} if simulators else {}
+    _, reference = run_time_step(tmp_path / "reference", 1, **overrides)
+    rows, counters = run_time_step(tmp_path / "coarse", 37, **overrides)
+
+    # Same transmissions, every one at its scheduled time instead of the next iteration
+    assert counters["packets_emitted"] == reference["packets_emitted"]
+    assert counters["iterations"] == -(-60000 // 37)
+    with open(os.path.join(config_dir, "stations.json")) as file:
+        stations = {station["mac"]: station for station in json.load(file)}
+    for row in rows:
+        station = stations[row["station_mac"]]
+        timestamp = round(float(row["timestamp"]) * 1000)
+        assert (timestamp - station["initial_timestamp"]) % station["frequency"] == 0
+
+
+def test_coarse_step_rssi_matches_the_1ms_reference(tmp_path, run_time_step, ks_statistic):
+    reference = []
+    coarse = []
+    for seed in range(8):
+        reference += [int(row["rssi"]) for row in run_time_step(tmp_path / f"reference_{seed}", 1, seed=seed, simulation_duration_seconds=120)[0]]
+        coarse += [int(row["rssi"]) for row in run_time_step(tmp_path / f"coarse_{seed}", "auto", seed=seed, simulation_duration_seconds=120)[0]]
+
+    assert abs(len(coarse) - len(reference)) < 0.01 * len(reference)
+    assert abs(np.mean(coarse) - np.mean(reference)) < 0.5
+    assert abs(np.std(coarse) - np.std(reference)) < 0.5
+    assert ks_statistic(reference, coarse) < 0.03
+
+
+@pytest.mark.parametrize("milliseconds_per_iteration", [0, -5, 2.5, "fast"])
+def test_invalid_time_step(tmp_path, create_app, milliseconds_per_iteration):
+    with pytest.raises(ValueError):
+        create_app(tmp_path, milliseconds_per_iteration=milliseconds_per_iteration)
@@ -0,0 +1,97 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.simulators.trajectory.factory import TrajectoryFactory
+
+# Small area, so the bounce rule is exercised several times
+bounds = {'min_x': 0.5, 'max_x': 5, 'min_y': 0.5, 'max_y': 4}
+
+
+def _step_by_step(module, start_time, steps, milliseconds_per_iteration, angle, x, y, speed):
+    positions = []
+    for step in range(steps):
+        x, y, angle = module.calculate_position(current_time=start_time + step * milliseconds_per_iteration, milliseconds_per_iteration=milliseconds_per_iteration,
+                                                last_angle=angle, last_x=x, last_y=y, speed=speed, **bounds)
+        positions.append((x, y, angle))
+    return np.array(positions).T
+
+
+@pytest.mark.parametrize("simulator_name,parameters", [
+    ("daniscemgil2017", {"s": 0}),
+    ("daniscemgil2017custom", {"s": 0, "keep_angle_ms": 300}),
+])
+@pytest.mark.parametrize("milliseconds_per_iteration", [1, 7])
+def test_batch_matches_step_by_step_without_noise(simulator_name, parameters, milliseconds_per_iteration):
+    steps = 60000 // milliseconds_per_iteration
+    reference_module = TrajectoryFactory.create_trajectory_simulator(simulator_name, dict(parameters))
+    batch_module = TrajectoryFactory.create_trajectory_simulator(simulator_name, dict(parameters))
+
+    expected = _step_by_step(reference_module, 1, steps, milliseconds_per_iteration, 0.3, 2, 2, 0.5)
+    result = batch_module.calculate_positions(start_time=1, steps=steps, milliseconds_per_iteration=milliseconds_per_iteration,
+                                              last_angle=0.3, last_x=2, last_y=2, speed=0.5, **bounds)
+
+    np.testing.assert_allclose(np.array(result), expected, atol=1e-9)
+    assert getattr(batch_module, '_last_angle_change_time', None) == getattr(reference_module, '_last_angle_change_time', None)
+
+
+def _increments_and_displacements(xs, ys, angles, window):
+    # Heading increment of every step, and distance covered in consecutive windows of steps
+    increments = np.diff(np.concatenate(([0.3], angles)))
+    displacements = np.hypot(xs[window:] - xs[:-window], ys[window:] - ys[:-window])[::window]
+    # The straight windows of the custom simulator cover the same distance up to the rounding
+    return increments, np.round(displacements, 6)
+
+
+@pytest.mark.parametrize("simulator_name,parameters", [
+    ("daniscemgil2017", {"s": 0.07}),
+    ("daniscemgil2017custom", {"s": 0.07, "keep_angle_ms": 300}),
+])
+@pytest.mark.parametrize("milliseconds_per_iteration", [1, 7])
+def test_batch_matches_step_by_step_distributions_with_noise(ks_statistic, simulator_name, parameters, milliseconds_per_iteration):
+    steps = 60000 // milliseconds_per_iteration
+    window = 200 // milliseconds_per_iteration
+    reference = []
+    batch = []
+    for seed in range(5):
+        # Independent seeds, the batch and the step by step walks only share their distributions
+        reference_module = TrajectoryFactory.create_trajectory_simulator(simulator_name, dict(parameters), rng=np.random.default_rng(seed))
+        batch_module = TrajectoryFactory.create_trajectory_simulator(simulator_name, dict(parameters), rng=np.random.default_rng(100 + seed))
+        reference.append(_increments_and_displacements(*_step_by_step(reference_module, 1, steps, milliseconds_per_iteration, 0.3, 2, 2, 0.5), window))
+        batch.append(_increments_and_displacements(*batch_module.calculate_positions(start_time=1, steps=steps, milliseconds_per_iteration=milliseconds_per_iteration,
+                                                                                     last_angle=0.3, last_x=2, last_y=2, speed=0.5, **bounds), window))
+
+    reference_increments, reference_displacements = (np.concatenate(values) for values in zip(*reference))
+    batch_increments, batch_displacements = (np.concatenate(values) for values in zip(*batch))
+    assert abs(np.mean(batch_increments) - np.mean(reference_increments)) < 0.005
+    assert abs(np.std(batch_increments) / np.std(reference_increments) - 1) < 0.15
+    assert ks_statistic(reference_increments, batch_increments) < 0.03
+    assert abs(np.mean(batch_displacements) / np.mean(reference_displacements) - 1) < 0.02
+    assert abs(np.std(batch_displacements) / np.std(reference_displacements) - 1) < 0.2
+    assert ks_statistic(reference_displacements, batch_displacements) < 0.08
+
+
+def test_custom_batch_keeps_the_angle_lock():
+    keep_angle_ms = 300
+    module = TrajectoryFactory.create_trajectory_simulator("daniscemgil2017custom", {"keep_angle_ms": keep_angle_ms})
+    # Big area, the object never reaches the margins
+    xs, ys, angles = module.calculate_positions(start_time=1, steps=10000, milliseconds_per_iteration=1, last_angle=0, last_x=50, last_y=50,
+                                                min_x=0, max_x=100, min_y=0, max_y=100, speed=0.5)
+
+    change_times = np.flatnonzero(np.diff(np.concatenate(([0], angles)))) + 1
+    assert len(change_times) > 0
+    assert np.all(np.diff(change_times) == keep_angle_ms + 1)
+    assert module._last_angle_change_time == change_times[-1]
@@ -0,0 +1,94 @@
+# Copyright 2024 Alberto Ferrero López
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from classes.models.trajectorysegments import TrajectorySegments
+from classes.simulators.trajectory.daniscemgil2017custom import DanisCemgil2017Custom
+from classes.simulators.trajectory.factory import TrajectoryFactory
+
+# Small area, so the bounce rule is exercised several times
+bounds = {'min_x': 0.5, 'max_x': 5, 'min_y': 0.5, 'max_y': 4}
+
+
+@pytest.mark.parametrize("simulator_name", ["daniscemgil2017", "daniscemgil2017custom"])
+def test_segments_match_positions(simulator_name):
+    segments_module = TrajectoryFactory.create_trajectory_simulator(simulator_name, {}, rng=np.random.default_rng(5))
+    positions_module = TrajectoryFactory.create_trajectory_simulator(simulator_name, {}, rng=np.random.default_rng(5))
+
+    segments = segments_module.calculate_segments(start_time=0, steps=20000, milliseconds_per_iteration=1, last_angle=0.3, last_x=2, last_y=2, speed=0.5, **bounds)
+    expected = positions_module.calculate_positions(start_time=1, steps=20000, milliseconds_per_iteration=1, last_angle=0.3, last_x=2, last_y=2, speed=0.5, **bounds)
+
+    assert segments.end_time == 20000
+    np.testing.assert_allclose(np.array(segments.evaluate(np.arange(1, 20001))), np.array(expected), atol=1e-12)
+    np.testing.assert_allclose(segments.end(), np.array(expected)[:, -1], atol=1e-12)
+
+
+def test_custom_segments_follow_the_heading_changes():
+    module = DanisCemgil2017Custom(keep_angle_ms=300, rng=np.random.default_rng(0))
+    # Big area, the object never reaches the margins
+    segments = module.calculate_segments(start_time=0, steps=60000, milliseconds_per_iteration=1, last_angle=0, last_x=50, last_y=50,
+                                         min_x=0, max_x=100, min_y=0, max_y=100, speed=0.5)
+
+    # One segment per angle lock, instead of one per step
+    assert len(segments) == 200
+    assert segments.steps[0] == 300
+    assert np.all(segments.steps[1:-1] == 301)
+    x, y, _ = segments.evaluate(segments.start_time[1:])
+    np.testing.assert_allclose(x, segments.start_x[1:], rtol=0, atol=0)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_first_outbound_step_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(0.5, 5), rng.uniform(0.5, 4)
+    angle = rng.uniform(0, 2 * np.pi)
+    step_x, step_y = 0.00035 * np.cos(angle), 0.00035 * np.sin(angle)
+
+    k = 1
+    while bounds['min_x'] <= x + k * step_x <= bounds['max_x'] and bounds['min_y'] <= y + k * step_y <= bounds['max_y']:
+        k += 1
+    assert DanisCemgil2017Custom._first_outbound_step(x, y, step_x, step_y, limit=10**9, **bounds) == k
+    assert DanisCemgil2017Custom._first_outbound_step(x, y, step_x, step_y, limit=k - 1, **bounds) == k - 1
+
+
+@pytest.fixture
+def simulation_overrides():
+    return {"simulation_duration_seconds": 30, "seed": 7}
+
+
+def test_simulation_segments_match_every_position(tmp_path, monkeypatch, run_simulation, read_bytes):
+    # Without trajectory output only the transmission times are evaluated
+    run_simulation(tmp_path / "segments", output_trajectory=False)
+    monkeypatch.setattr(DanisCemgil2017Custom, "supports_segments", False)
+    run_simulation(tmp_path / "positions", output_trajectory=False)
+
+    assert read_bytes(tmp_path / "segments" / "run_rssi.csv") == read_bytes(tmp_path / "positions" / "run_rssi.csv")
+
+
+@pytest.mark.parametrize("leaving", [False, True])
+def test_evaluate_many_matches_each_trajectory(leaving):
+    trajectories = []
+    for seed in range(4):
+        module = DanisCemgil2017Custom(keep_angle_ms=300, rng=np.random.default_rng(seed))
+        trajectories.append(module.calculate_segments(start_time=1000, steps=5000, milliseconds_per_iteration=1, last_angle=seed, last_x=2, last_y=2, speed=0.5, **bounds))
+    # Both ends of the block, and the starts of the segments
+    timestamps = np.unique(np.concatenate(([1000, 6000], np.random.default_rng(9).integers(1000, 6001, 500), trajectories[1].start_time)))
+
+    many = TrajectorySegments.evaluate_many(trajectories, timestamps, leaving=leaving)
+
+    for index, trajectory in enumerate(trajectories):
+        for values, expected in zip(many, trajectory.evaluate(timestamps, leaving=leaving)):
+            np.testing.assert_array_equal(values[index], expected)